@@ -0,0 +1,216 @@
+# miAppCalificacion/conversion.py
+
+import threading
+import time
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import Moneda, TasaDeCambio, VersionTasas
+
+
+class TasaNoDisponible(LookupError):
+    pass
+
+
+def _a_fechas(fechas):
+    return np.asarray(fechas, dtype='datetime64[D]')
+
+
+class TablaTasas:
+    """
+    Tabla de tasas en memoria: por cada par (origen_id, destino_id) un arreglo
+    ordenado de fechas (datetime64[D]) y otro de valores (float64). "Tasa a la
+    fecha D" es la última tasa con fecha <= D, resuelta por búsqueda binaria.
+
+    Si un par no está cargado se usa el inverso, y si tampoco, se cruza por
+    la moneda con es_moneda_base=True (origen -> base -> destino).
+    """
+
+    def __init__(self, pares, monedas, base_id=None):
+        self._pares = pares
+        self._monedas = monedas
+        self.base_id = base_id
+
+    @classmethod
+    def cargar(cls):
+        monedas = dict(Moneda.objects.values_list('codigo_iso', 'pk'))
+        base_id = Moneda.objects.filter(es_moneda_base=True).values_list('pk', flat=True).first()
+
+        filas = (
+            TasaDeCambio.objects
+            .order_by('moneda_origen_id', 'moneda_destino_id', 'fecha')
+            .values_list('moneda_origen_id', 'moneda_destino_id', 'fecha', 'valor_tasa')
+        )
+        pares = {}
+        actual = None
+        fechas, valores = [], []
+        for origen, destino, fecha, valor in filas.iterator(chunk_size=5000):
+            if (origen, destino) != actual:
+                if actual is not None:
+                    pares[actual] = (_a_fechas(fechas), np.asarray(valores, dtype=np.float64))
+                actual, fechas, valores = (origen, destino), [], []
+            fechas.append(fecha)
+            valores.append(float(valor))
+        if actual is not None:
+            pares[actual] = (_a_fechas(fechas), np.asarray(valores, dtype=np.float64))
+
+        return cls(pares, monedas, base_id)
+
+    def _id(self, moneda):
+        if isinstance(moneda, Moneda):
+            return moneda.pk
+        if isinstance(moneda, str):
+            try:
+                return self._monedas[moneda.upper()]
+            except KeyError:
+                raise TasaNoDisponible(f'Moneda desconocida: {moneda}')
+        return moneda
+
+    def _a_la_fecha(self, par, fechas):
+        serie_fechas, serie_valores = self._pares[par]
+        posiciones = np.searchsorted(serie_fechas, fechas, side='right') - 1
+        tasas = serie_valores[np.clip(posiciones, 0, None)]
+        return np.where(posiciones >= 0, tasas, np.nan)
+
+    def _directa(self, origen, destino, fechas):
+        if origen == destino:
+            return np.ones(fechas.shape, dtype=np.float64)
+        if (origen, destino) in self._pares:
+            return self._a_la_fecha((origen, destino), fechas)
+        if (destino, origen) in self._pares:
+            return 1.0 / self._a_la_fecha((destino, origen), fechas)
+        return None
+
+    def tasas(self, origen, destino, fechas):
+        """Tasas origen->destino para un arreglo de fechas (NaN donde no hay tasa previa)."""
+        origen, destino = self._id(origen), self._id(destino)
+        fechas = _a_fechas(fechas)
+        resultado = self._directa(origen, destino, fechas)
+        if resultado is None and self.base_id is not None:
+            hacia_base = self._directa(origen, self.base_id, fechas)
+            desde_base = self._directa(self.base_id, destino, fechas)
+            if hacia_base is not None and desde_base is not None:
+                resultado = hacia_base * desde_base
+        if resultado is None:
+            raise TasaNoDisponible(f'No hay tasas para {origen} -> {destino}')
+        return resultado
+
+    def tasa(self, origen, destino, fecha=None):
+        """Tasa escalar a la fecha indicada (hoy por defecto)."""
+        valor = self.tasas(origen, destino, [fecha or date.today()])[0]
+        if np.isnan(valor):
+            raise TasaNoDisponible(f'No hay tasa para {origen} -> {destino} al {fecha}')
+        return float(valor)
+
+    def convertir(self, montos, origenes, destino, fechas):
+        """
+        Convierte arreglos de montos en una sola llamada. `origenes` y `fechas`
+        pueden ser un valor único o arreglos del mismo largo que `montos`.
+        Devuelve float64; NaN donde no hay tasa, incluso si el par no tiene
+        ninguna (tasas() en cambio lanza TasaNoDisponible).
+        """
+        montos = np.asarray(montos, dtype=np.float64)
+        fechas = np.broadcast_to(_a_fechas(fechas), montos.shape)
+        origenes = np.broadcast_to(np.asarray(origenes, dtype=object), montos.shape)
+
+        resultado = np.full(montos.shape, np.nan)
+        for origen in set(origenes.tolist()):
+            mascara = origenes == origen
+            try:
+                resultado[mascara] = montos[mascara] * self.tasas(origen, destino, fechas[mascara])
+            except TasaNoDisponible:
+                continue
+        return resultado
+
+
+# Una tabla por proceso, compartida por sus hilos: (versión, TablaTasas,
+# cargada_en, verificada_en) en una sola tupla para leerla sin lock. El lock
+# evita que varios hilos la recarguen a la vez.
+_cargada = (None, None, 0.0, 0.0)
+_lock = threading.Lock()
+
+
+def _version():
+    """Versión de las tasas en la BD, compartida por todos los procesos."""
+    return VersionTasas.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def _vencer():
+    """Obliga a este proceso a consultar la versión en el próximo obtener_tabla()."""
+    global _cargada
+    with _lock:
+        version, tabla, cargada_en, _ = _cargada
+        _cargada = (version, tabla, cargada_en, float('-inf'))
+
+
+def _vigente(tabla, cargada_en, verificada_en, ahora):
+    return (
+        tabla is not None
+        and ahora - verificada_en < settings.TASAS_VERIFICACION_SEGUNDOS
+        and ahora - cargada_en < settings.TASAS_TTL_SEGUNDOS
+    )
+
+
+def obtener_tabla():
+    """
+    TablaTasas del proceso actual. Cada TASAS_VERIFICACION_SEGUNDOS compara
+    su versión con la de VersionTasas (ver invalidar_tabla) y la recarga si
+    cambió: una escritura hecha en otro proceso, como el worker de
+    importaciones, se ve a más tardar tras ese intervalo. Con más de
+    TASAS_TTL_SEGUNDOS se recarga igual, por si las tasas cambiaron sin
+    pasar por invalidar_tabla.
+    """
+    global _cargada
+    ahora = time.monotonic()
+    version, tabla, cargada_en, verificada_en = _cargada
+    if _vigente(tabla, cargada_en, verificada_en, ahora):
+        return tabla
+    with _lock:
+        # Otro hilo pudo verificarla o recargarla mientras se esperaba el lock.
+        version, tabla, cargada_en, verificada_en = _cargada
+        if _vigente(tabla, cargada_en, verificada_en, ahora):
+            return tabla
+        actual = _version()
+        if tabla is None or actual != version or ahora - cargada_en >= settings.TASAS_TTL_SEGUNDOS:
+            tabla, cargada_en = TablaTasas.cargar(), ahora
+        _cargada = (actual, tabla, cargada_en, ahora)
+        return tabla
+
+
+def invalidar_tabla(**kwargs):
+    """
+    Avanza VersionTasas en la transacción del cambio de tasas. La versión
+    nueva es al menos el reloj en nanosegundos: aunque una transacción que
+    la subió se revierta, la siguiente no repite un número que algún proceso
+    ya cargó. Este proceso la vuelve a consultar de inmediato y de nuevo al
+    confirmar la transacción.
+    """
+    nueva = Greatest(F('version') + 1, Value(time.time_ns()))
+    if not VersionTasas.objects.filter(pk=1).update(version=nueva):
+        VersionTasas.objects.get_or_create(pk=1, defaults={'version': time.time_ns()})
+    _vencer()
+    transaction.on_commit(_vencer)
+
+
+def convertir_calificaciones(queryset, destino):
+    """
+    Convierte monto_impuesto de un queryset de CalificacionTributaria a la
+    moneda `destino`, usando la moneda local del país de la empresa y la
+    tasa vigente al cierre del período. Una sola consulta en total.
+
+    Devuelve (ids, montos_convertidos) como arreglos de NumPy.
+    """
+    filas = list(queryset.values_list(
+        'pk', 'monto_impuesto', 'empresa_subsidiaria__pais_operacion__moneda_local_id', 'fecha_fin_periodo'
+    ))
+    if not filas:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+    ids, montos, monedas, fechas = zip(*filas)
+    tabla = obtener_tabla()
+    convertidos = tabla.convertir(np.asarray(montos, dtype=np.float64), np.asarray(monedas), destino, fechas)
+    return np.asarray(ids, dtype=np.int64), convertidos
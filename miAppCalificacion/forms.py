@@ -0,0 +1,31 @@
+# miAppCalificacion/forms.py
+
+from django import forms
+from .models import Pais
+
+
+class FiltroCalificacionesForm(forms.Form):
+    """Filtros (GET) de las calificaciones; los usa la exportación."""
+
+    identificacion_fiscal = forms.CharField(required=False, label='Identificación fiscal')
+    pais = forms.ModelChoiceField(queryset=Pais.objects.all(), required=False, empty_label='Todos los países')
+    estado = forms.CharField(required=False, max_length=20)
+    inicio_desde = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    inicio_hasta = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def filtrar(self, queryset):
+        """Aplica los filtros válidos; los inválidos se ignoran."""
+        # Con errores, cleaned_data conserva los campos que sí validaron.
+        self.is_valid()
+        datos = self.cleaned_data
+        if datos.get('identificacion_fiscal'):
+            queryset = queryset.filter(empresa_subsidiaria__identificacion_fiscal=datos['identificacion_fiscal'])
+        if datos.get('pais'):
+            queryset = queryset.filter(empresa_subsidiaria__pais_operacion=datos['pais'])
+        if datos.get('estado'):
+            queryset = queryset.filter(estado=datos['estado'])
+        if datos.get('inicio_desde'):
+            queryset = queryset.filter(fecha_inicio_periodo__gte=datos['inicio_desde'])
+        if datos.get('inicio_hasta'):
+            queryset = queryset.filter(fecha_inicio_periodo__lte=datos['inicio_hasta'])
+        return queryset
@@ -0,0 +1,363 @@
+# miAppCalificacion/importacion.py
+
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+
+from miAppUsuario.importacion import ResultadoImportacion
+from miAppUsuario.lectores import en_chunks
+from miAppUsuario.models import ErrorImportacion
+from miAppUsuario.validacion import dataframe_de_texto, errores_de
+from .models import CalificacionTributaria, EmpresaSubsidiaria, Moneda, TasaDeCambio
+from .conversion import invalidar_tabla
+from . import resumenes
+
+COLUMNAS_TASAS = ['moneda_origen', 'moneda_destino', 'fecha', 'valor_tasa']
+COLUMNAS_CALIFICACIONES = [
+    'identificacion_fiscal', 'fecha_inicio_periodo', 'fecha_fin_periodo', 'monto_impuesto', 'estado'
+]
+
+FORMATOS_FECHA = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y')
+
+
+class ValorInvalido(ValueError):
+    """ValueError que además lleva el código de ErrorImportacion y sus parámetros."""
+
+    def __init__(self, mensaje, codigo, **parametros):
+        super().__init__(mensaje)
+        self.codigo = codigo
+        self.parametros = parametros
+
+
+def a_fecha(valor):
+    """Acepta date/datetime (openpyxl) o texto en los FORMATOS_FECHA (CSV)."""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor).strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValorInvalido(
+        f'La fecha "{valor}" no tiene un formato válido (AAAA-MM-DD).', ErrorImportacion.FECHA_INVALIDA
+    )
+
+
+def a_decimal(valor, max_digits, decimal_places):
+    """Decimal que cabe en un DecimalField(max_digits, decimal_places)."""
+    if isinstance(valor, float):
+        valor = repr(valor)
+    try:
+        numero = Decimal(str(valor).strip().replace(',', '.'))
+    except InvalidOperation:
+        raise ValorInvalido(f'"{valor}" no es un número válido.', ErrorImportacion.NUMERO_INVALIDO)
+    if not numero.is_finite():
+        raise ValorInvalido(f'"{valor}" no es un número válido.', ErrorImportacion.NUMERO_INVALIDO)
+    numero = numero.quantize(Decimal(1).scaleb(-decimal_places))
+    if len(numero.as_tuple().digits) > max_digits:
+        raise ValorInvalido(
+            f'"{valor}" excede {max_digits} dígitos.', ErrorImportacion.DIGITOS_EXCEDIDOS, digitos=max_digits
+        )
+    return numero
+
+
+class ImportadorTasas:
+    """
+    Carga masiva de TasaDeCambio con semántica de upsert sobre
+    (moneda_origen, moneda_destino, fecha). Los códigos ISO se resuelven con
+    una sola consulta y cada chunk se escribe con un único
+    bulk_create(update_conflicts=True) en su propia transacción.
+    """
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or getattr(settings, 'IMPORTACION_CHUNK_SIZE', 1000)
+        campo = TasaDeCambio._meta.get_field('valor_tasa')
+        self.max_digits, self.decimal_places = campo.max_digits, campo.decimal_places
+
+    def importar(self, filas, al_terminar_chunk=None):
+        """
+        `filas` es un iterable de (numero_fila, dict) con COLUMNAS_TASAS; las
+        monedas vienen por codigo_iso. Devuelve un ResultadoImportacion.
+        """
+        resultado = ResultadoImportacion()
+        monedas = {codigo.upper(): pk for codigo, pk in Moneda.objects.values_list('codigo_iso', 'pk')}
+
+        for chunk in en_chunks(filas, self.chunk_size):
+            resultado.procesadas += len(chunk)
+            # Una misma clave dos veces en un INSERT ... ON CONFLICT falla en
+            # PostgreSQL: gana la última fila del archivo.
+            tasas = {}
+            for numero_fila, row in chunk:
+                tasa = self._construir(numero_fila, row, monedas, resultado)
+                if tasa is not None:
+                    tasas[(tasa.moneda_origen_id, tasa.moneda_destino_id, tasa.fecha)] = tasa
+            resultado.ultima_fila = chunk[-1][0]
+            pares = {}
+            for origen_id, destino_id, fecha in tasas:
+                pares.setdefault((origen_id, destino_id), set()).add(fecha)
+            # El callback va en la transacción del chunk (ver ImportadorUsuarios.importar).
+            # bulk_create no dispara post_save: se hace lo de signals.tasa_cambiada,
+            # pero dejando el recálculo como RecalculoPendiente en la misma
+            # transacción, así no se pierde si el proceso cae antes de terminar.
+            with transaction.atomic():
+                self._guardar(list(tasas.values()), resultado)
+                if pares:
+                    invalidar_tabla()
+                for (origen_id, destino_id), fechas in pares.items():
+                    rango = resumenes.rango_afectado(origen_id, destino_id, fechas)
+                    if rango is not None:
+                        resumenes.programar_recalculo(*rango, diferir=True)
+                if al_terminar_chunk is not None:
+                    al_terminar_chunk(resultado)
+
+        resumenes.recalcular_pendientes()
+        return resultado
+
+    def _construir(self, numero_fila, row, monedas, resultado):
+        ids = {}
+        for columna in ('moneda_origen', 'moneda_destino'):
+            ids[columna] = monedas.get(str(row[columna]).strip().upper())
+            if ids[columna] is None:
+                resultado.agregar_error(numero_fila, ErrorImportacion.MONEDA_INEXISTENTE, columna, row[columna])
+                return None
+        origen_id, destino_id = ids['moneda_origen'], ids['moneda_destino']
+        if origen_id == destino_id:
+            resultado.agregar_error(numero_fila, ErrorImportacion.MONEDAS_IGUALES, 'moneda_destino', row['moneda_destino'])
+            return None
+        try:
+            fecha = a_fecha(row['fecha'])
+        except ValorInvalido as e:
+            resultado.agregar_error(numero_fila, e.codigo, 'fecha', row['fecha'], **e.parametros)
+            return None
+        try:
+            valor = a_decimal(row['valor_tasa'], self.max_digits, self.decimal_places)
+        except ValorInvalido as e:
+            resultado.agregar_error(numero_fila, e.codigo, 'valor_tasa', row['valor_tasa'], **e.parametros)
+            return None
+        if valor <= 0:
+            resultado.agregar_error(numero_fila, ErrorImportacion.NO_POSITIVO, 'valor_tasa', row['valor_tasa'])
+            return None
+        return TasaDeCambio(moneda_origen_id=origen_id, moneda_destino_id=destino_id, fecha=fecha, valor_tasa=valor)
+
+    def _guardar(self, tasas, resultado):
+        if not tasas:
+            return
+        claves = {(t.moneda_origen_id, t.moneda_destino_id, t.fecha) for t in tasas}
+        fechas = [t.fecha for t in tasas]
+        with transaction.atomic():
+            # Solo para contar creadas vs actualizadas: upsert no lo informa.
+            existentes = set(
+                TasaDeCambio.objects.filter(
+                    moneda_origen_id__in={t.moneda_origen_id for t in tasas},
+                    moneda_destino_id__in={t.moneda_destino_id for t in tasas},
+                    fecha__range=(min(fechas), max(fechas)),
+                ).values_list('moneda_origen_id', 'moneda_destino_id', 'fecha')
+            ) & claves
+            TasaDeCambio.objects.bulk_create(
+                tasas,
+                batch_size=self.chunk_size,
+                update_conflicts=True,
+                unique_fields=['moneda_origen', 'moneda_destino', 'fecha'],
+                update_fields=['valor_tasa'],
+            )
+        resultado.actualizados += len(existentes)
+        resultado.creados += len(tasas) - len(existentes)
+
+
+def _fechas(serie):
+    """
+    Versión vectorizada de a_fecha para una columna de texto. Las fechas de
+    Excel llegan como "AAAA-MM-DD 00:00:00", por eso se miran solo los
+    primeros 10 caracteres. Lo que no calce con ningún formato queda NaT.
+    """
+    texto = serie.str.slice(0, 10)
+    fechas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    for formato in FORMATOS_FECHA:
+        faltan = fechas.isna()
+        if not faltan.any():
+            break
+        fechas[faltan] = pd.to_datetime(texto[faltan], format=formato, errors='coerce')
+    return fechas
+
+
+class ImportadorCalificaciones:
+    """
+    Carga masiva de CalificacionTributaria con upsert sobre la clave natural
+    (empresa_subsidiaria, fecha_inicio_periodo). Las empresas se resuelven
+    por identificacion_fiscal con una sola consulta y las reglas de cada chunk
+    se evalúan como operaciones de pandas sobre columnas.
+
+    Las filas nuevas quedan con `usuario` como usuario_creador; las que ya
+    existían conservan su creador y pasan a tener `usuario` como
+    usuario_modificador.
+    """
+
+    def __init__(self, usuario, chunk_size=None):
+        if usuario is None:
+            raise ValueError('La importación de calificaciones requiere un usuario responsable.')
+        self.usuario = usuario
+        self.chunk_size = chunk_size or getattr(settings, 'IMPORTACION_CHUNK_SIZE', 1000)
+        monto = CalificacionTributaria._meta.get_field('monto_impuesto')
+        self.decimal_places = monto.decimal_places
+        self.digitos_enteros = monto.max_digits - monto.decimal_places
+        self.max_estado = CalificacionTributaria._meta.get_field('estado').max_length
+
+    def importar(self, filas, al_terminar_chunk=None):
+        """
+        `filas` es un iterable de (numero_fila, dict) con COLUMNAS_CALIFICACIONES.
+        Devuelve un ResultadoImportacion.
+        """
+        resultado = ResultadoImportacion()
+        empresas = {}
+        # País y moneda local de cada empresa, para los resúmenes.
+        self.ubicaciones = {}
+        for identificacion, pk, pais_id, moneda_id in EmpresaSubsidiaria.objects.values_list(
+            'identificacion_fiscal', 'pk', 'pais_operacion_id', 'pais_operacion__moneda_local_id'
+        ):
+            empresas[identificacion] = pk
+            self.ubicaciones[pk] = (pais_id, moneda_id)
+
+        for chunk in en_chunks(filas, self.chunk_size):
+            resultado.procesadas += len(chunk)
+            validas, errores = self._validar(chunk, empresas)
+            resultado.agregar_errores(errores)
+            resultado.ultima_fila = chunk[-1][0]
+            with transaction.atomic():
+                self._guardar(self._construir(validas), resultado)
+                if al_terminar_chunk is not None:
+                    al_terminar_chunk(resultado)
+        return resultado
+
+    def _validar(self, chunk, empresas):
+        """Devuelve (DataFrame de filas válidas, [ErrorImportacion])."""
+        df = dataframe_de_texto(chunk)
+        # Índice en `reglas` del primer error de cada fila (ver validacion.errores_de).
+        errores = pd.Series(pd.NA, index=df.index, dtype=object)
+        reglas = []
+
+        def marcar(mascara, codigo, columna, **parametros):
+            mascara = mascara.fillna(False).astype(bool) & errores.isna()
+            if mascara.any():
+                errores[mascara] = len(reglas)
+            reglas.append((codigo, columna, True, parametros))
+
+        df['empresa_id'] = df['identificacion_fiscal'].map(empresas)
+        marcar(df['empresa_id'].isna(), ErrorImportacion.EMPRESA_INEXISTENTE, 'identificacion_fiscal')
+
+        df['inicio'] = _fechas(df['fecha_inicio_periodo'])
+        marcar(df['inicio'].isna(), ErrorImportacion.FECHA_INVALIDA, 'fecha_inicio_periodo')
+        df['fin'] = _fechas(df['fecha_fin_periodo'])
+        marcar(df['fin'].isna(), ErrorImportacion.FECHA_INVALIDA, 'fecha_fin_periodo')
+        marcar(df['fin'] < df['inicio'], ErrorImportacion.PERIODO_INVERTIDO, 'fecha_fin_periodo')
+
+        # Decimal acepta la notación científica con que Excel exporta montos
+        # grandes ("1.5E+07"). Un impuesto no puede ser negativo: las
+        # devoluciones no se registran como calificaciones.
+        df['monto'] = df['monto_impuesto'].str.replace(',', '.', regex=False).map(self._monto)
+        marcar(df['monto'].isna(), ErrorImportacion.NUMERO_INVALIDO, 'monto_impuesto')
+        marcar(df['monto'].map(lambda monto: monto < 0, na_action='ignore'),
+               ErrorImportacion.NEGATIVO, 'monto_impuesto')
+        marcar(df['monto'].map(lambda monto: monto.adjusted() + 1 > self.digitos_enteros, na_action='ignore'),
+               ErrorImportacion.ENTEROS_EXCEDIDOS, 'monto_impuesto', digitos=self.digitos_enteros)
+
+        marcar(df['estado'] == '', ErrorImportacion.OBLIGATORIO, 'estado')
+        marcar(df['estado'].str.len() > self.max_estado,
+               ErrorImportacion.LARGO_EXCEDIDO, 'estado', maximo=self.max_estado)
+
+        return df[errores.isna()], errores_de(df, errores, reglas)
+
+    def _monto(self, texto):
+        """
+        Decimal redondeado a los decimales de monto_impuesto, o None si no es
+        un número. Los que ya exceden los dígitos enteros no se redondean
+        (quantize fallaría); los rechaza la regla ENTEROS_EXCEDIDOS.
+        """
+        try:
+            numero = Decimal(texto)
+        except InvalidOperation:
+            return None
+        if not numero.is_finite():
+            return None
+        if numero and numero.adjusted() >= self.digitos_enteros:
+            return numero
+        return numero.quantize(Decimal(1).scaleb(-self.decimal_places))
+
+    def _construir(self, df):
+        # Una misma clave dos veces en un INSERT ... ON CONFLICT falla en
+        # PostgreSQL: gana la última fila del archivo.
+        calificaciones = {}
+        for empresa_id, inicio, fin, monto, estado in zip(
+            df['empresa_id'], df['inicio'].dt.date, df['fin'].dt.date, df['monto'], df['estado']
+        ):
+            calificaciones[(int(empresa_id), inicio)] = CalificacionTributaria(
+                empresa_subsidiaria_id=int(empresa_id),
+                fecha_inicio_periodo=inicio,
+                fecha_fin_periodo=fin,
+                monto_impuesto=monto,
+                estado=estado,
+                usuario_creador=self.usuario,
+            )
+        return calificaciones
+
+    def _guardar(self, calificaciones, resultado):
+        if not calificaciones:
+            return
+        campos = ['fecha_fin_periodo', 'monto_impuesto', 'estado', 'monto_base']
+        bases = resumenes.montos_base(
+            [self.ubicaciones[c.empresa_subsidiaria_id][1] for c in calificaciones.values()],
+            [c.monto_impuesto for c in calificaciones.values()],
+            [c.fecha_fin_periodo for c in calificaciones.values()],
+        )
+        for calificacion, base in zip(calificaciones.values(), bases):
+            calificacion.monto_base = base
+        with transaction.atomic():
+            # Cómo estaban las que se van a actualizar: sirve para contarlas y
+            # para descontar su aporte anterior de los resúmenes. Bloqueadas
+            # hasta el upsert (en orden de pk, como resumenes._recalcular):
+            # si otra transacción las cambiara entre medio, se restaría un
+            # aporte que ya no es el suyo.
+            previas = [
+                fila for fila in resumenes.filas_de(CalificacionTributaria.objects.filter(
+                    empresa_subsidiaria_id__in={empresa_id for empresa_id, _ in calificaciones},
+                    fecha_inicio_periodo__in={inicio for _, inicio in calificaciones},
+                ).order_by('pk').select_for_update(of=('self',)))
+                if (fila[0], fila[4]) in calificaciones
+            ]
+            existentes = {(fila[0], fila[4]) for fila in previas}
+            nuevas = [c for clave, c in calificaciones.items() if clave not in existentes]
+            actualizadas = [calificaciones[clave] for clave in existentes]
+            for calificacion in actualizadas:
+                calificacion.usuario_modificador = self.usuario
+
+            # Dos upserts: en el de las nuevas usuario_modificador no se toca,
+            # y en ninguno se sobrescribe usuario_creador.
+            if nuevas:
+                CalificacionTributaria.objects.bulk_create(
+                    nuevas,
+                    batch_size=self.chunk_size,
+                    update_conflicts=True,
+                    unique_fields=['empresa_subsidiaria', 'fecha_inicio_periodo'],
+                    update_fields=campos,
+                )
+            if actualizadas:
+                CalificacionTributaria.objects.bulk_create(
+                    actualizadas,
+                    batch_size=self.chunk_size,
+                    update_conflicts=True,
+                    unique_fields=['empresa_subsidiaria', 'fecha_inicio_periodo'],
+                    update_fields=campos + ['usuario_modificador'],
+                )
+            # bulk_create no dispara las señales que mantienen los resúmenes.
+            resumenes.actualizar(restar=previas, sumar=[
+                (c.empresa_subsidiaria_id, *self.ubicaciones[c.empresa_subsidiaria_id], c.estado,
+                 c.fecha_inicio_periodo, c.fecha_fin_periodo, c.monto_impuesto, c.monto_base)
+                for c in calificaciones.values()
+            ])
+        resultado.creados += len(nuevas)
+        resultado.actualizados += len(actualizadas)
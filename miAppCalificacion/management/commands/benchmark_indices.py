@@ -0,0 +1,200 @@
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from miAppUsuario.models import Usuario, Rol
+from miAppCalificacion.models import (
+    CalificacionTributaria, EmpresaSubsidiaria, Moneda, Pais, TasaDeCambio
+)
+
+ESTADOS = ['BORRADOR', 'PENDIENTE', 'APROBADA', 'RECHAZADA']
+
+# Índices que la migración 0003 reemplazó (db_index=False en las FK).
+INDICES_FK_PREVIOS = [
+    (CalificacionTributaria, 'usuario_creador'),
+    (CalificacionTributaria, 'usuario_modificador'),
+    (CalificacionTributaria, 'empresa_subsidiaria'),
+    (TasaDeCambio, 'moneda_origen'),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra volúmenes realistas de CalificacionTributaria/TasaDeCambio y mide '
+        'planes y tiempos de las consultas de reportes antes y después de los índices '
+        'de la migración 0003. Cada corrida se revierte al final (no deja datos).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresas', type=int, default=500)
+        parser.add_argument('--periodos', type=int, default=48, help='Períodos mensuales por empresa.')
+        parser.add_argument('--monedas', type=int, default=8)
+        parser.add_argument('--dias', type=int, default=3650, help='Días de historia de tasas por par.')
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--salida', default='benchmark_indices.json')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        resultados = {'vendor': connection.vendor, 'parametros': options, 'consultas': {}}
+
+        # "Antes" y "después" sobre los mismos datos: misma semilla, y cada
+        # corrida en su propia transacción revertida (el DROP INDEX también).
+        resultados['consultas']['sin_indices'] = self._corrida(options, sin_indices=True)
+        resultados['consultas']['con_indices'] = self._corrida(options, sin_indices=False)
+
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2, default=str, ensure_ascii=False)
+
+        for nombre in resultados['consultas']['con_indices']:
+            antes = resultados['consultas']['sin_indices'][nombre]['mediana_ms']
+            despues = resultados['consultas']['con_indices'][nombre]['mediana_ms']
+            self.stdout.write(f'{nombre:<28} {antes:>9.3f} ms -> {despues:>9.3f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Resultados en {options["salida"]}'))
+
+    def _corrida(self, options, sin_indices):
+        random.seed(options['seed'])
+        try:
+            with transaction.atomic():
+                consultas = self._consultas(self._sembrar(options))
+                if sin_indices:
+                    self._quitar_indices()
+                medidas = self._medir(consultas, options['repeticiones'])
+                raise _Rollback
+        except _Rollback:
+            pass
+        return medidas
+
+    def _sembrar(self, options):
+        monedas = Moneda.objects.bulk_create([
+            Moneda(codigo_iso=f'B{i:02d}', nombre=f'Bench Moneda {i}', es_moneda_base=(i == 0))
+            for i in range(options['monedas'])
+        ])
+        pais = Pais.objects.create(nombre='Bench País', codigo_iso='BZZ', moneda_local=monedas[0])
+        rol = Rol.objects.create(nombre='Bench Rol', descripcion='benchmark')
+        usuarios = Usuario.objects.bulk_create([
+            Usuario(email=f'bench{i}@bench.invalid', first_name=f'Bench{i}', rol_usuario=rol, pais_usuario=pais)
+            for i in range(50)
+        ])
+        empresas = EmpresaSubsidiaria.objects.bulk_create([
+            EmpresaSubsidiaria(
+                nombre_legal=f'Bench Empresa {i}', identificacion_fiscal=f'BENCH-{i}',
+                actividad_principal='benchmark', regimen_fiscal='general', pais_operacion=pais,
+            )
+            for i in range(options['empresas'])
+        ])
+
+        inicio = date(2015, 1, 1)
+        calificaciones = []
+        for empresa in empresas:
+            for p in range(options['periodos']):
+                desde = date(inicio.year + (inicio.month - 1 + p) // 12, (inicio.month - 1 + p) % 12 + 1, 1)
+                calificaciones.append(CalificacionTributaria(
+                    empresa_subsidiaria=empresa,
+                    fecha_inicio_periodo=desde,
+                    fecha_fin_periodo=desde + timedelta(days=27),
+                    monto_impuesto=Decimal(random.randint(1000, 10_000_000)) / 100,
+                    estado=random.choice(ESTADOS),
+                    usuario_creador=random.choice(usuarios),
+                    usuario_modificador=random.choice(usuarios) if random.random() < 0.1 else None,
+                ))
+        CalificacionTributaria.objects.bulk_create(calificaciones, batch_size=5000)
+
+        tasas = []
+        base = monedas[0]
+        for moneda in monedas[1:]:
+            valor = random.uniform(0.5, 1000)
+            for d in range(options['dias']):
+                valor *= random.uniform(0.99, 1.01)
+                tasas.append(TasaDeCambio(
+                    moneda_origen=moneda, moneda_destino=base,
+                    fecha=inicio + timedelta(days=d), valor_tasa=Decimal(f'{valor:.6f}'),
+                ))
+        TasaDeCambio.objects.bulk_create(tasas, batch_size=5000)
+
+        return {'empresas': empresas, 'usuarios': usuarios, 'monedas': monedas, 'inicio': inicio}
+
+    def _consultas(self, contexto):
+        empresa = contexto['empresas'][len(contexto['empresas']) // 2]
+        usuario = contexto['usuarios'][7]
+        origen, destino = contexto['monedas'][1], contexto['monedas'][0]
+        inicio = contexto['inicio']
+        return {
+            'empresa_rango_fin': lambda: list(
+                CalificacionTributaria.objects.filter(
+                    empresa_subsidiaria=empresa,
+                    fecha_fin_periodo__range=(inicio, inicio + timedelta(days=365)),
+                ).values_list('pk', 'monto_impuesto')
+            ),
+            'estado_rango_inicio': lambda: list(
+                CalificacionTributaria.objects.filter(
+                    estado='PENDIENTE',
+                    fecha_inicio_periodo__range=(inicio, inicio + timedelta(days=60)),
+                ).values_list('pk', flat=True)
+            ),
+            'creador_recientes': lambda: list(
+                CalificacionTributaria.objects.filter(usuario_creador=usuario)
+                .order_by('-fecha_inicio_periodo').values_list('pk', flat=True)[:50]
+            ),
+            'modificador_recientes': lambda: list(
+                CalificacionTributaria.objects.filter(usuario_modificador=usuario)
+                .order_by('-fecha_inicio_periodo').values_list('pk', flat=True)[:50]
+            ),
+            'tasa_vigente_a_fecha': lambda: (
+                TasaDeCambio.objects.filter(
+                    moneda_origen=origen, moneda_destino=destino,
+                    fecha__lte=inicio + timedelta(days=1234),
+                ).order_by('-fecha').values_list('valor_tasa', flat=True).first()
+            ),
+        }
+
+    def _quitar_indices(self):
+        """Vuelve al esquema previo a 0003: sin Meta.indexes y con los índices simples de las FK."""
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for modelo in (CalificacionTributaria, TasaDeCambio):
+                for indice in modelo._meta.indexes:
+                    cursor.execute(f'DROP INDEX {quote(indice.name)}')
+            for modelo, campo in INDICES_FK_PREVIOS:
+                columna = modelo._meta.get_field(campo).column
+                cursor.execute(
+                    f'CREATE INDEX {quote("bench_" + columna)} '
+                    f'ON {quote(modelo._meta.db_table)} ({quote(columna)})'
+                )
+
+    def _medir(self, consultas, repeticiones):
+        resultados = {}
+        for nombre, consulta in consultas.items():
+            consulta()  # calentamiento
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                consulta()
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            resultados[nombre] = {
+                'mediana_ms': statistics.median(tiempos),
+                'min_ms': min(tiempos),
+                'max_ms': max(tiempos),
+                'plan': self._plan(nombre, consultas),
+            }
+        return resultados
+
+    def _plan(self, nombre, consultas):
+        # Se captura el SQL real de la consulta y se le pide el plan al motor.
+        with CaptureQueriesContext(connection) as capturadas:
+            consultas[nombre]()
+        sql = capturadas.captured_queries[-1]['sql']
+        prefijo = 'EXPLAIN (ANALYZE, BUFFERS) ' if connection.vendor == 'postgresql' else 'EXPLAIN QUERY PLAN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefijo + sql)
+            return [' | '.join(str(c) for c in fila) for fila in cursor.fetchall()]
@@ -0,0 +1,55 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from miAppUsuario.lectores import EXTENSIONES_SOPORTADAS
+from miAppUsuario.models import Auditoria, Usuario
+from miAppUsuario.trabajos import procesar
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa calificaciones tributarias desde un CSV/XLSX con columnas '
+        'identificacion_fiscal, fecha_inicio_periodo, fecha_fin_periodo, monto_impuesto, estado. '
+        'Las calificaciones existentes para la misma empresa y período se actualizan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument(
+            '--usuario', required=True,
+            help='Email del usuario que queda como creador (o modificador) de las calificaciones.'
+        )
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        nombre = os.path.basename(ruta)
+        if not nombre.lower().endswith(EXTENSIONES_SOPORTADAS):
+            raise CommandError(f'Formato no soportado. Use {", ".join(EXTENSIONES_SOPORTADAS)}.')
+        try:
+            usuario = Usuario.objects.get(email=options['usuario'])
+        except Usuario.DoesNotExist:
+            raise CommandError(f'No existe un usuario con el email {options["usuario"]}.')
+        try:
+            archivo = open(ruta, 'rb')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        auditoria = Auditoria.objects.create(
+            filename=nombre,
+            tipo=Auditoria.TIPO_CALIFICACIONES,
+            status=Auditoria.STATUS_IMPORTING,
+            subido_por=usuario,
+        )
+        self.stdout.write(f'Importación {auditoria.pk}: procesando {nombre}...')
+        procesar(auditoria, archivo)
+
+        auditoria.refresh_from_db()
+        self.stdout.write(
+            f'Importación {auditoria.pk}: {auditoria.status}, {auditoria.imported_count} creadas, '
+            f'{auditoria.updated_count} actualizadas, {auditoria.error_count} errores.'
+        )
+        for error in auditoria.errores.all()[:20]:
+            self.stderr.write(f'  {error}')
+        if auditoria.status == Auditoria.STATUS_FAILED:
+            raise CommandError('La importación falló.')
@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from miAppUsuario.lectores import EXTENSIONES_SOPORTADAS
+from miAppUsuario.models import Auditoria
+from miAppUsuario.trabajos import procesar
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa tasas de cambio desde un CSV/XLSX con columnas '
+        'moneda_origen, moneda_destino, fecha, valor_tasa (códigos ISO). '
+        'Las tasas existentes para el mismo par y fecha se actualizan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        nombre = os.path.basename(ruta)
+        if not nombre.lower().endswith(EXTENSIONES_SOPORTADAS):
+            raise CommandError(f'Formato no soportado. Use {", ".join(EXTENSIONES_SOPORTADAS)}.')
+        try:
+            archivo = open(ruta, 'rb')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        # Se registra en Auditoria igual que una carga web, para ver el
+        # progreso en /usuarios/importaciones/<pk>/ mientras corre.
+        auditoria = Auditoria.objects.create(
+            filename=nombre,
+            tipo=Auditoria.TIPO_TASAS,
+            status=Auditoria.STATUS_IMPORTING,
+        )
+        self.stdout.write(f'Importación {auditoria.pk}: procesando {nombre}...')
+        procesar(auditoria, archivo)
+
+        auditoria.refresh_from_db()
+        self.stdout.write(
+            f'Importación {auditoria.pk}: {auditoria.status}, {auditoria.imported_count} creadas, '
+            f'{auditoria.updated_count} actualizadas, {auditoria.error_count} errores.'
+        )
+        for error in auditoria.errores.all()[:20]:
+            self.stderr.write(f'  {error}')
+        if auditoria.status == Auditoria.STATUS_FAILED:
+            raise CommandError('La importación falló.')
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from miAppCalificacion.models import ResumenCalificacionEmpresa, ResumenCalificacionPais
+from miAppCalificacion.resumenes import reconstruir, recalcular_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula desde cero las tablas resumen del dashboard de calificaciones. '
+        'Necesario tras cambios que no pasan por señales ni por la importación masiva '
+        '(update()/delete() sobre querysets, SQL directo), al cambiar el país de una '
+        'empresa y después de la migración 0005 (monto_base de cada calificación).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument(
+            '--pendientes', action='store_true',
+            help='Solo procesa los recálculos pendientes de cambios de tasas, sin reconstruir todo.'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        if options['pendientes']:
+            procesados = recalcular_pendientes(chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{procesados} recálculos pendientes procesados en {time.perf_counter() - inicio:.1f} s.'
+            ))
+            return
+        reconstruir(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Resúmenes reconstruidos en {time.perf_counter() - inicio:.1f} s: '
+            f'{ResumenCalificacionPais.objects.count()} por país, '
+            f'{ResumenCalificacionEmpresa.objects.count()} por empresa.'
+        ))
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='calificaciontributaria',
+            name='empresa_subsidiaria',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='miAppCalificacion.empresasubsidiaria', verbose_name='Empresa Subsidiaria'),
+        ),
+        migrations.AlterField(
+            model_name='calificaciontributaria',
+            name='usuario_creador',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='calificaciones_creadas', to=settings.AUTH_USER_MODEL, verbose_name='Usuario Creador'),
+        ),
+        migrations.AlterField(
+            model_name='calificaciontributaria',
+            name='usuario_modificador',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='calificaciones_modificadas', to=settings.AUTH_USER_MODEL, verbose_name='Usuario Modificador'),
+        ),
+        migrations.AlterField(
+            model_name='tasadecambio',
+            name='moneda_origen',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='tasas_como_origen', to='miAppCalificacion.moneda', verbose_name='Moneda Origen'),
+        ),
+        migrations.AddIndex(
+            model_name='calificaciontributaria',
+            index=models.Index(fields=['empresa_subsidiaria', 'fecha_fin_periodo'], name='calif_empresa_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificaciontributaria',
+            index=models.Index(fields=['estado', 'fecha_inicio_periodo'], name='calif_estado_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificaciontributaria',
+            index=models.Index(fields=['usuario_creador', '-fecha_inicio_periodo'], name='calif_creador_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificaciontributaria',
+            index=models.Index(condition=models.Q(('usuario_modificador__isnull', False)), fields=['usuario_modificador', '-fecha_inicio_periodo'], name='calif_modificador_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasadecambio',
+            index=models.Index(fields=['moneda_origen', 'moneda_destino', '-fecha'], include=('valor_tasa',), name='tasa_par_fecha_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0003_indices_reportes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenCalificacionEmpresa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(max_length=20)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('monto_total', models.DecimalField(decimal_places=2, default=0, max_digits=22)),
+                ('monto_base', models.DecimalField(decimal_places=2, default=0, max_digits=22)),
+                ('sin_tasa', models.IntegerField(default=0)),
+                ('empresa_subsidiaria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_calificaciones', to='miAppCalificacion.empresasubsidiaria')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Calificaciones por Empresa',
+                'verbose_name_plural': 'Resúmenes de Calificaciones por Empresa',
+                'unique_together': {('empresa_subsidiaria', 'estado')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenCalificacionPais',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(max_length=20)),
+                ('periodo', models.DateField()),
+                ('cantidad', models.IntegerField(default=0)),
+                ('monto_total', models.DecimalField(decimal_places=2, default=0, max_digits=22)),
+                ('monto_base', models.DecimalField(decimal_places=2, default=0, max_digits=22)),
+                ('sin_tasa', models.IntegerField(default=0)),
+                ('pais', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_calificaciones', to='miAppCalificacion.pais')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Calificaciones por País',
+                'verbose_name_plural': 'Resúmenes de Calificaciones por País',
+                'unique_together': {('pais', 'estado', 'periodo')},
+            },
+        ),
+    ]
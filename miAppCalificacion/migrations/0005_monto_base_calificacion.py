@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:27
+
+from django.db import migrations, models
+
+# Las calificaciones existentes quedan con monto_base NULL: después de migrar
+# hay que correr `manage.py reconstruir_resumenes`, que lo calcula y rehace
+# los resúmenes con esos mismos valores.
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0004_resumenes_calificaciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calificaciontributaria',
+            name='monto_base',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=22, null=True, verbose_name='Monto en Moneda Base'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+def crear_fila(apps, schema_editor):
+    VersionTasas = apps.get_model('miAppCalificacion', 'VersionTasas')
+    VersionTasas.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0005_monto_base_calificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionTasas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versión de Tasas',
+                'verbose_name_plural': 'Versión de Tasas',
+            },
+        ),
+        migrations.RunPython(crear_fila, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0006_version_tasas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecalculoPendiente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('desde', models.DateField(blank=True, null=True)),
+                ('hasta', models.DateField(blank=True, null=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('moneda', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='miAppCalificacion.moneda')),
+            ],
+            options={
+                'verbose_name': 'Recálculo Pendiente',
+                'verbose_name_plural': 'Recálculos Pendientes',
+            },
+        ),
+    ]
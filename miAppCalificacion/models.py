@@ -14,11 +14,25 @@ class CalificacionTributaria(models.Model):
         max_length = 20,
         verbose_name = "Estado"
     )
+    # Lo que esta calificación suma hoy a monto_base de los resúmenes (NULL:
+    # cuenta en sin_tasa). Se guarda para descontar exactamente eso aunque
+    # las tasas hayan cambiado; lo mantiene miAppCalificacion.resumenes.
+    monto_base = models.DecimalField(
+        max_digits = 22,
+        decimal_places = 2,
+        null = True,
+        blank = True,
+        editable = False,
+        verbose_name = "Monto en Moneda Base"
+    )
+    # Los índices simples de las FK se reemplazan por los compuestos/parciales
+    # de Meta.indexes, que también cubren las búsquedas por la FK sola.
     usuario_creador = models.ForeignKey(
         Usuario,
         on_delete=models.PROTECT,
         related_name = 'calificaciones_creadas',
-        verbose_name ='Usuario Creador'
+        verbose_name ='Usuario Creador',
+        db_index=False
     )
     usuario_modificador = models.ForeignKey(
         Usuario,
@@ -26,18 +40,34 @@ class CalificacionTributaria(models.Model):
         related_name = 'calificaciones_modificadas',
         null=True,
         blank=True,
-        verbose_name = 'Usuario Modificador'
+        verbose_name = 'Usuario Modificador',
+        db_index=False
     )
     empresa_subsidiaria = models.ForeignKey(
         'EmpresaSubsidiaria',
         on_delete = models.CASCADE,
-        verbose_name = 'Empresa Subsidiaria'
+        verbose_name = 'Empresa Subsidiaria',
+        db_index=False
     )
 
     class Meta:
         verbose_name = "Calificación Tributaria"
         verbose_name_plural = "Calificaciones Tributarias"
         unique_together = ('empresa_subsidiaria', 'fecha_inicio_periodo')
+        indexes = [
+            # Reportes por empresa y rango de cierre de período.
+            models.Index(fields=['empresa_subsidiaria', 'fecha_fin_periodo'], name='calif_empresa_fin_idx'),
+            # Reportes por estado y rango de inicio de período.
+            models.Index(fields=['estado', 'fecha_inicio_periodo'], name='calif_estado_inicio_idx'),
+            # "Mis calificaciones", las más recientes primero.
+            models.Index(fields=['usuario_creador', '-fecha_inicio_periodo'], name='calif_creador_inicio_idx'),
+            # La mayoría de las filas nunca se modifican: solo se indexan las que sí.
+            models.Index(
+                fields=['usuario_modificador', '-fecha_inicio_periodo'],
+                name='calif_modificador_idx',
+                condition=models.Q(usuario_modificador__isnull=False),
+            ),
+        ]
 
 class EmpresaSubsidiaria(models.Model):
     nombre_legal = models.CharField(max_length=255, unique=True)
@@ -103,11 +133,13 @@ class Moneda(models.Model):
         return f"{self.nombre} ({self.codigo_iso})"
 
 class TasaDeCambio(models.Model):
+    # El índice de unique_together (origen, destino, fecha) ya cubre moneda_origen.
     moneda_origen = models.ForeignKey(
         'Moneda',
         on_delete = models.PROTECT,
         related_name = 'tasas_como_origen',
-        verbose_name = "Moneda Origen"
+        verbose_name = "Moneda Origen",
+        db_index=False
     )
     moneda_destino = models.ForeignKey(
         'Moneda',
@@ -126,6 +158,78 @@ class TasaDeCambio(models.Model):
         verbose_name = "Tasa de Cambio"
         verbose_name_plural = "Tasas de Cambio"
         unique_together = ('moneda_origen', 'moneda_destino', 'fecha')
+        indexes = [
+            # Última tasa de un par a una fecha: en PostgreSQL INCLUDE permite
+            # resolverla con un index-only scan sin leer la tabla.
+            models.Index(
+                fields=['moneda_origen', 'moneda_destino', '-fecha'],
+                include=['valor_tasa'],
+                name='tasa_par_fecha_desc_idx',
+            ),
+        ]
 
     def __str__(self):
-        return f"1 {self.moneda_origen.codigo_iso} = {self.valor_tasa} {self.moneda_destino.codigo_iso} ({self.fecha})"
\ No newline at end of file
+        return f"1 {self.moneda_origen.codigo_iso} = {self.valor_tasa} {self.moneda_destino.codigo_iso} ({self.fecha})"
+
+# Versión de las tasas de cambio (una sola fila). conversion.invalidar_tabla
+# la incrementa en la misma transacción que el cambio y cada proceso la
+# compara con la de su TablaTasas en memoria: vive en la BD porque el cache
+# por defecto (locmem) no se comparte entre procesos.
+class VersionTasas(models.Model):
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Versión de Tasas"
+        verbose_name_plural = "Versión de Tasas"
+
+# Tablas resumen del dashboard de calificaciones. Las mantiene
+# miAppCalificacion.resumenes en forma incremental (señales e importaciones
+# masivas) y se pueden reconstruir con `manage.py reconstruir_resumenes`.
+class ResumenCalificacionPais(models.Model):
+    pais = models.ForeignKey('Pais', on_delete=models.CASCADE, related_name='resumenes_calificaciones')
+    estado = models.CharField(max_length=20)
+    # Primer día del mes de fecha_inicio_periodo.
+    periodo = models.DateField()
+    cantidad = models.IntegerField(default=0)
+    # En la moneda local del país.
+    monto_total = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    # En la moneda base, con la tasa vigente al cierre de cada período.
+    monto_base = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    # Calificaciones sin tasa hacia la moneda base (no suman en monto_base).
+    sin_tasa = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Resumen de Calificaciones por País"
+        verbose_name_plural = "Resúmenes de Calificaciones por País"
+        unique_together = ('pais', 'estado', 'periodo')
+
+class ResumenCalificacionEmpresa(models.Model):
+    empresa_subsidiaria = models.ForeignKey(
+        'EmpresaSubsidiaria', on_delete=models.CASCADE, related_name='resumenes_calificaciones'
+    )
+    estado = models.CharField(max_length=20)
+    cantidad = models.IntegerField(default=0)
+    monto_total = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    monto_base = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    sin_tasa = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Resumen de Calificaciones por Empresa"
+        verbose_name_plural = "Resúmenes de Calificaciones por Empresa"
+        unique_together = ('empresa_subsidiaria', 'estado')
+
+# Recálculos de monto_base que afectaban a demasiadas calificaciones para
+# hacerlos dentro del request que cambió las tasas (ver
+# resumenes.programar_recalculo). Los procesa el worker de
+# `manage.py procesar_importaciones`.
+class RecalculoPendiente(models.Model):
+    # Moneda local de las calificaciones afectadas; vacía = todas.
+    moneda = models.ForeignKey('Moneda', on_delete=models.CASCADE, null=True, blank=True)
+    # Rango [desde, hasta) de fecha_fin_periodo; un extremo vacío no limita.
+    desde = models.DateField(null=True, blank=True)
+    hasta = models.DateField(null=True, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Recálculo Pendiente"
+        verbose_name_plural = "Recálculos Pendientes"
@@ -0,0 +1,295 @@
+# miAppCalificacion/resumenes.py
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from miAppUsuario.lectores import en_chunks
+from .models import (
+    CalificacionTributaria, Moneda, RecalculoPendiente, ResumenCalificacionEmpresa, ResumenCalificacionPais,
+    TasaDeCambio,
+)
+from .conversion import obtener_tabla
+
+# Lo que una calificación aporta a los resúmenes. Las importaciones masivas
+# arman las mismas tuplas sin consultar la calificación. monto_base es el
+# valor guardado en la calificación: lo que se restó o sumó la última vez.
+CAMPOS = (
+    'empresa_subsidiaria_id',
+    'empresa_subsidiaria__pais_operacion_id',
+    'empresa_subsidiaria__pais_operacion__moneda_local_id',
+    'estado',
+    'fecha_inicio_periodo',
+    'fecha_fin_periodo',
+    'monto_impuesto',
+    'monto_base',
+)
+COLUMNAS = ['empresa_id', 'pais_id', 'moneda_id', 'estado', 'inicio', 'fin', 'monto', 'base']
+METRICAS = ['cantidad', 'monto_total', 'monto_base', 'sin_tasa']
+
+CENTAVO = Decimal('0.01')
+LOTE_UPSERT = 500
+
+# (modelo, columnas del DataFrame que forman la clave, campos del modelo)
+RESUMENES = [
+    (ResumenCalificacionPais, ['pais_id', 'estado', 'periodo'], ['pais_id', 'estado', 'periodo']),
+    (ResumenCalificacionEmpresa, ['empresa_id', 'estado'], ['empresa_subsidiaria_id', 'estado']),
+]
+
+
+def filas_de(queryset):
+    """Tuplas CAMPOS de un queryset de CalificacionTributaria."""
+    return queryset.values_list(*CAMPOS)
+
+
+def montos_base(monedas, montos, fechas):
+    """
+    monto_base de cada calificación con las tasas actuales (la vigente al
+    cierre del período): Decimal con dos decimales, o None si no hay tasa.
+    """
+    tabla = obtener_tabla()
+    if tabla.base_id is None or not len(montos):
+        return [None] * len(montos)
+    base = tabla.convertir(np.asarray(montos, dtype=np.float64), np.asarray(monedas), tabla.base_id, list(fechas))
+    return [None if np.isnan(valor) else Decimal(repr(float(valor))).quantize(CENTAVO) for valor in base]
+
+
+def _con_base(filas, bases):
+    return [(*fila[:-1], base) for fila, base in zip(filas, bases)]
+
+
+def _aportes(filas, signo):
+    """DataFrame con una fila por calificación y lo que suma (signo=1) o resta (-1)."""
+    df = pd.DataFrame(list(filas), columns=COLUMNAS)
+    df['periodo'] = df['inicio'].map(lambda fecha: fecha.replace(day=1))
+    df['cantidad'] = signo
+    df['monto_total'] = df['monto'].map(lambda monto: monto * signo)
+    df['monto_base'] = df['base'].map(lambda base: (base or 0) * signo)
+    df['sin_tasa'] = df['base'].isna().astype(int) * signo
+    return df
+
+
+def _deltas(restar, sumar):
+    partes = [_aportes(filas, signo) for filas, signo in ((list(restar), -1), (list(sumar), 1)) if filas]
+    if not partes:
+        return None
+    return pd.concat(partes, ignore_index=True)
+
+
+def _nativo(valor):
+    """Escalares de NumPy/pandas a tipos de Python para los parámetros SQL."""
+    return valor.item() if hasattr(valor, 'item') else valor
+
+
+def _aplicar(modelo, columnas, campos, aportes):
+    """
+    Suma los aportes agrupados a las filas resumen con un
+    INSERT ... ON CONFLICT DO UPDATE SET x = x + EXCLUDED.x: la suma la hace
+    la BD sobre la fila bloqueada, así dos transacciones que tocan la misma
+    clave (exista o no) no se pisan. Las filas que quedan en cero se eliminan.
+    """
+    grupos = aportes.groupby(columnas, sort=False).agg({
+        'cantidad': 'sum', 'monto_total': 'sum', 'monto_base': 'sum', 'sin_tasa': 'sum',
+    })
+    filas = []
+    for clave, fila in grupos.iterrows():
+        clave = tuple(clave) if isinstance(clave, tuple) else (clave,)
+        filas.append([_nativo(valor) for valor in clave] + [
+            int(fila['cantidad']),
+            Decimal(fila['monto_total']).quantize(CENTAVO),
+            Decimal(fila['monto_base']).quantize(CENTAVO),
+            int(fila['sin_tasa']),
+        ])
+
+    q = connection.ops.quote_name
+    tabla = q(modelo._meta.db_table)
+    claves = [q(modelo._meta.get_field(campo).column) for campo in campos]
+    metricas = [q(metrica) for metrica in METRICAS]
+    marcas = '(' + ', '.join(['%s'] * (len(claves) + len(metricas))) + ')'
+    with connection.cursor() as cursor:
+        for lote in en_chunks(filas, LOTE_UPSERT):
+            cursor.execute(
+                f'INSERT INTO {tabla} ({", ".join(claves + metricas)}) '
+                f'VALUES {", ".join([marcas] * len(lote))} '
+                f'ON CONFLICT ({", ".join(claves)}) DO UPDATE SET '
+                + ', '.join(f'{m} = {tabla}.{m} + EXCLUDED.{m}' for m in metricas),
+                [valor for fila in lote for valor in fila],
+            )
+
+    filtro = {f'{campo}__in': set(grupos.index.get_level_values(i)) for i, campo in enumerate(campos)}
+    modelo.objects.filter(cantidad=0, **filtro).delete()
+
+
+def actualizar(restar=(), sumar=()):
+    """
+    Aplica a los resúmenes el cambio de un grupo de calificaciones: `restar`
+    son las tuplas CAMPOS como estaban antes y `sumar` como quedaron.
+    """
+    aportes = _deltas(restar, sumar)
+    if aportes is None:
+        return
+    with transaction.atomic():
+        for modelo, columnas, campos in RESUMENES:
+            _aplicar(modelo, columnas, campos, aportes)
+
+
+def _recalcular(queryset, chunk_size, sumar_todas=False):
+    """
+    Recalcula monto_base de las calificaciones de `queryset` con las tasas
+    actuales, por chunks de pk bloqueados con select_for_update. Las que
+    cambian se guardan y se corrigen en los resúmenes restando su valor
+    anterior; con `sumar_todas` (reconstruir) se suman todas desde cero.
+    Devuelve cuántas cambiaron.
+    """
+    cambiadas = 0
+    ultimo = 0
+    while True:
+        with transaction.atomic():
+            filas = list(
+                queryset.filter(pk__gt=ultimo).order_by('pk').select_for_update(of=('self',))
+                .values_list('pk', *CAMPOS)[:chunk_size]
+            )
+            if not filas:
+                return cambiadas
+            ultimo = filas[-1][0]
+            pks, filas = [fila[0] for fila in filas], [fila[1:] for fila in filas]
+            nuevas = _con_base(filas, montos_base(
+                [fila[2] for fila in filas], [fila[6] for fila in filas], [fila[5] for fila in filas]
+            ))
+            distintas = [i for i, (fila, nueva) in enumerate(zip(filas, nuevas)) if fila[-1] != nueva[-1]]
+            if distintas:
+                CalificacionTributaria.objects.bulk_update(
+                    [CalificacionTributaria(pk=pks[i], monto_base=nuevas[i][-1]) for i in distintas],
+                    ['monto_base'],
+                )
+                cambiadas += len(distintas)
+            if sumar_todas:
+                actualizar(sumar=nuevas)
+            elif distintas:
+                actualizar(restar=[filas[i] for i in distintas], sumar=[nuevas[i] for i in distintas])
+
+
+def afectadas(monedas=None, desde=None, hasta=None):
+    """
+    Calificaciones cuya moneda local está en `monedas` (todas si es None) y
+    con fecha_fin_periodo en [desde, hasta); un extremo None no limita.
+    """
+    calificaciones = CalificacionTributaria.objects.all()
+    if monedas is not None:
+        calificaciones = calificaciones.filter(empresa_subsidiaria__pais_operacion__moneda_local_id__in=monedas)
+    if desde is not None:
+        calificaciones = calificaciones.filter(fecha_fin_periodo__gte=desde)
+    if hasta is not None:
+        calificaciones = calificaciones.filter(fecha_fin_periodo__lt=hasta)
+    return calificaciones
+
+
+def rango_afectado(origen_id, destino_id, fechas):
+    """
+    Qué calificaciones cambian de monto_base si cambian las tasas del par en
+    `fechas` (ya escritas o eliminadas): (moneda_id, desde, hasta) para
+    afectadas(), o None si no cambia ninguna.
+
+    Solo entran en la conversión los pares con la moneda base. Una tasa rige
+    desde su fecha hasta la siguiente del par; si no hay una anterior, el par
+    recién aparece o desaparece y cambian también las fechas previas (antes
+    sin tasa o resueltas con el par inverso).
+    """
+    base_id = Moneda.objects.filter(es_moneda_base=True).values_list('pk', flat=True).first()
+    if base_id is None or origen_id == destino_id or base_id not in (origen_id, destino_id):
+        return None
+    tasas = TasaDeCambio.objects.filter(moneda_origen_id=origen_id, moneda_destino_id=destino_id)
+    desde = min(fechas)
+    if not tasas.filter(fecha__lt=desde).exists():
+        desde = None
+    hasta = tasas.filter(fecha__gt=max(fechas)).order_by('fecha').values_list('fecha', flat=True).first()
+    return destino_id if origen_id == base_id else origen_id, desde, hasta
+
+
+def recalcular(monedas=None, desde=None, hasta=None, chunk_size=5000):
+    """
+    Tras un cambio de tasas: corrige monto_base de afectadas(monedas, desde,
+    hasta) y sus resúmenes. Devuelve cuántas calificaciones cambiaron.
+    """
+    return _recalcular(afectadas(monedas, desde, hasta), chunk_size)
+
+
+def programar_recalculo(moneda_id=None, desde=None, hasta=None, diferir=False):
+    """
+    recalcular() para una moneda (todas si es None) si afecta a lo más
+    RESUMENES_RECALCULO_SINCRONO calificaciones. Si son más (o con
+    `diferir`), el request que cambió las tasas no espera: queda un
+    RecalculoPendiente en la misma transacción para el worker (ver
+    recalcular_pendientes).
+    """
+    monedas = None if moneda_id is None else [moneda_id]
+    limite = settings.RESUMENES_RECALCULO_SINCRONO
+    if diferir or afectadas(monedas, desde, hasta)[:limite + 1].count() > limite:
+        RecalculoPendiente.objects.create(moneda_id=moneda_id, desde=desde, hasta=hasta)
+        return None
+    return recalcular(monedas, desde, hasta)
+
+
+def recalcular_pendientes(chunk_size=5000):
+    """
+    Procesa los RecalculoPendiente en orden y los elimina. Recalcular es
+    idempotente (compara con el monto_base guardado bajo select_for_update),
+    así que dos workers que tomen el mismo no descuadran nada. Devuelve
+    cuántos procesó.
+    """
+    procesados = 0
+    for pendiente in RecalculoPendiente.objects.order_by('pk'):
+        monedas = None if pendiente.moneda_id is None else [pendiente.moneda_id]
+        recalcular(monedas, pendiente.desde, pendiente.hasta, chunk_size)
+        RecalculoPendiente.objects.filter(pk=pendiente.pk).delete()
+        procesados += 1
+    return procesados
+
+
+def reconstruir(chunk_size=5000):
+    """Recalcula monto_base y todos los resúmenes desde CalificacionTributaria."""
+    with transaction.atomic():
+        for modelo, _, _ in RESUMENES:
+            modelo.objects.all().delete()
+        # La reconstrucción ya usa las tasas actuales para todas.
+        RecalculoPendiente.objects.all().delete()
+        _recalcular(CalificacionTributaria.objects.all(), chunk_size, sumar_todas=True)
+
+
+def datos_tablero(periodos=12, empresas=10):
+    """
+    Todo lo que muestra home_cali, leyendo solo las tablas resumen. Los montos
+    por estado, período y empresa van en moneda base porque mezclan países;
+    por país se muestra además el total en su moneda local.
+    """
+    metricas = {
+        'cantidad': Sum('cantidad'),
+        'monto_base': Sum('monto_base'),
+        'sin_tasa': Sum('sin_tasa'),
+    }
+    return {
+        'moneda_base': Moneda.objects.filter(es_moneda_base=True).first(),
+        'totales': ResumenCalificacionPais.objects.aggregate(**metricas),
+        'por_estado': list(
+            ResumenCalificacionPais.objects.values('estado').annotate(**metricas).order_by('estado')
+        ),
+        'por_pais': list(
+            ResumenCalificacionPais.objects
+            .values('pais__nombre', 'pais__moneda_local__codigo_iso')
+            .annotate(monto_total=Sum('monto_total'), **metricas)
+            .order_by('-monto_base', 'pais__nombre')
+        ),
+        'por_periodo': list(
+            ResumenCalificacionPais.objects.values('periodo').annotate(**metricas).order_by('-periodo')[:periodos]
+        ),
+        'por_empresa': list(
+            ResumenCalificacionEmpresa.objects
+            .values('empresa_subsidiaria__nombre_legal')
+            .annotate(**metricas)
+            .order_by('-monto_base', 'empresa_subsidiaria__nombre_legal')[:empresas]
+        ),
+    }
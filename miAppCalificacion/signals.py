@@ -0,0 +1,100 @@
+# miAppCalificacion/signals.py
+
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+
+from .models import CalificacionTributaria, EmpresaSubsidiaria, Moneda, TasaDeCambio
+from .conversion import invalidar_tabla
+from . import resumenes
+
+
+# Con otras tasas cambia el monto_base de las calificaciones ya resumidas.
+# Solo se recalculan las del rango de fechas en que rige la tasa (ver
+# resumenes.rango_afectado); si son muchas, lo hace el worker.
+@receiver(pre_save, sender=TasaDeCambio)
+def tasa_antes(sender, instance, **kwargs):
+    instance._tasa_previa = None
+    if instance.pk is not None:
+        instance._tasa_previa = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list('moneda_origen_id', 'moneda_destino_id', 'fecha').first()
+        )
+
+
+@receiver(post_save, sender=TasaDeCambio)
+@receiver(post_delete, sender=TasaDeCambio)
+def tasa_cambiada(sender, instance, **kwargs):
+    invalidar_tabla()
+    # Si se editó el par o la fecha, también cambia donde regía antes.
+    fechas = {(instance.moneda_origen_id, instance.moneda_destino_id): {instance.fecha}}
+    previa = getattr(instance, '_tasa_previa', None)
+    if previa is not None:
+        fechas.setdefault(previa[:2], set()).add(previa[2])
+    for (origen_id, destino_id), fechas_par in fechas.items():
+        rango = resumenes.rango_afectado(origen_id, destino_id, fechas_par)
+        if rango is not None:
+            resumenes.programar_recalculo(*rango)
+
+
+# Editar el nombre o el símbolo de una moneda no toca la tabla de tasas. Un
+# código nuevo sí (se busca por código); un cambio de moneda base cambia el
+# monto_base de todas las calificaciones.
+@receiver(pre_save, sender=Moneda)
+def moneda_antes(sender, instance, **kwargs):
+    instance._moneda_previa = None
+    if instance.pk is not None:
+        instance._moneda_previa = (
+            sender.objects.filter(pk=instance.pk).values_list('codigo_iso', 'es_moneda_base').first()
+        )
+
+
+@receiver(post_save, sender=Moneda)
+def moneda_guardada(sender, instance, **kwargs):
+    previa = getattr(instance, '_moneda_previa', None)
+    base_cambiada = instance.es_moneda_base != (previa[1] if previa else False)
+    if previa is None or previa[0] != instance.codigo_iso or base_cambiada:
+        invalidar_tabla()
+    if base_cambiada:
+        resumenes.programar_recalculo()
+
+
+@receiver(post_delete, sender=Moneda)
+def moneda_eliminada(sender, instance, **kwargs):
+    invalidar_tabla()
+    if instance.es_moneda_base:
+        resumenes.programar_recalculo()
+
+
+# Los resúmenes necesitan lo que la calificación aportaba antes del cambio:
+# se lee en pre_save/pre_delete y se descuenta en post_save/post_delete.
+@receiver(pre_save, sender=CalificacionTributaria)
+@receiver(pre_delete, sender=CalificacionTributaria)
+def calificacion_antes(sender, instance, **kwargs):
+    previa = None
+    if instance.pk is not None:
+        previa = resumenes.filas_de(sender.objects.filter(pk=instance.pk)).first()
+    instance._resumen_previo = [previa] if previa else []
+
+
+@receiver(pre_save, sender=CalificacionTributaria)
+def calcular_monto_base(sender, instance, **kwargs):
+    moneda_id = (
+        EmpresaSubsidiaria.objects.filter(pk=instance.empresa_subsidiaria_id)
+        .values_list('pais_operacion__moneda_local_id', flat=True).first()
+    )
+    instance.monto_base, = resumenes.montos_base(
+        [moneda_id], [instance.monto_impuesto], [instance.fecha_fin_periodo]
+    )
+
+
+@receiver(post_save, sender=CalificacionTributaria)
+def calificacion_guardada(sender, instance, **kwargs):
+    resumenes.actualizar(
+        restar=getattr(instance, '_resumen_previo', []),
+        sumar=resumenes.filas_de(sender.objects.filter(pk=instance.pk)),
+    )
+
+
+@receiver(post_delete, sender=CalificacionTributaria)
+def calificacion_eliminada(sender, instance, **kwargs):
+    resumenes.actualizar(restar=getattr(instance, '_resumen_previo', []))
@@ -1,3 +1,405 @@
-from django.test import TestCase
+import io
+import math
+import threading
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from miAppUsuario import fabricas
+from miAppUsuario.lectores import LectorCSV
+from miAppUsuario.models import ErrorImportacion, Usuario
+from miAppUsuario.tests import CatalogosTestCase, MaxConsultasMixin
+from . import conversion, resumenes
+from .conversion import TablaTasas, TasaNoDisponible, invalidar_tabla, obtener_tabla
+from .importacion import ImportadorCalificaciones, ImportadorTasas, COLUMNAS_CALIFICACIONES, COLUMNAS_TASAS
+from .models import (
+    CalificacionTributaria, EmpresaSubsidiaria, Moneda, Pais, RecalculoPendiente, ResumenCalificacionEmpresa,
+    TasaDeCambio, VersionTasas,
+)
+
+
+class ConsultasVistasCalificacionesTests(MaxConsultasMixin, CatalogosTestCase):
+    """Cantidad máxima de consultas por vista. Si un cambio sube un límite, que sea a propósito."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.empresas = fabricas.crear_empresas(15, cls.catalogos)
+        fabricas.crear_calificaciones(300, cls.empresas, cls.catalogos.admin)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.catalogos.admin)
+
+    def test_home_cali(self):
+        with self.assertMaxConsultas(7):
+            respuesta = self.client.get(reverse('miAppCalificacion:home'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['totales']['cantidad'], 300)
+
+    def test_home_cali_no_crece_con_las_calificaciones(self):
+        url = reverse('miAppCalificacion:home')
+        antes = self.contar_consultas(lambda: self.client.get(url))
+        fabricas.crear_calificaciones(300, fabricas.crear_empresas(5, fabricas.crear_catalogos('G')), self.catalogos.admin)
+        cache.clear()
+        despues = self.contar_consultas(lambda: self.client.get(url))
+        self.assertEqual(antes, despues)
+
+    def test_exportacion_y_api_exigen_sesion(self):
+        for nombre in ('exportar', 'api_empresas', 'api_calificaciones'):
+            url = reverse(f'miAppCalificacion:{nombre}')
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.logout()
+        for nombre in ('exportar', 'api_empresas', 'api_calificaciones'):
+            url = reverse(f'miAppCalificacion:{nombre}')
+            self.assertRedirects(self.client.get(url), f'{settings.LOGIN_URL}?next={url}', fetch_redirect_response=False)
+
+
+class ResumenesTests(CatalogosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.clp = Moneda.objects.create(codigo_iso='FCL', nombre='F Peso')
+        pais = Pais.objects.create(nombre='F Chile', codigo_iso='FCH', moneda_local=cls.clp)
+        cls.empresa = EmpresaSubsidiaria.objects.create(
+            nombre_legal='Empresa FCH', identificacion_fiscal='FCH-1', actividad_principal='Servicios',
+            regimen_fiscal='General', pais_operacion=pais,
+        )
+
+    def setUp(self):
+        # El rollback revierte VersionTasas pero no la tabla ya cargada en memoria.
+        invalidar_tabla()
+
+    def calificar(self, mes, monto='1000.00', estado='APROBADA'):
+        return CalificacionTributaria.objects.create(
+            empresa_subsidiaria=self.empresa, fecha_inicio_periodo=date(2024, mes, 1),
+            fecha_fin_periodo=date(2024, mes, 28), monto_impuesto=Decimal(monto), estado=estado,
+            usuario_creador=self.catalogos.admin,
+        )
+
+    def tasa(self, dia, valor, mes=1):
+        return TasaDeCambio.objects.create(
+            moneda_origen=self.clp, moneda_destino=self.catalogos.moneda, fecha=date(2024, mes, dia),
+            valor_tasa=Decimal(valor),
+        )
+
+    def resumen(self):
+        return ResumenCalificacionEmpresa.objects.filter(empresa_subsidiaria=self.empresa).aggregate(
+            cantidad=Sum('cantidad'), monto_base=Sum('monto_base'), sin_tasa=Sum('sin_tasa'),
+        )
+
+    def assertIgualAReconstruir(self):
+        incremental = self.resumen()
+        resumenes.reconstruir()
+        self.assertEqual(incremental, self.resumen())
+        return incremental
+
+    def test_tasa_nueva_no_descuadra_los_resumenes(self):
+        primera = self.calificar(1)
+        self.calificar(2)
+        self.assertEqual(self.resumen(), {'cantidad': 2, 'monto_base': Decimal('0.00'), 'sin_tasa': 2})
+
+        # Llega la tasa después de importar: se recalcula lo ya resumido.
+        TasaDeCambio.objects.create(
+            moneda_origen=self.clp, moneda_destino=self.catalogos.moneda, fecha=date(2024, 1, 1),
+            valor_tasa=Decimal('0.001'),
+        )
+        primera.delete()
+        self.assertEqual(self.assertIgualAReconstruir(),
+                         {'cantidad': 1, 'monto_base': Decimal('1.00'), 'sin_tasa': 0})
+
+    def test_tasa_solo_recalcula_el_rango_donde_rige(self):
+        self.tasa(1, '0.001')
+        self.tasa(1, '0.003', mes=3)
+        enero, febrero, marzo = self.calificar(1), self.calificar(2), self.calificar(3)
+
+        # Rige del 1 de febrero al 1 de marzo: solo cambia febrero.
+        with mock.patch.object(resumenes, '_recalcular', wraps=resumenes._recalcular) as recalcular:
+            self.tasa(1, '0.002', mes=2)
+        self.assertEqual(list(recalcular.call_args.args[0].values_list('pk', flat=True)), [febrero.pk])
+        self.assertEqual(
+            [c.monto_base for c in CalificacionTributaria.objects.filter(pk__in=[enero.pk, febrero.pk, marzo.pk]).order_by('pk')],
+            [Decimal('1.00'), Decimal('2.00'), Decimal('3.00')],
+        )
+        self.assertIgualAReconstruir()
+
+    def test_par_sin_moneda_base_o_nombre_de_moneda_no_recalculan(self):
+        self.calificar(1)
+        usd = Moneda.objects.create(codigo_iso='FUS', nombre='F Dólar')
+        with mock.patch.object(resumenes, '_recalcular') as recalcular:
+            TasaDeCambio.objects.create(moneda_origen=self.clp, moneda_destino=usd, fecha=date(2024, 1, 1),
+                                        valor_tasa=Decimal('0.001'))
+            self.clp.nombre = 'F Peso renombrado'
+            self.clp.save()
+        recalcular.assert_not_called()
+
+    @override_settings(RESUMENES_RECALCULO_SINCRONO=1)
+    def test_recalculos_grandes_quedan_para_el_worker(self):
+        self.calificar(1)
+        self.calificar(2)
+        self.tasa(1, '0.001')
+        pendiente = RecalculoPendiente.objects.get()
+        self.assertEqual((pendiente.moneda, pendiente.desde, pendiente.hasta), (self.clp, None, None))
+        self.assertEqual(self.resumen()['sin_tasa'], 2)
+
+        self.assertEqual(resumenes.recalcular_pendientes(), 1)
+        self.assertFalse(RecalculoPendiente.objects.exists())
+        self.assertEqual(self.assertIgualAReconstruir(),
+                         {'cantidad': 2, 'monto_base': Decimal('2.00'), 'sin_tasa': 0})
+
+        # Cambiar la moneda base afecta a todas.
+        self.catalogos.moneda.es_moneda_base = False
+        self.catalogos.moneda.save()
+        self.assertIsNone(RecalculoPendiente.objects.get().moneda)
+
+    def test_importacion_de_tasas_recalcula_monto_base(self):
+        calificacion = self.calificar(3)
+        archivo = io.BytesIO(b'moneda_origen,moneda_destino,fecha,valor_tasa\nFCL,FBS,2024-01-01,0.002\n')
+        ImportadorTasas().importar(LectorCSV(archivo, COLUMNAS_TASAS))
+        calificacion.refresh_from_db()
+        self.assertEqual(calificacion.monto_base, Decimal('2.00'))
+        self.assertEqual(self.assertIgualAReconstruir(),
+                         {'cantidad': 1, 'monto_base': Decimal('2.00'), 'sin_tasa': 0})
+
+    def test_actualizar_suma_sobre_la_fila_existente(self):
+        calificacion = self.calificar(4, monto='10.00')
+        fila = resumenes.filas_de(CalificacionTributaria.objects.filter(pk=calificacion.pk)).get()
+        # Dos escritores que llegan a la misma clave: ninguno pisa al otro.
+        resumenes.actualizar(sumar=[fila])
+        resumenes.actualizar(sumar=[fila])
+        resumen = ResumenCalificacionEmpresa.objects.get(empresa_subsidiaria=self.empresa, estado='APROBADA')
+        self.assertEqual((resumen.cantidad, resumen.monto_total), (3, Decimal('30.00')))
+
+        resumenes.actualizar(restar=[fila, fila, fila])
+        self.assertFalse(ResumenCalificacionEmpresa.objects.filter(empresa_subsidiaria=self.empresa).exists())
+
+
+class TablaTasasTests(SimpleTestCase):
+    """Base 1; hay tasas 2->1 y 1->3, nada directo entre 2 y 3."""
+
+    def setUp(self):
+        def serie(*puntos):
+            fechas, valores = zip(*puntos)
+            return np.asarray(fechas, dtype='datetime64[D]'), np.asarray(valores, dtype=np.float64)
+
+        self.pares = {
+            (2, 1): serie(('2024-01-01', 0.5), ('2024-02-01', 0.25)),
+            (1, 3): serie(('2024-01-15', 10.0)),
+        }
+        self.monedas = {'BAS': 1, 'DOS': 2, 'TRE': 3}
+        self.tabla = TablaTasas(self.pares, self.monedas, base_id=1)
+
+    def test_tasa_vigente_a_la_fecha(self):
+        self.assertEqual(self.tabla.tasa('dos', 'BAS', date(2024, 1, 31)), 0.5)
+        self.assertEqual(self.tabla.tasa(2, 1, date(2024, 2, 1)), 0.25)
+        self.assertEqual(self.tabla.tasa(2, 1, date(2030, 1, 1)), 0.25)
+        with self.assertRaises(TasaNoDisponible):
+            self.tabla.tasa(2, 1, date(2023, 12, 31))
+
+    def test_inversa_y_cruzada_por_la_base(self):
+        self.assertEqual(self.tabla.tasa(1, 2, date(2024, 2, 1)), 4.0)
+        # 2 -> 1 -> 3: 0.5 * 10 el 20 de enero; antes del 15 no hay tramo 1 -> 3.
+        tasas = self.tabla.tasas(2, 3, ['2024-01-20', '2024-01-10'])
+        self.assertEqual(tasas[0], 5.0)
+        self.assertTrue(math.isnan(tasas[1]))
+        self.assertEqual(self.tabla.tasa(3, 3), 1.0)
+
+    def test_sin_camino_o_moneda_desconocida(self):
+        sin_base = TablaTasas(self.pares, self.monedas)
+        with self.assertRaises(TasaNoDisponible):
+            sin_base.tasas(2, 3, ['2024-03-01'])
+        with self.assertRaises(TasaNoDisponible):
+            self.tabla.tasa('XXX', 'BAS')
+
+    def test_convertir_deja_nan_donde_no_hay_tasa(self):
+        convertidos = self.tabla.convertir([100, 100, 100], [2, 1, 9], 3, '2024-02-10')
+        self.assertEqual(convertidos[:2].tolist(), [250.0, 1000.0])
+        self.assertTrue(math.isnan(convertidos[2]))
+
+
+class TablaCompartidaTests(TestCase):
+
+    def setUp(self):
+        # Sin tabla en memoria, y sin escribir VersionTasas antes de los
+        # hilos: en SQLite la transacción del test los bloquearía.
+        reinicio = mock.patch.object(conversion, '_cargada', (None, None, 0.0, 0.0))
+        reinicio.start()
+        self.addCleanup(reinicio.stop)
+
+    def test_una_tabla_para_todos_los_hilos(self):
+        tablas = []
+
+        def en_hilo():
+            try:
+                tablas.append(obtener_tabla())
+            finally:
+                connection.close()
+
+        with mock.patch.object(TablaTasas, 'cargar', wraps=TablaTasas.cargar) as cargar:
+            hilos = [threading.Thread(target=en_hilo) for _ in range(4)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            self.assertEqual(len({id(tabla) for tabla in tablas}), 1)
+            self.assertEqual(cargar.call_count, 1)
+
+            invalidar_tabla()
+            self.assertIsNot(obtener_tabla(), tablas[0])
+            self.assertEqual(cargar.call_count, 2)
+
+
+class VersionTasasTests(TestCase):
+
+    def setUp(self):
+        invalidar_tabla()
+
+    def test_cambio_hecho_por_otro_proceso(self):
+        tabla = obtener_tabla()
+        # Otro proceso (el worker) sube la versión sin pasar por este.
+        VersionTasas.objects.filter(pk=1).update(version=F('version') + 1)
+        self.assertIs(obtener_tabla(), tabla)
+        with override_settings(TASAS_VERIFICACION_SEGUNDOS=0):
+            recargada = obtener_tabla()
+            self.assertIsNot(recargada, tabla)
+            self.assertIs(obtener_tabla(), recargada)
+
+    @override_settings(TASAS_TTL_SEGUNDOS=0)
+    def test_ttl_recarga_aunque_la_version_no_cambie(self):
+        self.assertIsNot(obtener_tabla(), obtener_tabla())
+
+
+class ImportadorTasasTests(CatalogosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usd = Moneda.objects.create(codigo_iso='FUS', nombre='F Dólar')
+
+    def setUp(self):
+        invalidar_tabla()
+
+    def importar(self, filas, chunk_size=None):
+        archivo = io.BytesIO('\n'.join(['moneda_origen,moneda_destino,fecha,valor_tasa'] + filas).encode())
+        return ImportadorTasas(chunk_size).importar(LectorCSV(archivo, COLUMNAS_TASAS))
+
+    def test_creadas_y_actualizadas(self):
+        primero = self.importar(['FUS,FBS,2024-01-01,900', 'FUS,FBS,2024-01-02,910'])
+        self.assertEqual((primero.creados, primero.actualizados), (2, 0))
+
+        segundo = self.importar([
+            'fus,fbs,02/01/2024,"915,5"', 'FUS,FBS,2024-01-03,920',
+            # La misma clave dos veces en un chunk: gana la última.
+            'FUS,FBS,2024-01-03,925',
+        ], chunk_size=10)
+        self.assertEqual((segundo.creados, segundo.actualizados, segundo.total_errores), (1, 1, 0))
+        self.assertEqual(
+            list(TasaDeCambio.objects.filter(moneda_origen=self.usd).order_by('fecha').values_list('valor_tasa', flat=True)),
+            [Decimal('900'), Decimal('915.5'), Decimal('925')],
+        )
+
+    def test_errores_por_fila(self):
+        resultado = self.importar([
+            'XXX,FBS,2024-01-01,900',
+            'FUS,FUS,2024-01-01,1',
+            'FUS,FBS,2024-13-01,900',
+            'FUS,FBS,2024-01-01,0',
+            'FUS,FBS,2024-01-01,abc',
+        ])
+        self.assertEqual(resultado.creados, 0)
+        self.assertEqual([(error.fila, error.codigo) for error in resultado.errores], [
+            (2, ErrorImportacion.MONEDA_INEXISTENTE),
+            (3, ErrorImportacion.MONEDAS_IGUALES),
+            (4, ErrorImportacion.FECHA_INVALIDA),
+            (5, ErrorImportacion.NO_POSITIVO),
+            (6, ErrorImportacion.NUMERO_INVALIDO),
+        ])
+
+
+    def test_recalculo_pendiente_sobrevive_a_una_caida(self):
+        def caer(resultado):
+            if resultado.ultima_fila > 2:
+                raise RuntimeError('caída del worker')
+
+        archivo = io.BytesIO(b'moneda_origen,moneda_destino,fecha,valor_tasa\nFUS,FBS,2024-01-01,900\nFUS,FBS,2024-01-02,910')
+        with self.assertRaises(RuntimeError):
+            ImportadorTasas(chunk_size=1).importar(LectorCSV(archivo, COLUMNAS_TASAS), al_terminar_chunk=caer)
+        # El primer chunk quedó con su recálculo pendiente para el worker.
+        pendiente = RecalculoPendiente.objects.get()
+        self.assertEqual((pendiente.moneda, pendiente.desde, pendiente.hasta), (self.usd, None, None))
+        self.assertEqual(TasaDeCambio.objects.count(), 1)
+
+        self.importar(['FUS,FBS,2024-01-02,910'])
+        self.assertFalse(RecalculoPendiente.objects.exists())
+
+class ImportadorCalificacionesTests(CatalogosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.empresas = fabricas.crear_empresas(2, cls.catalogos)
+
+    def setUp(self):
+        invalidar_tabla()
+
+    def importar(self, filas, usuario=None):
+        lineas = ['identificacion_fiscal,fecha_inicio_periodo,fecha_fin_periodo,monto_impuesto,estado'] + filas
+        archivo = io.BytesIO('\n'.join(lineas).encode())
+        return ImportadorCalificaciones(usuario or self.catalogos.admin).importar(
+            LectorCSV(archivo, COLUMNAS_CALIFICACIONES)
+        )
+
+    def test_montos_negativos_y_notacion_cientifica(self):
+        empresa = self.empresas[0].identificacion_fiscal
+        resultado = self.importar([
+            f'{empresa},2024-01-01,2024-01-31,1.5E+03,APROBADA',
+            f'{empresa},2024-02-01,2024-02-29,-10.00,APROBADA',
+            f'{empresa},2024-03-01,2024-03-31,1e40,APROBADA',
+            f'{empresa},2024-04-01,2024-04-30,"12,5",APROBADA',
+        ])
+        self.assertEqual(resultado.creados, 2)
+        self.assertEqual(
+            [(error.fila, error.codigo) for error in resultado.errores],
+            [(3, ErrorImportacion.NEGATIVO), (4, ErrorImportacion.ENTEROS_EXCEDIDOS)],
+        )
+        self.assertEqual(
+            sorted(CalificacionTributaria.objects.values_list('monto_impuesto', flat=True)),
+            [Decimal('12.50'), Decimal('1500.00')],
+        )
+
+    def test_creadas_y_actualizadas_conservan_el_creador(self):
+        empresa = self.empresas[0].identificacion_fiscal
+        otra = self.empresas[1].identificacion_fiscal
+        primero = self.importar([
+            f'{empresa},2024-01-01,2024-01-31,100,BORRADOR',
+            f'{otra},2024-01-01,2024-01-31,200,BORRADOR',
+        ])
+        self.assertEqual((primero.creados, primero.actualizados), (2, 0))
+
+        editor = Usuario.objects.create_user(
+            email='editor@f.invalid', rol_usuario=self.catalogos.rol_usuario, pais_usuario=self.catalogos.pais,
+        )
+        segundo = self.importar([
+            f'{empresa},2024-01-01,2024-01-31,150,APROBADA',
+            f'{empresa},2024-02-01,2024-02-29,300,BORRADOR',
+        ], usuario=editor)
+        self.assertEqual((segundo.creados, segundo.actualizados), (1, 1))
+
+        actualizada = CalificacionTributaria.objects.get(
+            empresa_subsidiaria=self.empresas[0], fecha_inicio_periodo=date(2024, 1, 1)
+        )
+        self.assertEqual((actualizada.monto_impuesto, actualizada.estado), (Decimal('150.00'), 'APROBADA'))
+        self.assertEqual((actualizada.usuario_creador, actualizada.usuario_modificador), (self.catalogos.admin, editor))
+        nueva = CalificacionTributaria.objects.get(
+            empresa_subsidiaria=self.empresas[0], fecha_inicio_periodo=date(2024, 2, 1)
+        )
+        self.assertEqual((nueva.usuario_creador, nueva.usuario_modificador), (editor, None))
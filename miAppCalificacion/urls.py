@@ -1,6 +1,11 @@
 from miAppCalificacion import views
 from django.urls import path
 
+app_name = 'miAppCalificacion'
+
 urlpatterns = [
     path('', views.home_cali, name='home'),
-]
\ No newline at end of file
+    path('exportar/', views.exportar, name='exportar'),
+    path('api/empresas/', views.api_empresas, name='api_empresas'),
+    path('api/calificaciones/', views.api_calificaciones, name='api_calificaciones'),
+]
@@ -1,10 +1,72 @@
+from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 
+from miAppUsuario.api import Recurso, respuesta_api
+from miAppUsuario.exportacion import respuesta_exportacion
+from .forms import FiltroCalificacionesForm
+from .models import CalificacionTributaria, EmpresaSubsidiaria
+from .resumenes import datos_tablero
+
 # Create your views here.
 def home_cali(request):
-    # context = {
-    #     'total_registros': moduloesperado.objects.count(),
-    #     'registros_recientes': moduloesperado.objects.filter(...).count(),
-    #     'usuarios_activos': User.objects.filter(is_active=True).count(),
-    # }
-    return render(request, 'home_cali.html')
\ No newline at end of file
+    # Lee las tablas resumen (cientos de filas) en vez de agregar
+    # CalificacionTributaria completa en cada request.
+    context = {
+        'filtros': FiltroCalificacionesForm(request.GET),
+        **datos_tablero()
+    }
+    return render(request, 'home_cali.html', context)
+
+COLUMNAS_EXPORTACION = [
+    ('empresa_subsidiaria__identificacion_fiscal', 'Identificación Fiscal'),
+    ('empresa_subsidiaria__nombre_legal', 'Empresa'),
+    ('empresa_subsidiaria__pais_operacion__nombre', 'País'),
+    ('fecha_inicio_periodo', 'Inicio Período'),
+    ('fecha_fin_periodo', 'Fin Período'),
+    ('monto_impuesto', 'Monto Impuesto'),
+    ('empresa_subsidiaria__pais_operacion__moneda_local__codigo_iso', 'Moneda'),
+    ('estado', 'Estado'),
+    ('usuario_creador__email', 'Creado por'),
+    ('usuario_modificador__email', 'Modificado por'),
+]
+
+@login_required
+def exportar(request):
+    """Calificaciones filtradas como CSV o XLSX, en el orden de la clave natural."""
+    filtros = FiltroCalificacionesForm(request.GET)
+    calificaciones = filtros.filtrar(CalificacionTributaria.objects.all()).order_by(
+        'empresa_subsidiaria_id', 'fecha_inicio_periodo'
+    )
+    return respuesta_exportacion(calificaciones, COLUMNAS_EXPORTACION, 'calificaciones', request.GET.get('formato'))
+
+API_EMPRESAS = Recurso({
+    'id': 'id',
+    'nombre_legal': 'nombre_legal',
+    'identificacion_fiscal': 'identificacion_fiscal',
+    'actividad_principal': 'actividad_principal',
+    'regimen_fiscal': 'regimen_fiscal',
+    'pais_id': 'pais_operacion_id',
+    'pais': 'pais_operacion__nombre',
+})
+
+API_CALIFICACIONES = Recurso({
+    'id': 'id',
+    'empresa_id': 'empresa_subsidiaria_id',
+    'identificacion_fiscal': 'empresa_subsidiaria__identificacion_fiscal',
+    'fecha_inicio_periodo': 'fecha_inicio_periodo',
+    'fecha_fin_periodo': 'fecha_fin_periodo',
+    'monto_impuesto': 'monto_impuesto',
+    'estado': 'estado',
+    'usuario_creador_id': 'usuario_creador_id',
+    'usuario_modificador_id': 'usuario_modificador_id',
+})
+
+@login_required
+def api_empresas(request):
+    return respuesta_api(request, API_EMPRESAS, EmpresaSubsidiaria.objects.all())
+
+@login_required
+def api_calificaciones(request):
+    """JSON de solo lectura con los filtros de la exportación."""
+    filtros = FiltroCalificacionesForm(request.GET)
+    return respuesta_api(request, API_CALIFICACIONES, filtros.filtrar(CalificacionTributaria.objects.all()))
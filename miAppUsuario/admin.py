@@ -1,6 +1,11 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.shortcuts import redirect, render
+from django.urls import path
 from .models import Usuario, Auditoria, Rol
-from miAppCalificacion.models import Pais, Moneda
+from .lectores import EXTENSIONES_SOPORTADAS
+from .trabajos import encolar_importacion, IMPORTADORES, ArchivoDuplicado
+from miAppCalificacion.models import Pais, Moneda, TasaDeCambio, CalificacionTributaria
 
 # Register your models here.
 @admin.register(Usuario)
@@ -17,4 +22,74 @@ class PaisAdmin(admin.ModelAdmin):
 
 @admin.register(Moneda)
 class MonedaAdmin(admin.ModelAdmin):
-    list_display = ('codigo_iso', 'nombre', 'simbolo', 'es_moneda_base')
\ No newline at end of file
+    list_display = ('codigo_iso', 'nombre', 'simbolo', 'es_moneda_base')
+
+
+class ImportarArchivoForm(forms.Form):
+    archivo = forms.FileField()
+
+    def __init__(self, *args, columnas=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['archivo'].help_text = f'CSV o XLSX con columnas {", ".join(columnas)}.'
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if not archivo.name.lower().endswith(EXTENSIONES_SOPORTADAS):
+            raise forms.ValidationError(f'Formato no soportado. Use {", ".join(EXTENSIONES_SOPORTADAS)}.')
+        return archivo
+
+class ImportarDesdeArchivoMixin:
+    """
+    Agrega al listado del admin un botón "Importar desde archivo" que encola
+    el archivo como Auditoria de tipo `tipo_importacion`; lo procesa el
+    worker procesar_importaciones.
+    """
+    tipo_importacion = None
+    change_list_template = 'admin/importar_change_list.html'
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        urls = [
+            path('importar/', self.admin_site.admin_view(self.importar), name='%s_%s_importar' % info),
+        ]
+        return urls + super().get_urls()
+
+    def importar(self, request):
+        opts = self.model._meta
+        if not self.has_add_permission(request):
+            return redirect(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+        columnas, _ = IMPORTADORES[self.tipo_importacion]
+        form = ImportarArchivoForm(request.POST or None, request.FILES or None, columnas=columnas)
+        if request.method == 'POST' and form.is_valid():
+            try:
+                auditoria = encolar_importacion(form.cleaned_data['archivo'], request.user, tipo=self.tipo_importacion)
+            except ArchivoDuplicado as e:
+                messages.warning(request, f'{e} No se volvió a encolar.')
+                return redirect('usuarios:importacion', pk=e.auditoria.pk)
+            messages.success(request, 'Archivo recibido. La importación se procesará en segundo plano.')
+            return redirect('usuarios:importacion', pk=auditoria.pk)
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': opts,
+            'form': form,
+            'title': f'Importar {opts.verbose_name_plural.lower()}',
+        }
+        return render(request, 'admin/importar.html', context)
+
+@admin.register(TasaDeCambio)
+class TasaDeCambioAdmin(ImportarDesdeArchivoMixin, admin.ModelAdmin):
+    list_display = ('moneda_origen', 'moneda_destino', 'fecha', 'valor_tasa')
+    list_filter = ('moneda_origen', 'moneda_destino')
+    date_hierarchy = 'fecha'
+    # __str__ usa ambas monedas: sin esto el listado hace 2 consultas por fila.
+    list_select_related = ('moneda_origen', 'moneda_destino')
+    tipo_importacion = Auditoria.TIPO_TASAS
+
+@admin.register(CalificacionTributaria)
+class CalificacionTributariaAdmin(ImportarDesdeArchivoMixin, admin.ModelAdmin):
+    list_display = ('empresa_subsidiaria', 'fecha_inicio_periodo', 'fecha_fin_periodo', 'monto_impuesto', 'estado')
+    list_filter = ('estado',)
+    date_hierarchy = 'fecha_inicio_periodo'
+    list_select_related = ('empresa_subsidiaria',)
+    raw_id_fields = ('empresa_subsidiaria', 'usuario_creador', 'usuario_modificador')
+    tipo_importacion = Auditoria.TIPO_CALIFICACIONES
@@ -0,0 +1,178 @@
+# miAppUsuario/almacenamiento.py
+
+"""
+Subidas por partes al storage de importaciones (STORAGES['importaciones']).
+
+Las partes se escriben directo en el destino a medida que llegan: en disco
+en su posición dentro del archivo final, en S3/MinIO como partes de una
+subida multipart. Nada se junta en archivos temporales del servidor, y una
+subida cortada se retoma enviando solo las partes que faltan.
+"""
+
+import hashlib
+import io
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+
+from .models import almacenamiento_importaciones
+
+BLOQUE = 1024 * 1024
+
+
+class ParteIncompleta(Exception):
+    """La parte recibida no tiene los bytes que anunció el cliente."""
+
+
+def _copiar(origen, destino, tamano):
+    """Copia `tamano` bytes de `origen` a `destino` por bloques; devuelve el md5 hexadecimal."""
+    md5 = hashlib.md5()
+    restantes = tamano
+    while restantes:
+        bloque = origen.read(min(BLOQUE, restantes))
+        if not bloque:
+            raise ParteIncompleta(f'Faltan {restantes} bytes en la parte.')
+        destino.write(bloque)
+        md5.update(bloque)
+        restantes -= len(bloque)
+    return md5.hexdigest()
+
+
+class SubidaLocal:
+    """Partes escritas con seek en un archivo creado con el tamaño final (FileSystemStorage)."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def iniciar(self, nombre, tamano):
+        """Reserva el nombre en el storage; devuelve (nombre_guardado, upload_id)."""
+        nombre = self.storage.get_available_name(nombre)
+        ruta = self.storage.path(nombre)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, 'wb') as destino:
+            destino.truncate(tamano)
+        return nombre, ''
+
+    def subir_parte(self, subida, numero, origen, tamano):
+        with open(self.storage.path(subida.nombre_guardado), 'r+b') as destino:
+            destino.seek((numero - 1) * subida.tamano_parte)
+            return _copiar(origen, destino, tamano)
+
+    def completar(self, subida, etags):
+        pass
+
+    def abortar(self, subida):
+        self.storage.delete(subida.nombre_guardado)
+
+    def abrir(self, nombre):
+        return self.storage.open(nombre, 'rb')
+
+
+class ArchivoS3(io.RawIOBase):
+    """
+    Objeto de S3 de solo lectura con seek: cada read() es un GET con Range.
+    abrir() lo envuelve en un BufferedReader, así los lectores CSV/XLSX
+    piden bloques de IMPORTACION_TAMANO_LECTURA y no el objeto entero.
+    """
+
+    def __init__(self, cliente, bucket, clave):
+        self.cliente = cliente
+        self.bucket = bucket
+        self.clave = clave
+        self.tamano = cliente.head_object(Bucket=bucket, Key=clave)['ContentLength']
+        self.posicion = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.posicion
+
+    def seek(self, desplazamiento, desde=io.SEEK_SET):
+        if desde == io.SEEK_CUR:
+            desplazamiento += self.posicion
+        elif desde == io.SEEK_END:
+            desplazamiento += self.tamano
+        self.posicion = max(0, desplazamiento)
+        return self.posicion
+
+    def readinto(self, destino):
+        if self.posicion >= self.tamano or not len(destino):
+            return 0
+        fin = min(self.posicion + len(destino), self.tamano) - 1
+        respuesta = self.cliente.get_object(
+            Bucket=self.bucket, Key=self.clave, Range=f'bytes={self.posicion}-{fin}'
+        )
+        datos = respuesta['Body'].read()
+        destino[:len(datos)] = datos
+        self.posicion += len(datos)
+        return len(datos)
+
+
+class SubidaS3:
+    """Subida multipart de S3/MinIO con el cliente boto3 del S3Storage de django-storages."""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.cliente = storage.connection.meta.client
+        self.bucket = storage.bucket_name
+
+    def _clave(self, nombre):
+        return posixpath.join(self.storage.location, nombre) if self.storage.location else nombre
+
+    def iniciar(self, nombre, tamano):
+        nombre = self.storage.get_available_name(nombre)
+        respuesta = self.cliente.create_multipart_upload(Bucket=self.bucket, Key=self._clave(nombre))
+        return nombre, respuesta['UploadId']
+
+    def subir_parte(self, subida, numero, origen, tamano):
+        # upload_part necesita el cuerpo con su largo: se lee la parte
+        # (a lo más IMPORTACION_TAMANO_PARTE bytes), nunca el archivo completo.
+        cuerpo = io.BytesIO()
+        _copiar(origen, cuerpo, tamano)
+        cuerpo.seek(0)
+        respuesta = self.cliente.upload_part(
+            Bucket=self.bucket, Key=self._clave(subida.nombre_guardado),
+            UploadId=subida.upload_id, PartNumber=numero, Body=cuerpo, ContentLength=tamano,
+        )
+        return respuesta['ETag'].strip('"')
+
+    def completar(self, subida, etags):
+        self.cliente.complete_multipart_upload(
+            Bucket=self.bucket, Key=self._clave(subida.nombre_guardado), UploadId=subida.upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': numero, 'ETag': etag} for numero, etag in etags]},
+        )
+
+    def abortar(self, subida):
+        self.cliente.abort_multipart_upload(
+            Bucket=self.bucket, Key=self._clave(subida.nombre_guardado), UploadId=subida.upload_id
+        )
+
+    def abrir(self, nombre):
+        return io.BufferedReader(
+            ArchivoS3(self.cliente, self.bucket, self._clave(nombre)),
+            buffer_size=settings.IMPORTACION_TAMANO_LECTURA,
+        )
+
+
+def subidas():
+    """Backend de subidas por partes que corresponde al storage configurado."""
+    storage = almacenamiento_importaciones()
+    if isinstance(storage, FileSystemStorage):
+        return SubidaLocal(storage)
+    if hasattr(storage, 'bucket_name'):
+        return SubidaS3(storage)
+    raise ImproperlyConfigured(
+        f'{type(storage).__name__} no admite subidas por partes; use FileSystemStorage o S3Storage.'
+    )
+
+
+def abrir(nombre):
+    """Abre un archivo de importación como flujo de lectura, sin descargarlo entero."""
+    return subidas().abrir(nombre)
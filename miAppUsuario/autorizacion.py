@@ -0,0 +1,119 @@
+# miAppUsuario/autorizacion.py
+
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib import messages
+from django.contrib.auth import alogout, logout
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
+from django.shortcuts import redirect
+
+from .models import Rol
+
+# Versión de los roles: cambiar cualquier Rol la incrementa y así todas las
+# entradas cacheadas quedan huérfanas (expiran solas por TTL_ROL).
+CLAVE_VERSION = 'miAppUsuario:roles:version'
+TTL_ROL = 60 * 60
+
+
+def _clave(usuario_id, version):
+    return f'miAppUsuario:rol:{usuario_id}:{version}'
+
+
+def _rol_precargado(usuario):
+    # UsuarioBackend.get_user trae el rol con select_related.
+    return usuario._meta.get_field('rol_usuario').is_cached(usuario)
+
+
+def rol_de(usuario):
+    """
+    Nombre del Rol del usuario (None si no tiene). Sin consultas si el rol ya
+    viene en la instancia; si no, desde el cache por (usuario, versión). La
+    entrada guarda el rol_usuario_id con que se resolvió: si el usuario cambió
+    de rol, no se usa.
+    """
+    if usuario.rol_usuario_id is None:
+        return None
+    if _rol_precargado(usuario):
+        return usuario.rol_usuario.nombre
+    clave = _clave(usuario.pk, cache.get_or_set(CLAVE_VERSION, 1, None))
+    guardado = cache.get(clave)
+    if guardado is not None and guardado[0] == usuario.rol_usuario_id:
+        return guardado[1]
+    nombre = Rol.objects.filter(pk=usuario.rol_usuario_id).values_list('nombre', flat=True).first()
+    cache.set(clave, (usuario.rol_usuario_id, nombre), TTL_ROL)
+    return nombre
+
+
+async def arol_de(usuario):
+    """Versión async de rol_de."""
+    if usuario.rol_usuario_id is None:
+        return None
+    if _rol_precargado(usuario):
+        return usuario.rol_usuario.nombre
+    clave = _clave(usuario.pk, await cache.aget_or_set(CLAVE_VERSION, 1, None))
+    guardado = await cache.aget(clave)
+    if guardado is not None and guardado[0] == usuario.rol_usuario_id:
+        return guardado[1]
+    nombre = await Rol.objects.filter(pk=usuario.rol_usuario_id).values_list('nombre', flat=True).afirst()
+    await cache.aset(clave, (usuario.rol_usuario_id, nombre), TTL_ROL)
+    return nombre
+
+
+def invalidar_roles(**kwargs):
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        # Todavía no hay versión (o el cache la expulsó): arranca de nuevo en
+        # un valor que no puede coincidir con entradas de la versión 1.
+        cache.set(CLAVE_VERSION, 2, None)
+
+
+def invalidar_rol_usuario(usuario_id):
+    cache.delete(_clave(usuario_id, cache.get(CLAVE_VERSION, 1)))
+
+
+def _denegado(request, rol):
+    messages.warning(
+        request, f'Acceso denegado. Su rol ({rol if rol else "No definido"}) no está autorizado para esta área.'
+    )
+
+
+def rol_requerido(*roles):
+    """
+    Decorador para vistas (sync o async) que exige un usuario autenticado
+    con alguno de los `roles` (nombres de Rol). Deja el nombre en request.rol.
+
+    Sin sesión redirige al login con ?next=; con un rol no autorizado cierra
+    la sesión y vuelve al login, como hacía admin_dashboard.
+    """
+    def decorador(vista):
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envoltura(request, *args, **kwargs):
+                usuario = await request.auser()
+                if not usuario.is_authenticated:
+                    return redirect_to_login(request.get_full_path(), 'login')
+                # request.user es un objeto lazy que se resuelve en forma sync
+                # (logout, plantillas): se reemplaza por el ya cargado.
+                request.user = usuario
+                request.rol = await arol_de(usuario)
+                if request.rol not in roles:
+                    _denegado(request, request.rol)
+                    await alogout(request)
+                    return redirect('login')
+                return await vista(request, *args, **kwargs)
+        else:
+            @wraps(vista)
+            def envoltura(request, *args, **kwargs):
+                if not request.user.is_authenticated:
+                    return redirect_to_login(request.get_full_path(), 'login')
+                request.rol = rol_de(request.user)
+                if request.rol not in roles:
+                    _denegado(request, request.rol)
+                    logout(request)
+                    return redirect('login')
+                return vista(request, *args, **kwargs)
+        return envoltura
+    return decorador
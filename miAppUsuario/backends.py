@@ -0,0 +1,20 @@
+# miAppUsuario/backends.py
+
+from django.contrib.auth.backends import ModelBackend
+
+from .models import Usuario
+
+
+class UsuarioBackend(ModelBackend):
+    """
+    ModelBackend que carga el usuario de la sesión junto con su rol y su país:
+    las vistas que consultan request.user.rol_usuario o pais_usuario (y
+    rol_requerido) no agregan consultas.
+    """
+
+    def get_user(self, user_id):
+        try:
+            usuario = Usuario._default_manager.select_related('rol_usuario', 'pais_usuario').get(pk=user_id)
+        except Usuario.DoesNotExist:
+            return None
+        return usuario if self.user_can_authenticate(usuario) else None
@@ -0,0 +1,117 @@
+# miAppUsuario/busqueda.py
+
+from django.db import connections
+from django.db.models import BooleanField, Case, F, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Usuario
+
+CAMPOS_BUSQUEDA = ['first_name', 'last_name', 'email', 'telefono']
+CAMPOS_RESULTADO = ['id', 'first_name', 'last_name', 'email', 'telefono']
+
+# Misma expresión que el índice usuario_busqueda_fts_idx (migración 0005);
+# si cambia una, debe cambiar la otra o PostgreSQL deja de usar el índice.
+EXPRESION_TSVECTOR = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(\"miAppUsuario_usuario\".\"first_name\", '') || ' ' || "
+    "coalesce(\"miAppUsuario_usuario\".\"last_name\", '') || ' ' || "
+    "coalesce(\"miAppUsuario_usuario\".\"email\", ''))"
+)
+
+# Con menos de 3 caracteres un término no tiene trigramas completos:
+# PostgreSQL no puede usar los índices GIN gin_trgm_ops y recorre la tabla.
+MIN_CARACTERES = 3
+
+
+def _coincidencias(termino):
+    """
+    icontains sobre cada campo. En PostgreSQL Django lo traduce a
+    UPPER(col::text) LIKE UPPER('%termino%'), que resuelven los índices GIN
+    gin_trgm_ops de la migración 0005.
+    """
+    filtro = Q()
+    for campo in CAMPOS_BUSQUEDA:
+        filtro |= Q(**{f'{campo}__icontains': termino})
+    return filtro
+
+
+def _similares(termino):
+    """
+    UPPER(col::text) %> UPPER(termino) sobre cada campo: el término se parece a
+    una palabra del campo por sobre pg_trgm.word_similarity_threshold. Con la
+    misma expresión de la migración 0005 los índices GIN resuelven el filtro,
+    y solo esos candidatos se ordenan por similitud.
+    """
+    condiciones = ' OR '.join(
+        f'UPPER("miAppUsuario_usuario"."{campo}"::text) %%> UPPER(%s)' for campo in CAMPOS_BUSQUEDA
+    )
+    return RawSQL(f'({condiciones})', [termino] * len(CAMPOS_BUSQUEDA), output_field=BooleanField())
+
+
+def _buscar_postgresql(queryset, termino, limite, typeahead):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+    from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+    from django.db.models.functions import Greatest
+
+    if typeahead:
+        similitud = Greatest(
+            TrigramWordSimilarity(termino, 'first_name'),
+            TrigramWordSimilarity(termino, 'last_name'),
+            TrigramWordSimilarity(termino, 'email'),
+        )
+        return (
+            queryset.filter(_similares(termino))
+            .annotate(similitud=similitud)
+            .order_by('-similitud', 'first_name', 'pk')
+            .values(*CAMPOS_RESULTADO)[:limite]
+        )
+
+    similitud = Greatest(
+        TrigramSimilarity('first_name', termino),
+        TrigramSimilarity('last_name', termino),
+        TrigramSimilarity('email', termino),
+    )
+
+    consulta = SearchQuery(termino, config='simple', search_type='websearch')
+    documento = RawSQL(EXPRESION_TSVECTOR, [], output_field=SearchVectorField())
+    return (
+        queryset.annotate(documento=documento)
+        .filter(Q(documento=consulta) | _coincidencias(termino))
+        .annotate(rango=SearchRank(F('documento'), consulta), similitud=similitud)
+        .order_by('-rango', '-similitud', 'first_name', 'pk')
+        .values(*CAMPOS_RESULTADO)[:limite]
+    )
+
+
+def _buscar_generico(queryset, termino, limite):
+    """Respaldo para SQLite (tests/desarrollo): substring y prefijos primero."""
+    prefijo = Q()
+    for campo in CAMPOS_BUSQUEDA:
+        prefijo |= Q(**{f'{campo}__istartswith': termino})
+    return (
+        queryset.filter(_coincidencias(termino))
+        .annotate(prioridad=Case(When(prefijo, then=Value(0)), default=Value(1), output_field=IntegerField()))
+        .order_by('prioridad', 'first_name', 'pk')
+        .values(*CAMPOS_RESULTADO)[:limite]
+    )
+
+
+def buscar_usuarios(termino, limite=20, typeahead=False, using='default'):
+    """
+    Busca usuarios por nombre, apellido, email o teléfono. Devuelve dicts con
+    CAMPOS_RESULTADO ordenados por relevancia.
+
+    En PostgreSQL usa búsqueda de texto completo + similitud de trigramas
+    (pg_trgm); `typeahead=True` se salta el tsvector y filtra con el
+    operador de similitud de palabras (%>), que usa los índices de
+    trigramas, pensado para autocompletar. Términos de menos de
+    MIN_CARACTERES no buscan nada.
+    """
+    termino = (termino or '').strip()
+    if len(termino) < MIN_CARACTERES:
+        return []
+
+    queryset = Usuario.objects.using(using)
+    if connections[using].vendor == 'postgresql':
+        return list(_buscar_postgresql(queryset, termino, limite, typeahead))
+    return list(_buscar_generico(queryset, termino, limite))
@@ -0,0 +1,52 @@
+# miAppUsuario/estadisticas.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Usuario
+
+CLAVE_CACHE = 'miAppUsuario:estadisticas'
+
+
+def _agregados():
+    siete_dias_atras = timezone.now() - timedelta(days=7)
+    return {
+        'total_registros': Count('pk'),
+        'registros_recientes': Count('pk', filter=Q(fecha_creacion__gte=siete_dias_atras)),
+        'usuarios_activos': Count('pk', filter=Q(is_active=True)),
+    }
+
+
+def calcular_estadisticas():
+    """Los tres KPIs de la barra lateral en una sola consulta (COUNT ... FILTER)."""
+    return Usuario.objects.aggregate(**_agregados())
+
+
+def obtener_estadisticas():
+    """
+    KPIs de usuarios desde el cache. Las señales de Usuario los invalidan al
+    guardar/eliminar; el TTL cubre lo que no dispara señales (update(),
+    cambios directos en la BD) y el corrimiento de la ventana de 7 días.
+    """
+    estadisticas = cache.get(CLAVE_CACHE)
+    if estadisticas is None:
+        estadisticas = calcular_estadisticas()
+        cache.set(CLAVE_CACHE, estadisticas, getattr(settings, 'ESTADISTICAS_CACHE_TTL', 300))
+    return estadisticas
+
+
+async def aobtener_estadisticas():
+    """Versión async de obtener_estadisticas (cache.aget + aaggregate)."""
+    estadisticas = await cache.aget(CLAVE_CACHE)
+    if estadisticas is None:
+        estadisticas = await Usuario.objects.aaggregate(**_agregados())
+        await cache.aset(CLAVE_CACHE, estadisticas, getattr(settings, 'ESTADISTICAS_CACHE_TTL', 300))
+    return estadisticas
+
+
+def invalidar_estadisticas(**kwargs):
+    cache.delete(CLAVE_CACHE)
@@ -0,0 +1,80 @@
+# miAppUsuario/exportacion.py
+
+import csv
+import tempfile
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+
+from .lectores import en_chunks
+
+FORMATOS_EXPORTACION = ('csv', 'xlsx')
+CHUNK_SIZE = 2000
+BLOQUE_BYTES = 64 * 1024
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: writerow() devuelve la línea en vez de escribirla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _filas_csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    # La cabecera sale antes de ejecutar la consulta: el cliente recibe los
+    # primeros bytes de inmediato. El BOM es para que Excel detecte UTF-8.
+    yield '\ufeff' + escritor.writerow(encabezados)
+    for chunk in en_chunks(filas, CHUNK_SIZE):
+        yield ''.join(escritor.writerow(fila) for fila in chunk)
+
+
+def _para_excel(valor):
+    # openpyxl no acepta datetimes con zona horaria.
+    if isinstance(valor, datetime) and timezone.is_aware(valor):
+        return timezone.make_naive(valor)
+    return valor
+
+
+def _filas_xlsx(encabezados, filas):
+    """
+    Libro en modo write-only: las filas se van escribiendo a un archivo
+    temporal, así la memoria no crece con el volumen. El formato zip del XLSX
+    recién se puede emitir al cerrar el libro, por eso aquí los bytes llegan
+    después de recorrer la consulta (a diferencia del CSV).
+    """
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(encabezados)
+    for fila in filas:
+        hoja.append([_para_excel(valor) for valor in fila])
+    with tempfile.TemporaryFile() as archivo:
+        libro.save(archivo)
+        archivo.seek(0)
+        while bloque := archivo.read(BLOQUE_BYTES):
+            yield bloque
+
+
+def respuesta_exportacion(queryset, columnas, nombre, formato):
+    """
+    StreamingHttpResponse con las `columnas` [(campo, encabezado), ...] del
+    queryset en CSV o XLSX. Se leen tuplas con values_list().iterator(), sin
+    instanciar modelos ni cachear el queryset.
+    """
+    formato = formato if formato in FORMATOS_EXPORTACION else 'csv'
+    campos = [campo for campo, _ in columnas]
+    encabezados = [encabezado for _, encabezado in columnas]
+    filas = queryset.values_list(*campos).iterator(chunk_size=CHUNK_SIZE)
+
+    if formato == 'xlsx':
+        respuesta = StreamingHttpResponse(
+            _filas_xlsx(encabezados, filas),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+    else:
+        respuesta = StreamingHttpResponse(_filas_csv(encabezados, filas), content_type='text/csv; charset=utf-8')
+    fecha = timezone.localdate().isoformat()
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}_{fecha}.{formato}"'
+    return respuesta
@@ -0,0 +1,162 @@
+# miAppUsuario/fabricas.py
+
+import csv
+import io
+import random
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth.hashers import make_password
+
+from .models import Usuario, Rol
+from .lectores import en_chunks
+from .estadisticas import invalidar_estadisticas
+from miAppCalificacion.models import CalificacionTributaria, EmpresaSubsidiaria, Moneda, Pais
+from miAppCalificacion import resumenes
+
+# Datos sintéticos para los tests y para `manage.py benchmark_rendimiento`.
+# Todo se escribe con bulk_create en lotes y sin señales; lo que las señales
+# mantendrían (cache de estadísticas, resúmenes) se actualiza al final.
+
+ESTADOS = ['BORRADOR', 'PENDIENTE', 'APROBADA', 'RECHAZADA']
+CONTRASEÑA = 'Fabrica.2024'
+LOTE = 5000
+INICIO_PERIODOS = date(2015, 1, 1)
+
+
+def crear_catalogos(prefijo='F'):
+    """
+    Monedas, país y roles mínimos, con códigos que empiezan con `prefijo` para
+    no chocar con datos existentes. La moneda local es base solo si la BD no
+    tiene otra. El rol de administrador es el que exige admin_dashboard.
+
+    `prefijo` es una sola letra: los códigos ISO son varchar(3) y PostgreSQL
+    rechaza los más largos.
+    """
+    if len(prefijo) != 1:
+        raise ValueError(f'El prefijo debe ser una sola letra, no "{prefijo}".')
+    base = Moneda.objects.create(
+        codigo_iso=f'{prefijo}BS', nombre=f'{prefijo} Moneda base',
+        es_moneda_base=not Moneda.objects.filter(es_moneda_base=True).exists(),
+    )
+    pais = Pais.objects.create(nombre=f'{prefijo} País', codigo_iso=f'{prefijo}PA', moneda_local=base)
+    administrador, _ = Rol.objects.get_or_create(nombre='Administrador', defaults={'descripcion': 'Acceso total'})
+    usuario = Rol.objects.create(nombre=f'{prefijo} Usuario', descripcion='Usuario de prueba')
+    admin = Usuario.objects.create_superuser(
+        email=f'admin@{prefijo.lower()}.invalid', password=CONTRASEÑA, first_name='Admin',
+        last_name=prefijo, rol_usuario=administrador, pais_usuario=pais,
+    )
+    return SimpleNamespace(moneda=base, pais=pais, rol_admin=administrador, rol_usuario=usuario, admin=admin)
+
+
+def _usuario(i, catalogos, hash_contraseña):
+    return Usuario(
+        email=f'usuario{i}@fabrica.invalid',
+        first_name=f'Nombre{i % 997}',
+        last_name=f'Apellido{i % 991}',
+        telefono=f'+569{i:08d}',
+        edad=18 + i % 60,
+        is_active=i % 10 != 0,
+        password=hash_contraseña,
+        rol_usuario=catalogos.rol_usuario if i % 5 else catalogos.rol_admin,
+        pais_usuario=catalogos.pais,
+    )
+
+
+def crear_usuarios(cantidad, catalogos, desde=0):
+    """
+    `cantidad` usuarios numerados desde `desde`. Comparten un único hash de
+    CONTRASEÑA: hashear uno por uno haría que sembrar 1M tome horas.
+    """
+    hash_contraseña = make_password(CONTRASEÑA)
+    usuarios = (_usuario(i, catalogos, hash_contraseña) for i in range(desde, desde + cantidad))
+    for lote in en_chunks(usuarios, LOTE):
+        Usuario.objects.bulk_create(lote)
+    invalidar_estadisticas()
+    return cantidad
+
+
+def crear_empresas(cantidad, catalogos):
+    return EmpresaSubsidiaria.objects.bulk_create([
+        EmpresaSubsidiaria(
+            nombre_legal=f'Empresa {catalogos.pais.codigo_iso}-{i}',
+            identificacion_fiscal=f'{catalogos.pais.codigo_iso}-{i}',
+            actividad_principal='Servicios',
+            regimen_fiscal='General',
+            pais_operacion=catalogos.pais,
+        )
+        for i in range(cantidad)
+    ], batch_size=LOTE)
+
+
+def _periodo(p):
+    inicio = date(INICIO_PERIODOS.year + p // 12, p % 12 + 1, 1)
+    return inicio, inicio + timedelta(days=27)
+
+
+def crear_calificaciones(cantidad, empresas, usuario, semilla=42):
+    """
+    `cantidad` calificaciones repartidas en períodos mensuales consecutivos
+    de cada empresa (la clave natural no se repite). Reconstruye los resúmenes.
+    """
+    aleatorio = random.Random(semilla)
+
+    def calificaciones():
+        for i in range(cantidad):
+            inicio, fin = _periodo(i // len(empresas))
+            yield CalificacionTributaria(
+                empresa_subsidiaria=empresas[i % len(empresas)],
+                fecha_inicio_periodo=inicio,
+                fecha_fin_periodo=fin,
+                monto_impuesto=Decimal(aleatorio.randint(1000, 10_000_000)) / 100,
+                estado=aleatorio.choice(ESTADOS),
+                usuario_creador=usuario,
+            )
+
+    for lote in en_chunks(calificaciones(), LOTE):
+        CalificacionTributaria.objects.bulk_create(lote)
+    resumenes.reconstruir()
+    return cantidad
+
+
+def _csv(encabezados, filas):
+    archivo = tempfile.TemporaryFile()
+    texto = io.TextIOWrapper(archivo, encoding='utf-8', newline='', write_through=True)
+    escritor = csv.writer(texto)
+    escritor.writerow(encabezados)
+    escritor.writerows(filas)
+    texto.detach()
+    archivo.seek(0)
+    return archivo
+
+
+def csv_usuarios(cantidad, catalogos, desde):
+    """CSV binario con COLUMNAS_USUARIOS, listo para ImportadorUsuarios."""
+    return _csv(
+        ['nombre', 'apellido', 'email', 'telefono', 'edad', 'rol_id', 'pais_id', 'contraseña'],
+        (
+            [f'Nombre{i}', f'Apellido{i}', f'importado{i}@fabrica.invalid', f'+568{i:08d}', 30,
+             catalogos.rol_usuario.pk, catalogos.pais.pk, CONTRASEÑA]
+            for i in range(desde, desde + cantidad)
+        ),
+    )
+
+
+def csv_calificaciones(cantidad, empresas, desde_periodo, semilla=7):
+    """
+    CSV binario con COLUMNAS_CALIFICACIONES a partir del período
+    `desde_periodo`: los que ya existen se actualizan, el resto se crea.
+    """
+    aleatorio = random.Random(semilla)
+
+    def filas():
+        for i in range(cantidad):
+            inicio, fin = _periodo(desde_periodo + i // len(empresas))
+            yield [
+                empresas[i % len(empresas)].identificacion_fiscal, inicio.isoformat(), fin.isoformat(),
+                f'{aleatorio.randint(1000, 10_000_000) / 100:.2f}', aleatorio.choice(ESTADOS),
+            ]
+
+    return _csv(['identificacion_fiscal', 'fecha_inicio_periodo', 'fecha_fin_periodo', 'monto_impuesto', 'estado'], filas())
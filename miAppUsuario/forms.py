@@ -1,6 +1,10 @@
 # miAppUsuario/forms.py (UPDATED)
+from datetime import datetime, time, timedelta
+
 from django import forms
-from .models import Usuario 
+from django.utils import timezone
+from .models import Usuario, Rol, ErrorImportacion
+from miAppCalificacion.models import Pais
 
 class UsuarioForm(forms.ModelForm):
     contraseña = forms.CharField(
@@ -56,4 +60,81 @@ class UsuarioForm(forms.ModelForm):
                 # Aquí se ignoran los placeholders definidos en widgets si se ponen atributos fijos
                 # Si quieres que se mantengan los placeholders definidos en 'widgets', 
                 # puedes ser más selectivo aquí.
-                field.widget.attrs.update({'class': 'form-control'})
\ No newline at end of file
+                field.widget.attrs.update({'class': 'form-control'})
+
+class FiltroUsuariosForm(forms.Form):
+    """Filtros y orden del listado de usuarios (GET). Lo usan read y las exportaciones."""
+
+    # Clave de la URL -> campo de Usuario. "fecha_creacion" ordena por id:
+    # ambos siguen el orden de inserción y id nunca es nulo (requisito del keyset).
+    ORDENES = {
+        'nombre': 'first_name',
+        'apellido': 'last_name',
+        'email': 'email',
+        'id': 'id',
+        'fecha_creacion': 'id',
+    }
+
+    rol = forms.ModelChoiceField(queryset=Rol.objects.all(), required=False, empty_label='Todos los roles')
+    pais = forms.ModelChoiceField(queryset=Pais.objects.all(), required=False, empty_label='Todos los países')
+    activo = forms.ChoiceField(
+        choices=[('', 'Todos'), ('1', 'Activos'), ('0', 'Inactivos')],
+        required=False
+    )
+    creado_desde = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    creado_hasta = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    orden = forms.ChoiceField(choices=[(k, k) for k in ORDENES], required=False)
+    desc = forms.BooleanField(required=False)
+
+    def filtrar(self, queryset):
+        """Aplica los filtros válidos; los inválidos se ignoran."""
+        # Con errores, cleaned_data conserva los campos que sí validaron.
+        self.is_valid()
+        datos = self.cleaned_data
+        if datos.get('rol'):
+            queryset = queryset.filter(rol_usuario=datos['rol'])
+        if datos.get('pais'):
+            queryset = queryset.filter(pais_usuario=datos['pais'])
+        if datos.get('activo'):
+            queryset = queryset.filter(is_active=datos['activo'] == '1')
+        # Rangos de datetime (no __date) para que el índice de fecha_creacion sirva.
+        if datos.get('creado_desde'):
+            desde = datetime.combine(datos['creado_desde'], time.min)
+            queryset = queryset.filter(fecha_creacion__gte=timezone.make_aware(desde))
+        if datos.get('creado_hasta'):
+            hasta = datetime.combine(datos['creado_hasta'] + timedelta(days=1), time.min)
+            queryset = queryset.filter(fecha_creacion__lt=timezone.make_aware(hasta))
+        return queryset
+
+    @property
+    def campo_orden(self):
+        self.is_valid()
+        orden = self.cleaned_data.get('orden')
+        return self.ORDENES.get(orden or 'nombre')
+
+    @property
+    def descendente(self):
+        self.is_valid()
+        return bool(self.cleaned_data.get('desc'))
+
+class FiltroErroresForm(forms.Form):
+    """Filtros (GET) del listado de errores de una importación."""
+
+    codigo = forms.ChoiceField(
+        choices=[('', 'Todos los errores')] + ErrorImportacion.CODIGO_CHOICES, required=False, label='Error'
+    )
+    columna = forms.CharField(required=False, max_length=50)
+    fila_desde = forms.IntegerField(required=False, min_value=0, label='Desde la fila')
+
+    def filtrar(self, queryset):
+        """Aplica los filtros válidos; los inválidos se ignoran."""
+        # Con errores, cleaned_data conserva los campos que sí validaron.
+        self.is_valid()
+        datos = self.cleaned_data
+        if datos.get('codigo'):
+            queryset = queryset.filter(codigo=datos['codigo'])
+        if datos.get('columna'):
+            queryset = queryset.filter(columna=datos['columna'])
+        if datos.get('fila_desde') is not None:
+            queryset = queryset.filter(fila__gte=datos['fila_desde'])
+        return queryset
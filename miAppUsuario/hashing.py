@@ -0,0 +1,65 @@
+# miAppUsuario/hashing.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+
+def _inicializar_worker():
+    # Con el start method "spawn" el proceso hijo no hereda Django configurado.
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _workers_configurados():
+    workers = getattr(settings, 'IMPORTACION_HASH_WORKERS', None)
+    return workers or os.cpu_count() or 1
+
+
+class HasheadorContraseñas:
+    """
+    Reparte las llamadas a make_password entre un pool de procesos para que
+    la carga masiva use todos los núcleos. Los hashes son los mismos que
+    produce Usuario.set_password (hasher por defecto de PASSWORD_HASHERS).
+
+    Se usa como context manager; el pool se crea solo cuando llega un lote
+    lo bastante grande como para compensar el costo de levantarlo.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or _workers_configurados()
+        self.total = 0
+        self.segundos = 0.0
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def hashear(self, contraseñas):
+        inicio = time.perf_counter()
+
+        if self.workers > 1 and len(contraseñas) >= self.workers * 2:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, initializer=_inicializar_worker)
+            chunksize = max(1, len(contraseñas) // (self.workers * 4))
+            hashes = list(self._pool.map(make_password, contraseñas, chunksize=chunksize))
+        else:
+            hashes = [make_password(contraseña) for contraseña in contraseñas]
+
+        self.total += len(contraseñas)
+        self.segundos += time.perf_counter() - inicio
+        return hashes
+
+    @property
+    def por_segundo(self):
+        return self.total / self.segundos if self.segundos else 0.0
@@ -0,0 +1,92 @@
+# miAppUsuario/historial.py
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import Usuario, UsuarioHistorico, CAMPOS_HISTORICO
+from .lectores import en_chunks
+
+LOTE = 1000
+
+
+def instantanea(usuario):
+    """UsuarioHistorico con el estado actual de `usuario` (sin guardar)."""
+    return UsuarioHistorico(usuario_id=usuario.pk, **{campo: getattr(usuario, campo) for campo in CAMPOS_HISTORICO})
+
+
+def cambio(usuario):
+    """
+    True si algún campo del histórico difiere de como se cargó de la BD
+    (Usuario.from_db guarda los originales). Sin originales, por ejemplo en
+    una instancia nueva, cuenta como cambio.
+    """
+    originales = getattr(usuario, '_historico_original', None)
+    if originales is None:
+        return True
+    actuales = usuario.valores_historico()
+    return any(campo not in originales or originales[campo] != valor for campo, valor in actuales.items())
+
+
+def _pendientes_vigentes(conexion, pendientes, clave):
+    # Si la transacción se revirtió, Django descartó el callback y con él la
+    # lista: no se debe seguir acumulando ahí.
+    entrada = pendientes.get(clave)
+    if entrada is None:
+        return None
+    lista, escribir = entrada
+    if any(funcion is escribir for _, funcion, _ in conexion.run_on_commit):
+        return lista
+    del pendientes[clave]
+    return None
+
+
+def registrar(historicos, using=DEFAULT_DB_ALIAS):
+    """
+    Encola UsuarioHistorico para escribirlos con un solo bulk_create al
+    confirmar la transacción en curso (por savepoint: si uno se revierte, sus
+    históricos se descartan con él). Fuera de una transacción se escriben ya.
+    """
+    if not historicos:
+        return
+    conexion = connections[using]
+    if not conexion.in_atomic_block:
+        UsuarioHistorico.objects.using(using).bulk_create(historicos, batch_size=LOTE)
+        return
+
+    if not hasattr(conexion, 'historicos_pendientes'):
+        conexion.historicos_pendientes = {}
+    pendientes = conexion.historicos_pendientes
+    clave = tuple(conexion.savepoint_ids)
+    lista = _pendientes_vigentes(conexion, pendientes, clave)
+    if lista is None:
+        lista = []
+
+        def escribir():
+            if pendientes.get(clave, (None, None))[1] is escribir:
+                del pendientes[clave]
+            UsuarioHistorico.objects.using(using).bulk_create(lista, batch_size=LOTE)
+
+        transaction.on_commit(escribir, using=using)
+        pendientes[clave] = (lista, escribir)
+    lista.extend(historicos)
+
+
+def registrar_guardado(usuario, creado, using=DEFAULT_DB_ALIAS):
+    """post_save de Usuario: encola una instantánea solo si hubo cambios reales."""
+    if creado or cambio(usuario):
+        registrar([instantanea(usuario)], using)
+    usuario._historico_original = usuario.valores_historico()
+
+
+def actualizar_usuarios(usuarios, campos, batch_size=LOTE):
+    """
+    bulk_update de `usuarios` en `campos`, con un insert de históricos por
+    chunk para los que cambiaron de verdad. Cada chunk va en su transacción.
+    """
+    actualizados = 0
+    for chunk in en_chunks(usuarios, batch_size):
+        with transaction.atomic():
+            actualizados += Usuario.objects.bulk_update(chunk, campos)
+            registrar([instantanea(usuario) for usuario in chunk if cambio(usuario)])
+        for usuario in chunk:
+            usuario._historico_original = usuario.valores_historico()
+    return actualizados
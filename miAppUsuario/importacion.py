@@ -0,0 +1,231 @@
+# miAppUsuario/importacion.py
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import Usuario, Rol, ErrorImportacion
+from .hashing import HasheadorContraseñas
+from .lectores import a_texto, en_chunks
+from .estadisticas import invalidar_estadisticas
+from . import historial
+from miAppCalificacion.models import Pais
+
+COLUMNAS_USUARIOS = ['nombre', 'apellido', 'email', 'telefono', 'edad', 'rol_id', 'pais_id', 'contraseña']
+
+
+def _a_entero(valor):
+    """Convierte los ids/edades que entrega pandas (1, 1.0, '1', '') a int o None."""
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, str):
+        valor = valor.strip()
+        if '.' in valor:
+            valor = float(valor)
+    if isinstance(valor, float):
+        if valor != valor or not valor.is_integer():
+            raise ValueError(f'"{valor}" no es un número entero')
+        return int(valor)
+    return int(valor)
+
+
+class ResultadoImportacion:
+    """
+    Contadores de una importación. `errores` son los ErrorImportacion (sin
+    guardar) aún no retirados con tomar_errores(); total_errores los cuenta
+    todos.
+    """
+
+    def __init__(self):
+        self.procesadas = 0
+        self.creados = 0
+        self.actualizados = 0
+        self.errores = []
+        self.total_errores = 0
+        # Número de la última fila del chunk recién guardado (punto de control).
+        self.ultima_fila = 0
+        self.contraseñas_hasheadas = 0
+        self.segundos_hash = 0.0
+
+    @property
+    def hashes_por_segundo(self):
+        return self.contraseñas_hasheadas / self.segundos_hash if self.segundos_hash else 0.0
+
+    def agregar_error(self, fila, codigo, columna='', valor='', **parametros):
+        self.errores.append(ErrorImportacion.de_fila(fila, codigo, columna, valor, **parametros))
+        self.total_errores += 1
+
+    def agregar_errores(self, errores):
+        self.errores.extend(errores)
+        self.total_errores += len(errores)
+
+    def tomar_errores(self):
+        """Devuelve los errores pendientes y vacía la lista (para escribirlos por lote)."""
+        errores, self.errores = self.errores, []
+        return errores
+
+
+class ImportadorUsuarios:
+    """
+    Carga masiva de usuarios por lotes: resuelve Rol/Pais con una consulta cada
+    uno, valida duplicados de email/telefono contra la BD por chunk y escribe
+    con bulk_create dentro de una transacción por chunk.
+
+    Las filas se consumen en streaming (ver miAppUsuario.lectores): solo un
+    chunk vive en memoria. Como cada chunk se confirma antes de validar el
+    siguiente, los duplicados entre chunks del mismo archivo los detecta la
+    consulta contra la BD.
+    """
+
+    def __init__(self, chunk_size=None, hash_workers=None):
+        self.chunk_size = chunk_size or getattr(settings, 'IMPORTACION_CHUNK_SIZE', 1000)
+        self.hash_workers = hash_workers
+
+    def importar(self, filas, al_terminar_chunk=None):
+        """
+        `filas` es un iterable de tuplas (numero_fila, dict) con las columnas
+        de COLUMNAS_USUARIOS. Devuelve un ResultadoImportacion.
+
+        `al_terminar_chunk(resultado)` se llama al guardar cada chunk, dentro
+        de su misma transacción: lo que registre (progreso, punto de control)
+        se confirma o se revierte junto con las filas.
+        """
+        resultado = ResultadoImportacion()
+        roles = {}
+        paises = {}
+
+        with HasheadorContraseñas(self.hash_workers) as hasheador:
+            for chunk in en_chunks(filas, self.chunk_size):
+                resultado.procesadas += len(chunk)
+                self._cargar_referencias(chunk, roles, paises)
+                # Ocupados = existentes en la BD + vistos antes en este chunk.
+                emails_ocupados, telefonos_ocupados = self._existentes(chunk)
+                pendientes = []
+                contraseñas = []
+
+                for numero_fila, row in chunk:
+                    usuario = self._construir(
+                        numero_fila, row, roles, paises,
+                        emails_ocupados, telefonos_ocupados, resultado,
+                    )
+                    if usuario is None:
+                        continue
+                    emails_ocupados.add(usuario.email.lower())
+                    if usuario.telefono:
+                        telefonos_ocupados.add(usuario.telefono)
+                    pendientes.append((numero_fila, usuario))
+                    contraseñas.append(a_texto(row['contraseña']))
+
+                for (_, usuario), password in zip(pendientes, hasheador.hashear(contraseñas)):
+                    usuario.password = password
+                # Al día antes del callback: el progreso muestra el rendimiento.
+                resultado.contraseñas_hasheadas = hasheador.total
+                resultado.segundos_hash = hasheador.segundos
+
+                resultado.ultima_fila = chunk[-1][0]
+                with transaction.atomic():
+                    self._guardar(pendientes, resultado)
+                    if al_terminar_chunk is not None:
+                        al_terminar_chunk(resultado)
+
+        return resultado
+
+    def _cargar_referencias(self, chunk, roles, paises):
+        """Completa los dicts id -> objeto solo con los ids que aún no se cargaron."""
+        rol_ids = set()
+        pais_ids = set()
+        for _, row in chunk:
+            try:
+                rol_ids.add(_a_entero(row['rol_id']))
+            except (TypeError, ValueError):
+                pass
+            try:
+                pais_ids.add(_a_entero(row['pais_id']))
+            except (TypeError, ValueError):
+                pass
+        rol_ids = rol_ids - set(roles) - {None}
+        pais_ids = pais_ids - set(paises) - {None}
+        if rol_ids:
+            roles.update(Rol.objects.in_bulk(rol_ids))
+        if pais_ids:
+            paises.update(Pais.objects.in_bulk(pais_ids))
+
+    def _existentes(self, chunk):
+        emails = {a_texto(row['email']) for _, row in chunk} - {''}
+        telefonos = {a_texto(row['telefono']) for _, row in chunk} - {''}
+        existentes_email = {
+            email.lower() for email in
+            Usuario.objects.filter(email__in=emails).values_list('email', flat=True)
+        }
+        existentes_telefono = set(
+            Usuario.objects.filter(telefono__in=telefonos).values_list('telefono', flat=True)
+        )
+        return existentes_email, existentes_telefono
+
+    def _construir(self, numero_fila, row, roles, paises, emails_ocupados, telefonos_ocupados, resultado):
+        try:
+            rol_obj = roles.get(_a_entero(row['rol_id']))
+        except (TypeError, ValueError):
+            rol_obj = None
+        if rol_obj is None:
+            resultado.agregar_error(numero_fila, ErrorImportacion.ROL_INEXISTENTE, 'rol_id', row['rol_id'])
+            return None
+
+        try:
+            pais_obj = paises.get(_a_entero(row['pais_id']))
+        except (TypeError, ValueError):
+            pais_obj = None
+        if pais_obj is None:
+            resultado.agregar_error(numero_fila, ErrorImportacion.PAIS_INEXISTENTE, 'pais_id', row['pais_id'])
+            return None
+
+        email = a_texto(row['email'])
+        telefono = a_texto(row['telefono']) or None
+        if (email.lower() in emails_ocupados) or (telefono and telefono in telefonos_ocupados):
+            resultado.agregar_error(numero_fila, ErrorImportacion.INTEGRIDAD, 'email', row['email'])
+            return None
+
+        try:
+            edad = _a_entero(row['edad'])
+        except (TypeError, ValueError):
+            resultado.agregar_error(numero_fila, ErrorImportacion.EDAD_INVALIDA, 'edad', row['edad'])
+            return None
+
+        try:
+            nuevo_usuario = Usuario(
+                first_name=a_texto(row['nombre']),
+                last_name=a_texto(row['apellido']),
+                email=email,
+                telefono=telefono,
+                edad=edad,
+                rol_usuario=rol_obj,
+                pais_usuario=pais_obj,
+                is_active=True,
+            )
+        except Exception as e:
+            resultado.agregar_error(numero_fila, ErrorImportacion.ERROR_DESCONOCIDO, detalle=str(e))
+            return None
+
+        return nuevo_usuario
+
+    def _guardar(self, pendientes, resultado):
+        if not pendientes:
+            return
+        try:
+            with transaction.atomic():
+                usuarios = Usuario.objects.bulk_create([usuario for _, usuario in pendientes], batch_size=self.chunk_size)
+                # bulk_create tampoco pasa por el histórico: un insert por chunk.
+                historial.registrar([historial.instantanea(usuario) for usuario in usuarios])
+            resultado.creados += len(pendientes)
+            # bulk_create no dispara post_save.
+            invalidar_estadisticas()
+        except IntegrityError:
+            # Otro proceso insertó un email/telefono entre la validación y el
+            # insert: se reintenta fila por fila para reportar cuál falló.
+            for numero_fila, usuario in pendientes:
+                usuario.pk = None
+                try:
+                    with transaction.atomic():
+                        usuario.save()
+                    resultado.creados += 1
+                except IntegrityError:
+                    resultado.agregar_error(numero_fila, ErrorImportacion.INTEGRIDAD, 'email', usuario.email)
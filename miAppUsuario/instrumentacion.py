@@ -0,0 +1,184 @@
+# miAppUsuario/instrumentacion.py
+
+import logging
+import random
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextvars import ContextVar
+
+import numpy as np
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Registro del request en curso. Un ContextVar y no un thread-local: las
+# vistas async consultan la BD desde el hilo de sync_to_async, que hereda el
+# contexto del request.
+_actual = ContextVar('instrumentacion', default=None)
+
+_muestras = {}
+_muestras_lock = threading.Lock()
+
+PERCENTILES = (50, 95, 99)
+
+
+class Registro:
+    __slots__ = ('consultas', 'sql', 'tiempo_sql', 'inicio', 'memoria_inicial')
+
+    def __init__(self, memoria):
+        self.consultas = 0
+        self.sql = Counter()
+        self.tiempo_sql = 0.0
+        self.memoria_inicial = None
+        if memoria:
+            tracemalloc.reset_peak()
+            self.memoria_inicial = tracemalloc.get_traced_memory()[0]
+        self.inicio = time.perf_counter()
+
+    def duplicadas(self):
+        return sum(veces - 1 for veces in self.sql.values() if veces > 1)
+
+    def pico_kb(self):
+        if self.memoria_inicial is None:
+            return None
+        return max(tracemalloc.get_traced_memory()[1] - self.memoria_inicial, 0) / 1024
+
+
+def _medir(execute, sql, params, many, context):
+    registro = _actual.get()
+    if registro is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        registro.tiempo_sql += time.perf_counter() - inicio
+        registro.consultas += 1
+        # Misma sentencia con los mismos parámetros = consulta repetida.
+        registro.sql[(sql, repr(params))] += 1
+
+
+def _instalar(sender, connection, **kwargs):
+    if _medir not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir)
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide una fracción INSTRUMENTACION_MUESTREO de los requests: consultas SQL,
+    tiempo en SQL, consultas repetidas, tiempo en Python y (con
+    INSTRUMENTACION_MEMORIA) el pico de memoria asignada. Loguea los que pasan
+    los umbrales y guarda las últimas muestras por vista para resumen_vistas().
+
+    Con muestreo 0 el middleware se desactiva (MiddlewareNotUsed) y las
+    conexiones no llevan el wrapper: costo cero.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.muestreo = getattr(settings, 'INSTRUMENTACION_MUESTREO', 0.0)
+        if self.muestreo <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+        # El pico de tracemalloc es de todo el proceso: con requests
+        # concurrentes es una cota superior, no una medida exacta.
+        self.memoria = getattr(settings, 'INSTRUMENTACION_MEMORIA', False)
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.umbral_ms = getattr(settings, 'INSTRUMENTACION_UMBRAL_MS', 1000)
+        self.umbral_consultas = getattr(settings, 'INSTRUMENTACION_UMBRAL_CONSULTAS', 50)
+        self.max_muestras = getattr(settings, 'INSTRUMENTACION_MUESTRAS', 1000)
+
+        connection_created.connect(_instalar, dispatch_uid='miAppUsuario.instrumentacion')
+        for conexion in connections.all(initialized_only=True):
+            _instalar(None, conexion)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        if random.random() >= self.muestreo:
+            return self.get_response(request)
+        registro = Registro(self.memoria)
+        token = _actual.set(registro)
+        try:
+            response = self.get_response(request)
+        finally:
+            _actual.reset(token)
+        self._terminar(request, response, registro)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.muestreo:
+            return await self.get_response(request)
+        registro = Registro(self.memoria)
+        token = _actual.set(registro)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _actual.reset(token)
+        self._terminar(request, response, registro)
+        return response
+
+    def _terminar(self, request, response, registro):
+        total_ms = (time.perf_counter() - registro.inicio) * 1000
+        sql_ms = registro.tiempo_sql * 1000
+        duplicadas = registro.duplicadas()
+        pico_kb = registro.pico_kb()
+        match = request.resolver_match
+        vista = match.view_name if match else '-'
+
+        with _muestras_lock:
+            if vista not in _muestras:
+                _muestras[vista] = deque(maxlen=self.max_muestras)
+            _muestras[vista].append(
+                (total_ms, sql_ms, total_ms - sql_ms, registro.consultas, duplicadas, pico_kb or 0.0)
+            )
+
+        if total_ms >= self.umbral_ms or registro.consultas >= self.umbral_consultas:
+            logger.warning(
+                '%s %s %s (%s): %.0f ms, %d consultas (%d repetidas), %.0f ms en SQL%s',
+                vista, request.method, request.path, response.status_code, total_ms,
+                registro.consultas, duplicadas, sql_ms,
+                f', pico {pico_kb:.0f} KB' if pico_kb is not None else '',
+            )
+
+
+def resumen_vistas():
+    """
+    Percentiles por vista de las muestras guardadas en este proceso, ordenado
+    por p95 de tiempo total.
+    """
+    with _muestras_lock:
+        copia = {vista: list(muestras) for vista, muestras in _muestras.items()}
+
+    resumen = []
+    for vista, muestras in copia.items():
+        datos = np.array(muestras, dtype=float)
+        total, sql, python, consultas, duplicadas, memoria = datos.T
+        fila = {'vista': vista, 'muestras': len(muestras)}
+        for nombre, columna in (('total_ms', total), ('consultas', consultas)):
+            for p, valor in zip(PERCENTILES, np.percentile(columna, PERCENTILES)):
+                fila[f'{nombre}_p{p}'] = round(float(valor), 1)
+        fila['sql_ms_promedio'] = round(float(sql.mean()), 1)
+        fila['python_ms_promedio'] = round(float(python.mean()), 1)
+        fila['repetidas_max'] = int(duplicadas.max())
+        fila['pico_kb_max'] = round(float(memoria.max()), 1)
+        resumen.append(fila)
+    return sorted(resumen, key=lambda fila: fila['total_ms_p95'], reverse=True)
+
+
+def reiniciar():
+    with _muestras_lock:
+        _muestras.clear()
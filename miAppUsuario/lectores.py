@@ -0,0 +1,143 @@
+# miAppUsuario/lectores.py
+
+import abc
+import codecs
+import csv
+import math
+from itertools import chain, islice
+
+from django.conf import settings
+from openpyxl import load_workbook
+
+EXTENSIONES_SOPORTADAS = ('.xlsx', '.csv')
+
+
+class ArchivoInvalido(Exception):
+    pass
+
+
+def en_chunks(iterable, tamano):
+    iterador = iter(iterable)
+    while True:
+        chunk = list(islice(iterador, tamano))
+        if not chunk:
+            return
+        yield chunk
+
+
+def a_texto(valor):
+    """
+    Celda como texto sin espacios al borde ('' si está vacía). Excel entrega
+    los enteros como float: 5551234.0 se lee como '5551234', igual que en CSV.
+    Lo usan la validación por DataFrame y la importación fila a fila, para
+    que ambas vean el mismo valor.
+    """
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _limpiar(valor):
+    # Equivalente a df.fillna('') celda por celda.
+    if valor is None:
+        return ''
+    if isinstance(valor, str):
+        return valor.strip()
+    return valor
+
+
+class LectorFilas(abc.ABC):
+    """
+    Fuente de filas en streaming para las cargas masivas. Recorre el archivo
+    una fila a la vez y entrega tuplas (numero_fila, dict) con exactamente las
+    `columnas` pedidas, sin cargar el archivo completo en memoria.
+
+    `numero_fila` es el número de fila tal como lo ve el usuario en Excel
+    (la cabecera es la fila 1). En CSV es la línea del archivo donde empieza
+    el registro, así una celda entre comillas con saltos de línea no corre
+    la numeración de las filas siguientes.
+    """
+
+    def __init__(self, archivo, columnas, chunk_size=None):
+        self.archivo = archivo
+        self.columnas = list(columnas)
+        self.chunk_size = chunk_size or getattr(settings, 'IMPORTACION_CHUNK_SIZE', 1000)
+        self.total_filas = None
+
+    @abc.abstractmethod
+    def _filas_crudas(self):
+        """Genera (numero_fila, tupla_de_valores); la primera es la cabecera."""
+
+    def __iter__(self):
+        filas = self._filas_crudas()
+        try:
+            _, cabecera = next(filas)
+        except StopIteration:
+            raise ArchivoInvalido('El archivo está vacío.')
+
+        cabecera = [str(_limpiar(c)) for c in cabecera]
+        faltantes = [c for c in self.columnas if c not in cabecera]
+        if faltantes:
+            raise ArchivoInvalido(
+                f"El archivo debe contener las columnas: {', '.join(self.columnas)}."
+            )
+        posiciones = [(c, cabecera.index(c)) for c in self.columnas]
+
+        for numero_fila, valores in filas:
+            if not any(v not in (None, '') for v in valores):
+                continue
+            yield numero_fila, {
+                columna: _limpiar(valores[i]) if i < len(valores) else ''
+                for columna, i in posiciones
+            }
+
+    def chunks(self):
+        return en_chunks(self, self.chunk_size)
+
+
+class LectorExcel(LectorFilas):
+    """Lee .xlsx con openpyxl en modo read-only (no construye el árbol completo)."""
+
+    def _filas_crudas(self):
+        libro = load_workbook(self.archivo, read_only=True, data_only=True)
+        try:
+            hoja = libro.active
+            if hoja.max_row:
+                self.total_filas = max(0, hoja.max_row - 1)
+            for numero_fila, valores in enumerate(hoja.iter_rows(values_only=True), start=1):
+                yield numero_fila, valores
+        finally:
+            libro.close()
+
+
+class LectorCSV(LectorFilas):
+    """Lee CSV (UTF-8, con o sin BOM) decodificando el archivo binario en streaming."""
+
+    def __init__(self, archivo, columnas, chunk_size=None, delimitador=None):
+        super().__init__(archivo, columnas, chunk_size)
+        self.delimitador = delimitador
+
+    def _filas_crudas(self):
+        texto = codecs.iterdecode(self.archivo, 'utf-8-sig')
+        primera = next(texto, '')
+        # Excel con configuración regional es-* exporta CSV separados por ';'.
+        delimitador = self.delimitador or (';' if primera.count(';') > primera.count(',') else ',')
+        lector = csv.reader(chain([primera], texto), delimiter=delimitador)
+        # line_num cuenta líneas físicas leídas: el registro empieza en la
+        # línea siguiente a la que terminó el anterior.
+        inicio = 1
+        for valores in lector:
+            yield inicio, valores
+            inicio = lector.line_num + 1
+
+
+def abrir_lector(archivo, nombre, columnas, chunk_size=None):
+    """Elige el lector según la extensión del archivo subido."""
+    nombre = (nombre or '').lower()
+    if nombre.endswith('.xlsx'):
+        return LectorExcel(archivo, columnas, chunk_size)
+    if nombre.endswith('.csv'):
+        return LectorCSV(archivo, columnas, chunk_size)
+    raise ArchivoInvalido('El archivo debe ser de formato Excel (.xlsx) o CSV (.csv).')
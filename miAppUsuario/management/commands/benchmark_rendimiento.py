@@ -0,0 +1,174 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from miAppUsuario import fabricas
+from miAppUsuario.importacion import ImportadorUsuarios, COLUMNAS_USUARIOS
+from miAppUsuario.lectores import LectorCSV
+from miAppCalificacion.importacion import ImportadorCalificaciones, COLUMNAS_CALIFICACIONES
+
+ESCALAS = {'10k': 10_000, '100k': 100_000, '1M': 1_000_000}
+# Calificaciones por empresa: con 1M quedan 20.000 empresas de 50 períodos.
+PERIODOS_POR_EMPRESA = 50
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra usuarios y calificaciones a escala (10k/100k/1M) y mide las cargas '
+        'masivas, el listado y las exportaciones: tiempo, consultas y filas. Escribe '
+        'un JSON para comparar corridas. Todo se revierte al final (no deja datos).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', choices=list(ESCALAS), default='10k')
+        parser.add_argument(
+            '--filas-importacion', type=int, default=5000,
+            help='Filas de cada archivo importado. La carga de usuarios hashea una contraseña por fila.',
+        )
+        parser.add_argument('--repeticiones', type=int, default=5, help='Repeticiones de listado y dashboard.')
+        parser.add_argument('--salida', default='benchmark_rendimiento.json')
+
+    def handle(self, *args, **options):
+        # Client necesita 'testserver' en ALLOWED_HOSTS.
+        setup_test_environment()
+        resultados = {
+            'vendor': connection.vendor,
+            'fecha': timezone.now().isoformat(),
+            'parametros': options,
+            'mediciones': {},
+        }
+        try:
+            with transaction.atomic():
+                self._corrida(ESCALAS[options['escala']], options, resultados['mediciones'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2, default=str, ensure_ascii=False)
+
+        for nombre, medida in resultados['mediciones'].items():
+            self.stdout.write(
+                f'{nombre:<28} {medida["segundos"]:>9.3f} s {medida["consultas"]:>7} consultas '
+                f'{medida["cantidad"]:>10} {medida["unidad"]}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Resultados en {options["salida"]}'))
+
+    def _medir(self, mediciones, nombre, funcion, unidad='filas'):
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            cantidad = funcion()
+            segundos = time.perf_counter() - inicio
+        mediciones[nombre] = {
+            'segundos': segundos, 'consultas': len(capturadas), 'cantidad': cantidad, 'unidad': unidad,
+        }
+        self.stdout.write(f'  {nombre}: {segundos:.3f} s')
+
+    def _medir_repetido(self, mediciones, nombre, funcion, repeticiones, unidad='filas'):
+        funcion()  # calentamiento
+        tiempos = []
+        with CaptureQueriesContext(connection) as capturadas:
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                cantidad = funcion()
+                tiempos.append(time.perf_counter() - inicio)
+        tiempos.sort()
+        mediciones[nombre] = {
+            'segundos': tiempos[len(tiempos) // 2],
+            'min_segundos': tiempos[0],
+            'max_segundos': tiempos[-1],
+            'consultas': len(capturadas) // repeticiones,
+            'cantidad': cantidad,
+            'unidad': unidad,
+        }
+
+    def _corrida(self, cantidad, options, mediciones):
+        catalogos = fabricas.crear_catalogos('B')
+        empresas = fabricas.crear_empresas(max(cantidad // PERIODOS_POR_EMPRESA, 1), catalogos)
+
+        self._medir(mediciones, 'sembrar_usuarios', lambda: fabricas.crear_usuarios(cantidad, catalogos))
+        self._medir(
+            mediciones, 'sembrar_calificaciones',
+            lambda: fabricas.crear_calificaciones(cantidad, empresas, catalogos.admin),
+        )
+
+        filas = options['filas_importacion']
+        with fabricas.csv_usuarios(filas, catalogos, desde=cantidad) as archivo:
+            self._medir(mediciones, 'importar_usuarios', lambda: self._importar(
+                ImportadorUsuarios(), LectorCSV(archivo, COLUMNAS_USUARIOS)
+            ))
+        # La mitad de las filas actualiza los últimos períodos y la otra mitad crea nuevos.
+        desde_periodo = max(PERIODOS_POR_EMPRESA - filas // (2 * len(empresas)), 0)
+        with fabricas.csv_calificaciones(filas, empresas, desde_periodo) as archivo:
+            self._medir(mediciones, 'importar_calificaciones', lambda: self._importar(
+                ImportadorCalificaciones(catalogos.admin), LectorCSV(archivo, COLUMNAS_CALIFICACIONES)
+            ))
+
+        cliente = Client()
+        cliente.force_login(catalogos.admin)
+        repeticiones = options['repeticiones']
+        listado = reverse('usuarios:read')
+        self._medir_repetido(mediciones, 'listado_primera_pagina', lambda: self._pagina(cliente, listado), repeticiones)
+        profunda = self._ir_a_pagina(cliente, listado, 20)
+        self._medir_repetido(
+            mediciones, 'listado_pagina_20', lambda: self._pagina(cliente, listado + profunda), repeticiones
+        )
+        self._medir_repetido(
+            mediciones, 'listado_filtrado',
+            lambda: self._pagina(cliente, listado, {'rol': catalogos.rol_admin.pk, 'orden': 'apellido'}),
+            repeticiones,
+        )
+        self._medir_repetido(
+            mediciones, 'api_usuarios', lambda: self._descargar(cliente, reverse('usuarios:api_usuarios')),
+            repeticiones, unidad='bytes',
+        )
+        self._medir_repetido(
+            mediciones, 'dashboard_calificaciones',
+            lambda: self._descargar(cliente, reverse('miAppCalificacion:home')), repeticiones, unidad='bytes',
+        )
+
+        self._medir(mediciones, 'exportar_usuarios_csv', lambda: self._descargar(
+            cliente, reverse('usuarios:exportar'), {'formato': 'csv'}
+        ), unidad='bytes')
+        self._medir(mediciones, 'exportar_calificaciones_csv', lambda: self._descargar(
+            cliente, reverse('miAppCalificacion:exportar'), {'formato': 'csv'}
+        ), unidad='bytes')
+        if cantidad <= ESCALAS['100k']:
+            # El XLSX se arma completo antes de emitir: con 1M toma demasiado.
+            self._medir(mediciones, 'exportar_usuarios_xlsx', lambda: self._descargar(
+                cliente, reverse('usuarios:exportar'), {'formato': 'xlsx'}
+            ), unidad='bytes')
+
+    def _importar(self, importador, lector):
+        resultado = importador.importar(lector)
+        return resultado.procesadas
+
+    def _pagina(self, cliente, url, params=None):
+        respuesta = cliente.get(url, params or {})
+        return len(respuesta.context['usuarios'])
+
+    def _ir_a_pagina(self, cliente, url, numero):
+        siguiente = ''
+        for _ in range(numero - 1):
+            respuesta = cliente.get(url + siguiente)
+            if not respuesta.context['url_siguiente']:
+                break
+            siguiente = respuesta.context['url_siguiente']
+        return siguiente
+
+    def _descargar(self, cliente, url, params=None):
+        """Recorre la respuesta completa (también las streaming) y devuelve los bytes."""
+        respuesta = cliente.get(url, params or {})
+        if respuesta.streaming:
+            return sum(len(bloque) for bloque in respuesta.streaming_content)
+        return len(respuesta.content)
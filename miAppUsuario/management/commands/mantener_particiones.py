@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from miAppUsuario.particiones import mantener
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea las particiones mensuales futuras de Auditoria (con sus ErrorImportacion) y '
+        'UsuarioHistorico y elimina (archivando antes) las que superan la retención, junto '
+        'con los archivos importados de esos meses. Pensado para correr a diario (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses-futuros', type=int, default=settings.PARTICIONES_MESES_FUTUROS,
+            help='Meses siguientes al actual que deben tener su partición creada.'
+        )
+        parser.add_argument(
+            '--archivar-en', default=settings.PARTICIONES_DIRECTORIO_ARCHIVO,
+            help='Directorio donde se guardan las particiones vencidas (.csv.gz) antes de eliminarlas.'
+        )
+        parser.add_argument(
+            '--sin-archivar', action='store_true',
+            help='Elimina las particiones vencidas sin archivarlas.'
+        )
+        parser.add_argument(
+            '--simular', action='store_true',
+            help='Solo muestra lo que haría, sin modificar la base de datos.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Las particiones mensuales solo existen en PostgreSQL.')
+
+        mantener(
+            options['meses_futuros'],
+            directorio=None if options['sin_archivar'] else options['archivar_en'],
+            simular=options['simular'],
+            informar=self.stdout.write,
+        )
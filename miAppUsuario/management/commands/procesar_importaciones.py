@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from miAppUsuario.trabajos import tomar_siguiente, procesar
+from miAppCalificacion.resumenes import recalcular_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker que procesa las cargas masivas pendientes (Auditoria en estado PENDING) '
+        'y los recálculos de resúmenes que dejaron los cambios de tasas (RecalculoPendiente).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo', type=float, default=2.0,
+            help='Segundos de espera entre sondeos cuando no hay trabajos.'
+        )
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help='Procesa los trabajos pendientes y termina en vez de quedarse sondeando.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            recalculados = recalcular_pendientes()
+            if recalculados:
+                self.stdout.write(f'{recalculados} recálculos de resúmenes pendientes procesados.')
+            auditoria = tomar_siguiente()
+
+            if auditoria is None:
+                if options['una_vez']:
+                    return
+                time.sleep(options['intervalo'])
+                continue
+
+            self.stdout.write(f'Procesando importación {auditoria.pk} ({auditoria.filename})...')
+            resultado = procesar(auditoria)
+            auditoria.refresh_from_db()
+            self.stdout.write(
+                f'Importación {auditoria.pk}: {auditoria.status}, '
+                f'{auditoria.imported_count} creados, {auditoria.updated_count} actualizados, '
+                f'{auditoria.error_count} errores.'
+            )
+            if auditoria.hashes_calculados:
+                self.stdout.write(f'  {auditoria.hashes_por_segundo:.0f} contraseñas/s')
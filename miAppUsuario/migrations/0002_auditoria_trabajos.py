@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditoria',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='auditoria',
+            name='subido_por',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='importaciones', to=settings.AUTH_USER_MODEL, verbose_name='Subido por'),
+        ),
+    ]
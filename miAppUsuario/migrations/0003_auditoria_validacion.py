@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0002_auditoria_trabajos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditoria',
+            name='confirmada',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='auditoria',
+            name='filas_invalidas',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='auditoria',
+            name='filas_validas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='auditoria',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Cargando'), ('VALIDATING', 'Validando.....'), ('VALIDATED', 'Validado (esperando confirmación)'), ('IMPORTING', 'Importando.....'), ('IMPORTED', 'Importado'), ('CANCELLED', 'Proceso cancelado'), ('FAILED', 'Falló')], default='PENDING', max_length=20),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('miAppCalificacion', '0002_initial'),
+        ('miAppUsuario', '0003_auditoria_validacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['first_name', 'id'], name='usuario_nombre_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['last_name', 'id'], name='usuario_apellido_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['fecha_creacion'], name='usuario_fecha_creacion_idx'),
+        ),
+    ]
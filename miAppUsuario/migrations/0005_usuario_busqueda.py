@@ -0,0 +1,50 @@
+# Índices de búsqueda de usuarios (miAppUsuario.busqueda). Solo aplican en
+# PostgreSQL; en otros motores la migración no hace nada.
+
+from django.db import migrations
+
+INDICES_TRIGRAMA = {
+    'usuario_first_name_trgm_idx': 'first_name',
+    'usuario_last_name_trgm_idx': 'last_name',
+    'usuario_email_trgm_idx': 'email',
+    'usuario_telefono_trgm_idx': 'telefono',
+}
+
+TABLA = '"miAppUsuario_usuario"'
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for nombre, columna in INDICES_TRIGRAMA.items():
+        # UPPER(col::text): es lo que genera icontains en PostgreSQL.
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nombre} ON {TABLA} '
+            f'USING gin (UPPER("{columna}"::text) gin_trgm_ops)'
+        )
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS usuario_busqueda_fts_idx ON {TABLA} USING gin ('
+        "to_tsvector('simple'::regconfig, "
+        "coalesce(\"first_name\", '') || ' ' || "
+        "coalesce(\"last_name\", '') || ' ' || "
+        "coalesce(\"email\", '')))"
+    )
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre in [*INDICES_TRIGRAMA, 'usuario_busqueda_fts_idx']:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nombre}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0004_usuario_indices_listado'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0005_usuario_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditoria',
+            name='tipo',
+            field=models.CharField(choices=[('USUARIOS', 'Usuarios'), ('TASAS', 'Tasas de cambio')], default='USUARIOS', max_length=20),
+        ),
+    ]
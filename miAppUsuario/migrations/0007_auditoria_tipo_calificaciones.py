@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0006_auditoria_tipo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditoria',
+            name='tipo',
+            field=models.CharField(choices=[('USUARIOS', 'Usuarios'), ('TASAS', 'Tasas de cambio'), ('CALIFICACIONES', 'Calificaciones tributarias')], default='USUARIOS', max_length=20),
+        ),
+    ]
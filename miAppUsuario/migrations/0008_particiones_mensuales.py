@@ -0,0 +1,143 @@
+# Auditoria y UsuarioHistorico pasan a ser tablas particionadas por mes
+# (RANGE sobre uploaded_at / modified_at). Solo aplica en PostgreSQL; en otros
+# motores solo se agregan los índices por fecha.
+#
+# PostgreSQL exige que la PK de una tabla particionada incluya la columna de
+# partición: la PK en la BD queda (id, fecha). Para Django la PK sigue siendo
+# id (lo asigna una secuencia, así que no se repite). Por lo mismo ninguna
+# otra tabla puede tener una FK hacia estas; la migración falla si la hay.
+#
+# Las particiones futuras y la retención las maneja
+# `manage.py mantener_particiones` (miAppUsuario.particiones).
+
+from datetime import date
+
+from django.db import migrations, models
+from django.utils import timezone
+
+TABLAS = [
+    ('miAppUsuario_auditoria', 'uploaded_at'),
+    ('miAppUsuario_usuariohistorico', 'modified_at'),
+]
+MESES_FUTUROS = 3
+
+
+def _sumar_meses(mes, meses):
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _definiciones(cursor, tabla):
+    """Índices (salvo la PK) y FKs salientes, como SQL para recrearlos."""
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = %s::regclass AND NOT i.indisprimary
+        """,
+        [f'"{tabla}"'],
+    )
+    indices = [fila[0] for fila in cursor.fetchall()]
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+        """,
+        [f'"{tabla}"'],
+    )
+    fks = [f'ALTER TABLE "{tabla}" ADD CONSTRAINT "{nombre}" {definicion}' for nombre, definicion in cursor.fetchall()]
+    return indices, fks
+
+
+def _reconstruir(schema_editor, tabla, columna, particionada):
+    """
+    Crea `tabla` de nuevo (particionada o no) con las mismas columnas, CHECKs,
+    índices y FKs, copia las filas y reemplaza la anterior. La secuencia del id
+    se recrea y se ajusta al máximo copiado.
+    """
+    q = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT conrelid::regclass::text FROM pg_constraint WHERE confrelid = %s::regclass AND contype = %s',
+            [q(tabla), 'f'],
+        )
+        entrantes = [fila[0] for fila in cursor.fetchall()]
+        if entrantes:
+            raise RuntimeError(
+                f'{tabla} tiene FKs entrantes desde {", ".join(entrantes)}: '
+                'una tabla particionada no puede ser referenciada por la PK simple.'
+            )
+
+        indices, fks = _definiciones(cursor, tabla)
+        previa = f'{tabla}_previa'
+        cursor.execute(f'ALTER TABLE {q(tabla)} RENAME TO {q(previa)}')
+        particion = f' PARTITION BY RANGE ({q(columna)})' if particionada else ''
+        cursor.execute(
+            f'CREATE TABLE {q(tabla)} (LIKE {q(previa)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)'
+            f'{particion}'
+        )
+
+        if particionada:
+            cursor.execute(f'SELECT min({q(columna)}) FROM {q(previa)}')
+            primera = cursor.fetchone()[0] or timezone.now()
+            mes = date(primera.year, primera.month, 1)
+            ultimo = _sumar_meses(date.today().replace(day=1), MESES_FUTUROS)
+            while mes <= ultimo:
+                siguiente = _sumar_meses(mes, 1)
+                cursor.execute(
+                    f'CREATE TABLE {q(f"{tabla}_p{mes.year:04d}_{mes.month:02d}")} PARTITION OF {q(tabla)} '
+                    f"FOR VALUES FROM ('{mes.isoformat()} 00:00:00+00') TO ('{siguiente.isoformat()} 00:00:00+00')"
+                )
+                mes = siguiente
+            # Red de seguridad si mantener_particiones no corre a tiempo.
+            cursor.execute(f'CREATE TABLE {q(tabla + "_default")} PARTITION OF {q(tabla)} DEFAULT')
+
+        cursor.execute(f'INSERT INTO {q(tabla)} SELECT * FROM {q(previa)}')
+        # Borra también la secuencia/identity, los índices y las FKs de la previa.
+        cursor.execute(f'DROP TABLE {q(previa)} CASCADE')
+
+        pk = f'id, {q(columna)}' if particionada else 'id'
+        cursor.execute(f'ALTER TABLE {q(tabla)} ADD CONSTRAINT {q(tabla + "_pkey")} PRIMARY KEY ({pk})')
+        secuencia = q(f'{tabla}_id_seq')
+        cursor.execute(f'CREATE SEQUENCE {secuencia} OWNED BY {q(tabla)}.id')
+        cursor.execute(f"ALTER TABLE {q(tabla)} ALTER COLUMN id SET DEFAULT nextval('{secuencia}')")
+        cursor.execute(f"SELECT setval('{secuencia}', coalesce(max(id), 0) + 1, false) FROM {q(tabla)}")
+
+        for sql in indices + fks:
+            cursor.execute(sql)
+
+
+def particionar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for tabla, columna in TABLAS:
+        _reconstruir(schema_editor, tabla, columna, particionada=True)
+
+
+def desparticionar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for tabla, columna in TABLAS:
+        _reconstruir(schema_editor, tabla, columna, particionada=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0007_auditoria_tipo_calificaciones'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+        # Después de particionar: en PostgreSQL quedan como índices
+        # particionados (uno por partición, creados automáticamente).
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['-uploaded_at'], name='auditoria_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuariohistorico',
+            index=models.Index(fields=['usuario', '-modified_at'], name='historico_usuario_fecha_idx'),
+        ),
+    ]
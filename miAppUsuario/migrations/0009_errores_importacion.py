@@ -0,0 +1,59 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:13
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PATRON_FILA = re.compile(r'^Fila (\d+): (.*)$', re.DOTALL)
+
+
+def copiar_errores(apps, schema_editor):
+    """Pasa los textos de Auditoria.errors a ErrorImportacion con el código LEGADO."""
+    Auditoria = apps.get_model('miAppUsuario', 'Auditoria')
+    ErrorImportacion = apps.get_model('miAppUsuario', 'ErrorImportacion')
+    lote = []
+    for auditoria_id, errores in Auditoria.objects.values_list('pk', 'errors').iterator():
+        for texto in errores or []:
+            coincidencia = PATRON_FILA.match(str(texto))
+            fila, detalle = (int(coincidencia[1]), coincidencia[2]) if coincidencia else (0, str(texto))
+            lote.append(ErrorImportacion(
+                auditoria_id=auditoria_id, fila=fila, codigo='LEGADO', parametros={'detalle': detalle}
+            ))
+        if len(lote) >= 1000:
+            ErrorImportacion.objects.bulk_create(lote)
+            lote = []
+    ErrorImportacion.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0008_particiones_mensuales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErrorImportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fila', models.PositiveIntegerField(default=0)),
+                ('columna', models.CharField(blank=True, max_length=50)),
+                ('codigo', models.CharField(choices=[('ROL_INEXISTENTE', 'Rol inexistente'), ('PAIS_INEXISTENTE', 'País inexistente'), ('EDAD_INVALIDA', 'Edad inválida'), ('CONTRASEÑA_CORTA', 'Contraseña corta'), ('CONTRASEÑA_NUMERICA', 'Contraseña numérica'), ('CONTRASEÑA_COMUN', 'Contraseña común'), ('EMAIL_INVALIDO', 'Email inválido'), ('EMAIL_REPETIDO', 'Email repetido en el archivo'), ('EMAIL_EXISTENTE', 'Email ya registrado'), ('TELEFONO_REPETIDO', 'Teléfono repetido en el archivo'), ('TELEFONO_EXISTENTE', 'Teléfono ya registrado'), ('INTEGRIDAD', 'Error de integridad'), ('MONEDA_INEXISTENTE', 'Moneda inexistente'), ('MONEDAS_IGUALES', 'Monedas iguales'), ('EMPRESA_INEXISTENTE', 'Empresa inexistente'), ('FECHA_INVALIDA', 'Fecha inválida'), ('PERIODO_INVERTIDO', 'Período invertido'), ('NUMERO_INVALIDO', 'Número inválido'), ('DIGITOS_EXCEDIDOS', 'Demasiados dígitos'), ('ENTEROS_EXCEDIDOS', 'Demasiados dígitos enteros'), ('NO_POSITIVO', 'Valor no positivo'), ('OBLIGATORIO', 'Campo obligatorio'), ('LARGO_EXCEDIDO', 'Texto demasiado largo'), ('ARCHIVO_INVALIDO', 'Archivo inválido'), ('ERROR_DESCONOCIDO', 'Error desconocido'), ('ERROR_INTERNO', 'Error del proceso'), ('LEGADO', 'Error anterior (texto)')], max_length=30)),
+                ('valor', models.CharField(blank=True, max_length=255)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('auditoria', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='errores', to='miAppUsuario.auditoria')),
+            ],
+            options={
+                'verbose_name': 'Error de importación',
+                'verbose_name_plural': 'Errores de importación',
+                'ordering': ['fila', 'id'],
+                'indexes': [models.Index(fields=['auditoria', 'fila', 'id'], name='error_auditoria_fila_idx'), models.Index(fields=['auditoria', 'codigo', 'fila', 'id'], name='error_auditoria_codigo_idx')],
+            },
+        ),
+        migrations.RunPython(copiar_errores, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='auditoria',
+            name='errors',
+        ),
+    ]
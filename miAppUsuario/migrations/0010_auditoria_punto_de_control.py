@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0009_errores_importacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditoria',
+            name='fila_confirmada',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='auditoria',
+            name='hash_archivo',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='auditoria',
+            name='latido',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['hash_archivo'], name='auditoria_hash_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:20
+
+import django.db.models.deletion
+import django.utils.timezone
+import miAppUsuario.models
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0010_auditoria_punto_de_control'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditoria',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=miAppUsuario.models.almacenamiento_importaciones, upload_to='imports/'),
+        ),
+        migrations.CreateModel(
+            name='SubidaArchivo',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('tipo', models.CharField(choices=[('USUARIOS', 'Usuarios'), ('TASAS', 'Tasas de cambio'), ('CALIFICACIONES', 'Calificaciones tributarias')], default='USUARIOS', max_length=20)),
+                ('tamano', models.PositiveBigIntegerField()),
+                ('tamano_parte', models.PositiveIntegerField()),
+                ('nombre_guardado', models.CharField(max_length=255)),
+                ('upload_id', models.CharField(blank=True, max_length=1024)),
+                ('estado', models.CharField(choices=[('INICIADA', 'Subiendo'), ('COMPLETADA', 'Completada'), ('ABORTADA', 'Abortada')], default='INICIADA', max_length=20)),
+                ('creada_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('auditoria', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='miAppUsuario.auditoria')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subidas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subida de archivo',
+                'verbose_name_plural': 'Subidas de archivos',
+            },
+        ),
+        migrations.CreateModel(
+            name='ParteSubida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveIntegerField()),
+                ('etag', models.CharField(max_length=100)),
+                ('subida', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='partes', to='miAppUsuario.subidaarchivo')),
+            ],
+            options={
+                'ordering': ['numero'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='partesubida',
+            constraint=models.UniqueConstraint(fields=('subida', 'numero'), name='parte_subida_unica'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# ErrorImportacion pasa a estar particionada por mes, con la misma clave que
+# su Auditoria (uploaded_at, copiada en cada error). Así mantener_particiones
+# archiva y elimina los errores de un mes junto con la partición de
+# Auditoria, en vez de borrarlos con un DELETE. Solo aplica en PostgreSQL.
+
+import importlib
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+TABLA = 'miAppUsuario_errorimportacion'
+
+# El rearmado de la tabla es el mismo de la migración 0008.
+_reconstruir = importlib.import_module('miAppUsuario.migrations.0008_particiones_mensuales')._reconstruir
+
+
+def copiar_fechas(apps, schema_editor):
+    Auditoria = apps.get_model('miAppUsuario', 'Auditoria')
+    ErrorImportacion = apps.get_model('miAppUsuario', 'ErrorImportacion')
+    ErrorImportacion.objects.update(uploaded_at=Subquery(
+        Auditoria.objects.filter(pk=OuterRef('auditoria_id')).values('uploaded_at')[:1]
+    ))
+
+
+def particionar(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        _reconstruir(schema_editor, TABLA, 'uploaded_at', particionada=True)
+
+
+def desparticionar(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        _reconstruir(schema_editor, TABLA, 'uploaded_at', particionada=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0011_subidas_por_partes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='errorimportacion',
+            name='uploaded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copiar_fechas, migrations.RunPython.noop),
+        migrations.RunPython(particionar, desparticionar),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0012_errores_particionados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditoria',
+            name='hashes_calculados',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='auditoria',
+            name='segundos_hash',
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0013_auditoria_rendimiento_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='errorimportacion',
+            name='codigo',
+            field=models.CharField(choices=[('ROL_INEXISTENTE', 'Rol inexistente'), ('PAIS_INEXISTENTE', 'País inexistente'), ('EDAD_INVALIDA', 'Edad inválida'), ('CONTRASEÑA_CORTA', 'Contraseña corta'), ('CONTRASEÑA_NUMERICA', 'Contraseña numérica'), ('CONTRASEÑA_COMUN', 'Contraseña común'), ('EMAIL_INVALIDO', 'Email inválido'), ('EMAIL_REPETIDO', 'Email repetido en el archivo'), ('EMAIL_EXISTENTE', 'Email ya registrado'), ('TELEFONO_REPETIDO', 'Teléfono repetido en el archivo'), ('TELEFONO_EXISTENTE', 'Teléfono ya registrado'), ('INTEGRIDAD', 'Error de integridad'), ('MONEDA_INEXISTENTE', 'Moneda inexistente'), ('MONEDAS_IGUALES', 'Monedas iguales'), ('EMPRESA_INEXISTENTE', 'Empresa inexistente'), ('FECHA_INVALIDA', 'Fecha inválida'), ('PERIODO_INVERTIDO', 'Período invertido'), ('NUMERO_INVALIDO', 'Número inválido'), ('DIGITOS_EXCEDIDOS', 'Demasiados dígitos'), ('ENTEROS_EXCEDIDOS', 'Demasiados dígitos enteros'), ('NO_POSITIVO', 'Valor no positivo'), ('NEGATIVO', 'Valor negativo'), ('OBLIGATORIO', 'Campo obligatorio'), ('LARGO_EXCEDIDO', 'Texto demasiado largo'), ('ARCHIVO_INVALIDO', 'Archivo inválido'), ('ERROR_DESCONOCIDO', 'Error desconocido'), ('ERROR_INTERNO', 'Error del proceso'), ('LEGADO', 'Error anterior (texto)')], max_length=30),
+        ),
+    ]
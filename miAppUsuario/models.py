@@ -1,6 +1,9 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.hashers import make_password, check_password
 from django.conf import settings
+from django.core.files.storage import storages
 from django.utils import timezone
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 class UsuarioManager(BaseUserManager):
@@ -26,6 +29,9 @@ class UsuarioManager(BaseUserManager):
         
         return self.create_user(email, password, **extra_fields)
 
+# Campos de Usuario que se copian a UsuarioHistorico (miAppUsuario.historial).
+CAMPOS_HISTORICO = ('first_name', 'last_name', 'edad', 'email', 'telefono')
+
 class Usuario(AbstractUser):
     username = None
     edad = models.PositiveBigIntegerField(null = True, blank = True)
@@ -58,6 +64,17 @@ class Usuario(AbstractUser):
     )
     
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        usuario = super().from_db(db, field_names, values)
+        # Valores al cargar: el histórico solo registra cambios reales.
+        usuario._historico_original = usuario.valores_historico()
+        return usuario
+
+    def valores_historico(self):
+        """Campos de CAMPOS_HISTORICO ya cargados (no dispara consultas por los diferidos)."""
+        return {campo: self.__dict__[campo] for campo in CAMPOS_HISTORICO if campo in self.__dict__}
+
     def set_clave_secreta(self, clave_raw):
         self.set_password(clave_raw)
         
@@ -66,11 +83,22 @@ class Usuario(AbstractUser):
 
     class Meta:
         ordering = ['first_name'] 
+        indexes = [
+            # Paginación keyset del listado: (orden, id).
+            models.Index(fields=['first_name', 'id'], name='usuario_nombre_id_idx'),
+            models.Index(fields=['last_name', 'id'], name='usuario_apellido_id_idx'),
+            models.Index(fields=['fecha_creacion'], name='usuario_fecha_creacion_idx'),
+        ]
     def __str__(self):
         return f"{self.nombre} {self.apellido} <{self.email}>"
     
+def almacenamiento_importaciones():
+    """Storage de los archivos de importación (STORAGES['importaciones']: disco o S3)."""
+    return storages['importaciones']
+
 class Auditoria(models.Model):
     STATUS_PENDING = 'PENDING'
+    STATUS_VALIDATING = 'VALIDATING'
     STATUS_VALIDATED = 'VALIDATED'
     STATUS_IMPORTING = 'IMPORTING'
     STATUS_IMPORTED = 'IMPORTED'
@@ -79,26 +107,230 @@ class Auditoria(models.Model):
 
     STATUS_CHOICES = [
         (STATUS_PENDING,'Cargando'),
-        (STATUS_VALIDATED, 'Calidando (esperando de validacion)'),
+        (STATUS_VALIDATING, 'Validando.....'),
+        (STATUS_VALIDATED, 'Validado (esperando confirmación)'),
         (STATUS_IMPORTING, 'Importando.....'),
         (STATUS_IMPORTED, 'Importado'),
         (STATUS_CANCELLED, 'Proceso cancelado'),
-        (STATUS_FAILED, 'Cago mano')
+        (STATUS_FAILED, 'Falló')
+    ]
+
+    TIPO_USUARIOS = 'USUARIOS'
+    TIPO_TASAS = 'TASAS'
+    TIPO_CALIFICACIONES = 'CALIFICACIONES'
+
+    TIPO_CHOICES = [
+        (TIPO_USUARIOS, 'Usuarios'),
+        (TIPO_TASAS, 'Tasas de cambio'),
+        (TIPO_CALIFICACIONES, 'Calificaciones tributarias'),
     ]
     uploaded_at = models.DateTimeField(default=timezone.now)
-    file = models.FileField(upload_to='imports/', null=True, blank=True)
+    file = models.FileField(upload_to='imports/', storage=almacenamiento_importaciones, null=True, blank=True)
     filename = models.CharField(max_length=255, blank=True)
     row_count = models.PositiveIntegerField(default=0)
     imported_count = models.PositiveIntegerField(default=0)
     updated_count = models.PositiveIntegerField(default=0)
+    # Los errores en sí están en ErrorImportacion (auditoria.errores).
     error_count = models.PositiveIntegerField(default=0)
-    errors = models.JSONField(default=list, blank=True)
+    # Resultado de la validación en seco: filas listas para importar y números
+    # de fila que el paso de confirmación debe saltarse.
+    filas_validas = models.PositiveIntegerField(default=0)
+    filas_invalidas = models.JSONField(default=list, blank=True)
+    confirmada = models.BooleanField(default=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, default=TIPO_USUARIOS)
+    subido_por = models.ForeignKey(
+        'Usuario',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='importaciones',
+        verbose_name='Subido por'
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Punto de control: SHA-256 del archivo (detecta re-subidas idénticas y
+    # que el archivo no cambió al reanudar) y última fila cuyo chunk quedó
+    # confirmado en la fase en curso. `latido` se renueva con cada chunk: si
+    # envejece, el worker murió y otro puede retomar el trabajo.
+    hash_archivo = models.CharField(max_length=64, blank=True)
+    fila_confirmada = models.PositiveIntegerField(default=0)
+    latido = models.DateTimeField(null=True, blank=True)
+    # Rendimiento del hasheo de contraseñas (cargas de usuarios), acumulado
+    # entre reanudaciones: ver hashes_por_segundo.
+    hashes_calculados = models.PositiveIntegerField(default=0)
+    segundos_hash = models.FloatField(default=0)
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['-uploaded_at'], name='auditoria_uploaded_idx'),
+            models.Index(fields=['hash_archivo'], name='auditoria_hash_idx'),
+        ]
     
     def __str__(self):
-        return f"histotico de {self.usuario} modificado en {self.modified_at}"
+        return f"Importación {self.pk} ({self.filename}) - {self.status}"
+
+    @property
+    def procesadas(self):
+        if self.status in (self.STATUS_VALIDATING, self.STATUS_VALIDATED):
+            return self.filas_validas + self.error_count
+        return self.imported_count + self.updated_count + self.error_count
+
+    @property
+    def hashes_por_segundo(self):
+        return self.hashes_calculados / self.segundos_hash if self.segundos_hash else 0.0
+
+    @property
+    def esperando_confirmacion(self):
+        return self.status == self.STATUS_VALIDATED and not self.confirmada
+
+    @property
+    def porcentaje(self):
+        if not self.row_count:
+            return 0
+        return min(100, round(self.procesadas * 100 / self.row_count))
+
+    @property
+    def terminada(self):
+        return self.status in (self.STATUS_IMPORTED, self.STATUS_CANCELLED, self.STATUS_FAILED)
+
+class ErrorImportacion(models.Model):
+    """
+    Un error de una carga masiva: fila, columna, código y el valor que lo
+    causó. El texto se arma con MENSAJES al mostrarlo, así cada fila guarda
+    solo el código y sus parámetros. fila = 0 es un error del archivo
+    completo (formato, columnas, fallo del proceso).
+    """
+    ROL_INEXISTENTE = 'ROL_INEXISTENTE'
+    PAIS_INEXISTENTE = 'PAIS_INEXISTENTE'
+    EDAD_INVALIDA = 'EDAD_INVALIDA'
+    CONTRASEÑA_CORTA = 'CONTRASEÑA_CORTA'
+    CONTRASEÑA_NUMERICA = 'CONTRASEÑA_NUMERICA'
+    CONTRASEÑA_COMUN = 'CONTRASEÑA_COMUN'
+    EMAIL_INVALIDO = 'EMAIL_INVALIDO'
+    EMAIL_REPETIDO = 'EMAIL_REPETIDO'
+    EMAIL_EXISTENTE = 'EMAIL_EXISTENTE'
+    TELEFONO_REPETIDO = 'TELEFONO_REPETIDO'
+    TELEFONO_EXISTENTE = 'TELEFONO_EXISTENTE'
+    INTEGRIDAD = 'INTEGRIDAD'
+    MONEDA_INEXISTENTE = 'MONEDA_INEXISTENTE'
+    MONEDAS_IGUALES = 'MONEDAS_IGUALES'
+    EMPRESA_INEXISTENTE = 'EMPRESA_INEXISTENTE'
+    FECHA_INVALIDA = 'FECHA_INVALIDA'
+    PERIODO_INVERTIDO = 'PERIODO_INVERTIDO'
+    NUMERO_INVALIDO = 'NUMERO_INVALIDO'
+    DIGITOS_EXCEDIDOS = 'DIGITOS_EXCEDIDOS'
+    ENTEROS_EXCEDIDOS = 'ENTEROS_EXCEDIDOS'
+    NO_POSITIVO = 'NO_POSITIVO'
+    NEGATIVO = 'NEGATIVO'
+    OBLIGATORIO = 'OBLIGATORIO'
+    LARGO_EXCEDIDO = 'LARGO_EXCEDIDO'
+    ARCHIVO_INVALIDO = 'ARCHIVO_INVALIDO'
+    ERROR_DESCONOCIDO = 'ERROR_DESCONOCIDO'
+    ERROR_INTERNO = 'ERROR_INTERNO'
+    LEGADO = 'LEGADO'
+
+    # Se formatean con valor, columna y los parámetros guardados.
+    MENSAJES = {
+        ROL_INEXISTENTE: 'El Rol con ID {valor} no existe.',
+        PAIS_INEXISTENTE: 'El País con ID {valor} no existe.',
+        EDAD_INVALIDA: 'La edad "{valor}" no es un número entero válido.',
+        CONTRASEÑA_CORTA: 'La contraseña debe tener al menos {minimo} caracteres.',
+        CONTRASEÑA_NUMERICA: 'La contraseña no puede ser solo numérica.',
+        CONTRASEÑA_COMUN: 'La contraseña es demasiado común.',
+        EMAIL_INVALIDO: 'El email "{valor}" no es válido.',
+        EMAIL_REPETIDO: 'El email {valor} está repetido en el archivo.',
+        EMAIL_EXISTENTE: 'Ya existe un usuario con el email {valor}.',
+        TELEFONO_REPETIDO: 'El teléfono {valor} está repetido en el archivo.',
+        TELEFONO_EXISTENTE: 'Ya existe un usuario con el teléfono {valor}.',
+        INTEGRIDAD: 'Error de integridad (ej. email duplicado) para {valor}.',
+        MONEDA_INEXISTENTE: 'La moneda {valor} no existe.',
+        MONEDAS_IGUALES: 'La moneda de origen y destino son la misma.',
+        EMPRESA_INEXISTENTE: 'La empresa con identificación fiscal {valor} no existe.',
+        FECHA_INVALIDA: 'La fecha "{valor}" ({columna}) no tiene un formato válido (AAAA-MM-DD).',
+        PERIODO_INVERTIDO: 'La fecha de fin del período es anterior a la de inicio.',
+        NUMERO_INVALIDO: '"{valor}" no es un número válido.',
+        DIGITOS_EXCEDIDOS: '"{valor}" excede {digitos} dígitos.',
+        ENTEROS_EXCEDIDOS: '"{valor}" excede {digitos} dígitos enteros.',
+        NO_POSITIVO: 'El valor de {columna} debe ser mayor que cero.',
+        NEGATIVO: 'El valor de {columna} no puede ser negativo.',
+        OBLIGATORIO: 'El campo {columna} es obligatorio.',
+        LARGO_EXCEDIDO: 'El campo {columna} no puede tener más de {maximo} caracteres.',
+        ARCHIVO_INVALIDO: '{detalle}',
+        ERROR_DESCONOCIDO: 'Error desconocido al crear el registro. {detalle}',
+        ERROR_INTERNO: 'Error al procesar el archivo: {detalle}',
+        LEGADO: '{detalle}',
+    }
+    CODIGO_CHOICES = [
+        (ROL_INEXISTENTE, 'Rol inexistente'),
+        (PAIS_INEXISTENTE, 'País inexistente'),
+        (EDAD_INVALIDA, 'Edad inválida'),
+        (CONTRASEÑA_CORTA, 'Contraseña corta'),
+        (CONTRASEÑA_NUMERICA, 'Contraseña numérica'),
+        (CONTRASEÑA_COMUN, 'Contraseña común'),
+        (EMAIL_INVALIDO, 'Email inválido'),
+        (EMAIL_REPETIDO, 'Email repetido en el archivo'),
+        (EMAIL_EXISTENTE, 'Email ya registrado'),
+        (TELEFONO_REPETIDO, 'Teléfono repetido en el archivo'),
+        (TELEFONO_EXISTENTE, 'Teléfono ya registrado'),
+        (INTEGRIDAD, 'Error de integridad'),
+        (MONEDA_INEXISTENTE, 'Moneda inexistente'),
+        (MONEDAS_IGUALES, 'Monedas iguales'),
+        (EMPRESA_INEXISTENTE, 'Empresa inexistente'),
+        (FECHA_INVALIDA, 'Fecha inválida'),
+        (PERIODO_INVERTIDO, 'Período invertido'),
+        (NUMERO_INVALIDO, 'Número inválido'),
+        (DIGITOS_EXCEDIDOS, 'Demasiados dígitos'),
+        (ENTEROS_EXCEDIDOS, 'Demasiados dígitos enteros'),
+        (NO_POSITIVO, 'Valor no positivo'),
+        (NEGATIVO, 'Valor negativo'),
+        (OBLIGATORIO, 'Campo obligatorio'),
+        (LARGO_EXCEDIDO, 'Texto demasiado largo'),
+        (ARCHIVO_INVALIDO, 'Archivo inválido'),
+        (ERROR_DESCONOCIDO, 'Error desconocido'),
+        (ERROR_INTERNO, 'Error del proceso'),
+        (LEGADO, 'Error anterior (texto)'),
+    ]
+
+    # Sin constraint en la BD: Auditoria está particionada en PostgreSQL y su
+    # PK real es (id, uploaded_at). El borrado en cascada lo hace Django y
+    # mantener_particiones al eliminar una partición.
+    auditoria = models.ForeignKey(
+        Auditoria, on_delete=models.CASCADE, related_name='errores', db_constraint=False, db_index=False
+    )
+    fila = models.PositiveIntegerField(default=0)
+    columna = models.CharField(max_length=50, blank=True)
+    codigo = models.CharField(max_length=30, choices=CODIGO_CHOICES)
+    valor = models.CharField(max_length=255, blank=True)
+    parametros = models.JSONField(default=dict, blank=True)
+    # Copia de auditoria.uploaded_at. En PostgreSQL es la clave de partición:
+    # los errores de un mes se archivan y eliminan con la partición de su
+    # Auditoria (miAppUsuario.particiones), sin DELETE fila por fila.
+    uploaded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['fila', 'id']
+        indexes = [
+            models.Index(fields=['auditoria', 'fila', 'id'], name='error_auditoria_fila_idx'),
+            models.Index(fields=['auditoria', 'codigo', 'fila', 'id'], name='error_auditoria_codigo_idx'),
+        ]
+        verbose_name = "Error de importación"
+        verbose_name_plural = "Errores de importación"
+
+    def __str__(self):
+        return f"Fila {self.fila}: {self.mensaje}" if self.fila else self.mensaje
+
+    @classmethod
+    def de_fila(cls, fila, codigo, columna='', valor='', **parametros):
+        """Instancia sin guardar (ni auditoria): se escriben por lote con bulk_create."""
+        valor = '' if valor is None else str(valor)
+        return cls(fila=fila, codigo=codigo, columna=columna, valor=valor[:255], parametros=parametros)
+
+    @property
+    def mensaje(self):
+        try:
+            return self.MENSAJES[self.codigo].format(valor=self.valor, columna=self.columna, **self.parametros)
+        except (KeyError, IndexError):
+            return f'{self.codigo} {self.valor}'.strip()
 
 class Rol(models.Model):
     nombre = models.CharField(
@@ -136,8 +368,72 @@ class UsuarioHistorico(models.Model):
 
     class Meta:
         ordering = ['-modified_at']
+        indexes = [
+            models.Index(fields=['usuario', '-modified_at'], name='historico_usuario_fecha_idx'),
+        ]
         verbose_name = "Histórico de Usuario"
         verbose_name_plural = "Históricos de Usuarios"
 
     def __str__(self):
-        return f"Histórico de {self.usuario} modificado en {self.modified_at}"
\ No newline at end of file
+        return f"Histórico de {self.usuario} modificado en {self.modified_at}"
+
+class SubidaArchivo(models.Model):
+    """
+    Subida por partes de un archivo de importación (miAppUsuario.almacenamiento).
+    Cada parte se escribe directo en el storage; en S3 es una subida
+    multipart (upload_id). Al completarla se encola la Auditoria.
+    """
+    ESTADO_INICIADA = 'INICIADA'
+    ESTADO_COMPLETADA = 'COMPLETADA'
+    ESTADO_ABORTADA = 'ABORTADA'
+
+    ESTADO_CHOICES = [
+        (ESTADO_INICIADA, 'Subiendo'),
+        (ESTADO_COMPLETADA, 'Completada'),
+        (ESTADO_ABORTADA, 'Abortada'),
+    ]
+
+    # UUID: el id va en las URLs de las partes y no debe poder adivinarse.
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    tipo = models.CharField(max_length=20, choices=Auditoria.TIPO_CHOICES, default=Auditoria.TIPO_USUARIOS)
+    tamano = models.PositiveBigIntegerField()
+    tamano_parte = models.PositiveIntegerField()
+    # Nombre en el storage y, en S3, el UploadId de la subida multipart.
+    nombre_guardado = models.CharField(max_length=255)
+    upload_id = models.CharField(max_length=1024, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=ESTADO_INICIADA)
+    usuario = models.ForeignKey(
+        'Usuario', on_delete=models.SET_NULL, null=True, blank=True, related_name='subidas'
+    )
+    # Sin constraint en la BD por la partición de Auditoria (ver ErrorImportacion).
+    auditoria = models.ForeignKey(
+        Auditoria, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', db_constraint=False
+    )
+    creada_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Subida de archivo"
+        verbose_name_plural = "Subidas de archivos"
+
+    def __str__(self):
+        return f"Subida {self.pk} ({self.filename}) - {self.estado}"
+
+    @property
+    def partes_totales(self):
+        return -(-self.tamano // self.tamano_parte)
+
+    def tamano_de_parte(self, numero):
+        """Bytes que debe tener la parte `numero` (1..partes_totales); la última puede ser menor."""
+        return min(self.tamano_parte, self.tamano - (numero - 1) * self.tamano_parte)
+
+class ParteSubida(models.Model):
+    subida = models.ForeignKey(SubidaArchivo, on_delete=models.CASCADE, related_name='partes')
+    numero = models.PositiveIntegerField()
+    etag = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ['numero']
+        constraints = [
+            models.UniqueConstraint(fields=['subida', 'numero'], name='parte_subida_unica'),
+        ]
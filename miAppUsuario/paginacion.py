@@ -0,0 +1,116 @@
+# miAppUsuario/paginacion.py
+
+from django.core import signing
+from django.db.models import Q
+
+SALT_CURSOR = 'miAppUsuario.paginacion'
+
+
+class CursorInvalido(Exception):
+    pass
+
+
+class PaginaKeyset:
+    def __init__(self, items, cursor_siguiente=None, cursor_anterior=None):
+        self.items = items
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+
+    @property
+    def hay_siguiente(self):
+        return self.cursor_siguiente is not None
+
+    @property
+    def hay_anterior(self):
+        return self.cursor_anterior is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _valor(item, campo):
+    if isinstance(item, dict):
+        return item[campo]
+    return getattr(item, campo)
+
+
+def _codificar(direccion, valor, pk):
+    if hasattr(valor, 'isoformat'):
+        valor = valor.isoformat()
+    return signing.dumps([direccion, valor, pk], salt=SALT_CURSOR, compress=True)
+
+
+def _decodificar(cursor, modelo, campo):
+    try:
+        direccion, valor, pk = signing.loads(cursor, salt=SALT_CURSOR)
+        valor = modelo._meta.get_field(campo).to_python(valor)
+    except Exception:
+        raise CursorInvalido(cursor)
+    if direccion not in ('sig', 'ant'):
+        raise CursorInvalido(cursor)
+    return direccion, valor, pk
+
+
+def _consulta(queryset, campo, cursor, por_pagina, descendente):
+    """Queryset ordenado y limitado de la página pedida, y si se va hacia atrás."""
+    hacia_atras = False
+    if cursor:
+        direccion, valor, pk = _decodificar(cursor, queryset.model, campo)
+        hacia_atras = direccion == 'ant'
+        desc = descendente != hacia_atras
+        op = 'lt' if desc else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{campo}__{op}': valor}) | Q(**{campo: valor, f'pk__{op}': pk})
+        )
+    else:
+        desc = descendente
+
+    signo = '-' if desc else ''
+    return queryset.order_by(f'{signo}{campo}', f'{signo}pk')[:por_pagina + 1], hacia_atras
+
+
+def _pagina(filas, campo, cursor, por_pagina, hacia_atras):
+    hay_mas = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+    if hacia_atras:
+        filas.reverse()
+
+    if not filas:
+        return PaginaKeyset(filas)
+
+    def pk_de(item):
+        if isinstance(item, dict):
+            return item.get('pk', item.get('id'))
+        return item.pk
+
+    primero, ultimo = filas[0], filas[-1]
+    hay_siguiente = hay_mas if not hacia_atras else True
+    hay_anterior = (cursor is not None) if not hacia_atras else hay_mas
+
+    return PaginaKeyset(
+        filas,
+        cursor_siguiente=_codificar('sig', _valor(ultimo, campo), pk_de(ultimo)) if hay_siguiente else None,
+        cursor_anterior=_codificar('ant', _valor(primero, campo), pk_de(primero)) if hay_anterior else None,
+    )
+
+
+def paginar_keyset(queryset, campo, cursor=None, por_pagina=50, descendente=False):
+    """
+    Paginación por búsqueda (keyset/seek) sobre (campo, pk): en vez de OFFSET
+    filtra "después de la última fila vista", así el costo de cada página no
+    crece con la tabla mientras exista un índice sobre (campo, id).
+
+    `campo` no puede ser nulo. El queryset puede ser de instancias o de
+    values(); en ese caso debe incluir `campo` y 'pk'/'id'.
+    """
+    consulta, hacia_atras = _consulta(queryset, campo, cursor, por_pagina, descendente)
+    return _pagina(list(consulta), campo, cursor, por_pagina, hacia_atras)
+
+
+async def apaginar_keyset(queryset, campo, cursor=None, por_pagina=50, descendente=False):
+    """Versión async de paginar_keyset para vistas ASGI."""
+    consulta, hacia_atras = _consulta(queryset, campo, cursor, por_pagina, descendente)
+    return _pagina([fila async for fila in consulta], campo, cursor, por_pagina, hacia_atras)
@@ -0,0 +1,206 @@
+# miAppUsuario/particiones.py
+
+import gzip
+import os
+import re
+from datetime import date, timezone as tz
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Auditoria, UsuarioHistorico, ErrorImportacion, SubidaArchivo
+
+# Tablas particionadas por mes en PostgreSQL (migración 0008):
+# (modelo, columna de la partición, setting con los meses de retención).
+TABLAS_PARTICIONADAS = [
+    (Auditoria, 'uploaded_at', 'RETENCION_AUDITORIA_MESES'),
+    (UsuarioHistorico, 'modified_at', 'RETENCION_HISTORICO_MESES'),
+]
+
+# Tablas hijas particionadas con la misma clave que su tabla padre
+# (migración 0012): la partición de cada mes se crea, archiva y elimina junto
+# con la del padre. (modelo, columna de la partición).
+DEPENDIENTES = {
+    Auditoria: [(ErrorImportacion, 'uploaded_at')],
+}
+
+# FK sin constraint en la BD (db_constraint=False) hacia la tabla padre, con
+# on_delete=SET_NULL: un DROP no lo aplica, así que se ponen en NULL antes.
+# modelo -> [(modelo que referencia, campo)].
+REFERENCIAS = {
+    Auditoria: [(SubidaArchivo, 'auditoria')],
+}
+
+# FileField cuyos archivos se borran del storage al eliminar la partición.
+ARCHIVOS = {
+    Auditoria: 'file',
+}
+
+PATRON_PARTICION = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def inicio_mes(fecha):
+    return date(fecha.year, fecha.month, 1)
+
+
+def sumar_meses(mes, meses):
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def mes_actual():
+    # Los límites de las particiones están en UTC.
+    return inicio_mes(timezone.now().astimezone(tz.utc))
+
+
+def nombre_particion(tabla, mes):
+    return f'{tabla}_p{mes.year:04d}_{mes.month:02d}'
+
+
+def _limite(mes):
+    return f"'{mes.isoformat()} 00:00:00+00'"
+
+
+def particiones(cursor, tabla):
+    """{mes: nombre} de las particiones mensuales de `tabla` (sin la DEFAULT)."""
+    cursor.execute(
+        """
+        SELECT hija.relname
+        FROM pg_inherits
+        JOIN pg_class padre ON padre.oid = pg_inherits.inhparent
+        JOIN pg_class hija ON hija.oid = pg_inherits.inhrelid
+        WHERE padre.oid = %s::regclass
+        """,
+        [connection.ops.quote_name(tabla)],
+    )
+    resultado = {}
+    for (nombre,) in cursor.fetchall():
+        coincidencia = PATRON_PARTICION.search(nombre)
+        if coincidencia:
+            resultado[date(int(coincidencia[1]), int(coincidencia[2]), 1)] = nombre
+    return resultado
+
+
+def crear_particion(cursor, tabla, columna, mes):
+    """
+    Crea la partición del `mes`. Las filas de ese rango que hayan caído en la
+    partición DEFAULT se mueven primero a la tabla nueva; recién entonces se
+    adjunta (ATTACH valida que la DEFAULT ya no tenga filas del rango).
+    """
+    quote = connection.ops.quote_name
+    nombre = nombre_particion(tabla, mes)
+    desde, hasta = _limite(mes), _limite(sumar_meses(mes, 1))
+    cursor.execute(
+        f'CREATE TABLE {quote(nombre)} (LIKE {quote(tabla)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    )
+    cursor.execute(
+        f'WITH movidas AS ('
+        f'DELETE FROM {quote(tabla + "_default")} WHERE {quote(columna)} >= {desde} AND {quote(columna)} < {hasta} '
+        f'RETURNING *) INSERT INTO {quote(nombre)} SELECT * FROM movidas'
+    )
+    cursor.execute(f'ALTER TABLE {quote(tabla)} ATTACH PARTITION {quote(nombre)} FOR VALUES FROM ({desde}) TO ({hasta})')
+    return nombre
+
+
+def archivar_particion(cursor, nombre, directorio):
+    """Vuelca la partición a <directorio>/<nombre>.csv.gz con COPY (sin pasar filas por Python)."""
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f'{nombre}.csv.gz')
+    with gzip.open(ruta, 'wb') as archivo:
+        cursor.copy_expert(f'COPY {connection.ops.quote_name(nombre)} TO STDOUT WITH (FORMAT csv, HEADER)', archivo)
+    return ruta
+
+
+def archivos_de_particion(cursor, nombre, columna):
+    """Nombres en el storage de los archivos referenciados por la partición."""
+    quote = connection.ops.quote_name
+    cursor.execute(f"SELECT {quote(columna)} FROM {quote(nombre)} WHERE {quote(columna)} <> ''")
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def eliminar_particion(cursor, tabla, nombre, referencias=()):
+    """
+    Separa y elimina la partición. Antes pone en NULL las `referencias`
+    (modelo, campo) que apuntan a sus filas, para no dejar ids colgando.
+    """
+    quote = connection.ops.quote_name
+    for modelo, nombre_campo in referencias:
+        campo = modelo._meta.get_field(nombre_campo)
+        cursor.execute(
+            f'UPDATE {quote(modelo._meta.db_table)} SET {quote(campo.column)} = NULL '
+            f'WHERE {quote(campo.column)} IN (SELECT {quote(campo.target_field.column)} FROM {quote(nombre)})'
+        )
+    cursor.execute(f'ALTER TABLE {quote(tabla)} DETACH PARTITION {quote(nombre)}')
+    cursor.execute(f'DROP TABLE {quote(nombre)}')
+
+
+def mantener(meses_futuros, informar, directorio=None, simular=False):
+    """
+    Para cada tabla de TABLAS_PARTICIONADAS (y sus DEPENDIENTES): crea las
+    particiones del mes actual y de los `meses_futuros` siguientes, y elimina
+    las que quedaron fuera de la retención, archivándolas antes en
+    `directorio` si se indica. Las particiones de un mes vencido se eliminan
+    juntas en una transacción (con las REFERENCIAS a sus filas ya en NULL),
+    y después se borran del storage los archivos de ARCHIVOS. Cada paso se
+    informa con `informar(mensaje)`; con `simular` solo se informa.
+    """
+    actual = mes_actual()
+    with connection.cursor() as cursor:
+        for modelo, columna, setting in TABLAS_PARTICIONADAS:
+            tablas = [(modelo._meta.db_table, columna)] + [
+                (dependiente._meta.db_table, columna_dependiente)
+                for dependiente, columna_dependiente in DEPENDIENTES.get(modelo, ())
+            ]
+            existentes = {tabla: particiones(cursor, tabla) for tabla, _ in tablas}
+
+            for i in range(meses_futuros + 1):
+                mes = sumar_meses(actual, i)
+                for tabla, columna_tabla in tablas:
+                    if mes not in existentes[tabla]:
+                        informar(f'Crear {nombre_particion(tabla, mes)}')
+                        if not simular:
+                            with transaction.atomic():
+                                crear_particion(cursor, tabla, columna_tabla, mes)
+
+            retencion = getattr(settings, setting, 0)
+            if not retencion:
+                continue
+            # Se conservan el mes actual y los `retencion` meses anteriores completos.
+            limite = sumar_meses(actual, -retencion)
+            vencidos = sorted({mes for por_mes in existentes.values() for mes in por_mes if mes < limite})
+            for mes in vencidos:
+                # Primero las hijas: sus filas apuntan a las del padre.
+                vencidas = [
+                    (tabla, existentes[tabla][mes]) for tabla, _ in reversed(tablas) if mes in existentes[tabla]
+                ]
+                if directorio:
+                    for _, nombre in vencidas:
+                        informar(f'Archivar {nombre} en {directorio}')
+                        if not simular:
+                            archivar_particion(cursor, nombre, directorio)
+                archivos = []
+                principal = existentes[tablas[0][0]].get(mes)
+                if modelo in ARCHIVOS and principal:
+                    archivos = archivos_de_particion(cursor, principal, modelo._meta.get_field(ARCHIVOS[modelo]).column)
+                for _, nombre in vencidas:
+                    informar(f'Eliminar {nombre}')
+                if simular:
+                    continue
+                with transaction.atomic():
+                    for tabla, nombre in vencidas:
+                        referencias = REFERENCIAS.get(modelo, ()) if tabla == tablas[0][0] else ()
+                        eliminar_particion(cursor, tabla, nombre, referencias)
+                if archivos:
+                    _borrar_archivos(modelo, ARCHIVOS[modelo], archivos, informar)
+
+
+def _borrar_archivos(modelo, campo, nombres, informar):
+    storage = modelo._meta.get_field(campo).storage
+    for nombre in nombres:
+        try:
+            storage.delete(nombre)
+        except Exception as e:
+            # Un archivo que no se pudo borrar no debe frenar la retención.
+            informar(f'No se pudo borrar {nombre}: {e}')
+    informar(f'Borrados {len(nombres)} archivos de {modelo._meta.verbose_name_plural}')
@@ -0,0 +1,34 @@
+# miAppUsuario/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Usuario, Rol
+from .estadisticas import invalidar_estadisticas
+from .autorizacion import invalidar_roles, invalidar_rol_usuario
+from .historial import registrar_guardado
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def usuario_cambiado(sender, **kwargs):
+    invalidar_estadisticas()
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def rol_usuario_cambiado(sender, instance, **kwargs):
+    invalidar_rol_usuario(instance.pk)
+
+
+@receiver(post_save, sender=Usuario)
+def usuario_guardado(sender, instance, created, raw=False, using=None, **kwargs):
+    # raw: fixtures (loaddata), que no son cambios de un usuario.
+    if not raw:
+        registrar_guardado(instance, created, using)
+
+
+@receiver(post_save, sender=Rol)
+@receiver(post_delete, sender=Rol)
+def rol_cambiado(sender, **kwargs):
+    invalidar_roles()
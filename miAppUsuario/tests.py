@@ -1,3 +1,1064 @@
-from django.test import TestCase
+import csv
+import io
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_UNKNOWN
+
+from .forms import FiltroUsuariosForm
+from .models import Auditoria, ErrorImportacion, SubidaArchivo, Usuario, UsuarioHistorico
+from .autorizacion import rol_de
+from .busqueda import MIN_CARACTERES, buscar_usuarios
+from .importacion import ImportadorUsuarios, COLUMNAS_USUARIOS
+from .hashing import HasheadorContraseñas
+from .validacion import ValidadorUsuarios
+from .paginacion import SALT_CURSOR, CursorInvalido, paginar_keyset
+from .lectores import ArchivoInvalido, LectorCSV, LectorExcel, LectorFilas
+from . import estadisticas, fabricas, historial, instrumentacion, particiones, trabajos
+from miProyecto.postgresql_pool.base import Database, Pool
+
+
+class MaxConsultasMixin:
+    """
+    assertMaxConsultas(n): falla si el bloque ejecuta más de n consultas y
+    lista el SQL, para ver qué se coló (típicamente un N+1).
+    """
+
+    @contextmanager
+    def assertMaxConsultas(self, maximo):
+        with CaptureQueriesContext(connection) as contexto:
+            yield contexto
+        ejecutadas = len(contexto.captured_queries)
+        if ejecutadas > maximo:
+            sql = '\n'.join(f'{i}. {q["sql"]}' for i, q in enumerate(contexto.captured_queries, start=1))
+            self.fail(f'{ejecutadas} consultas ejecutadas, máximo {maximo}:\n{sql}')
+
+    def contar_consultas(self, funcion):
+        with CaptureQueriesContext(connection) as contexto:
+            funcion()
+        return len(contexto.captured_queries)
+
+
+class CatalogosTestCase(TestCase):
+    """
+    TestCase con fabricas.crear_catalogos() en cls.catalogos y USUARIOS
+    usuarios de fabricas.crear_usuarios. Las subclases que necesitan más
+    datos extienden setUpTestData llamando primero a super().
+    """
+    USUARIOS = 0
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogos = fabricas.crear_catalogos()
+        if cls.USUARIOS:
+            fabricas.crear_usuarios(cls.USUARIOS, cls.catalogos)
+
+
+# MD5 solo para que los tests no paguen PBKDF2 en cada login.
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ConsultasVistasUsuariosTests(MaxConsultasMixin, CatalogosTestCase):
+    """Cantidad máxima de consultas por vista. Si un cambio sube un límite, que sea a propósito."""
+
+    USUARIOS = 60
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.otro = Usuario.objects.get(email='usuario7@fabrica.invalid')
+
+    def setUp(self):
+        # Las estadísticas van a cache: cada test parte en frío.
+        cache.clear()
+        self.client.force_login(self.catalogos.admin)
+
+    def datos_usuario(self, **cambios):
+        datos = {
+            'first_name': 'Nueva', 'last_name': 'Persona', 'email': 'nueva@fabrica.invalid',
+            'telefono': '+56700000001', 'edad': 30, 'rol_usuario': self.catalogos.rol_usuario.pk,
+            'pais_usuario': self.catalogos.pais.pk, 'is_active': 'on',
+            'contraseña': 'Clave.Segura.1', 'contraseña2': 'Clave.Segura.1',
+        }
+        datos.update(cambios)
+        return datos
+
+    def test_home(self):
+        with self.assertMaxConsultas(1):
+            respuesta = self.client.get(reverse('usuarios:home'))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_home_con_estadisticas_en_cache(self):
+        self.client.get(reverse('usuarios:home'))
+        with self.assertMaxConsultas(0):
+            self.client.get(reverse('usuarios:home'))
+
+    def test_create_get(self):
+        with self.assertMaxConsultas(3):
+            respuesta = self.client.get(reverse('usuarios:create'))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_create_post(self):
+        with self.assertMaxConsultas(8), self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(reverse('usuarios:create'), self.datos_usuario())
+        self.assertRedirects(respuesta, reverse('usuarios:read'), fetch_redirect_response=False)
+        self.assertTrue(Usuario.objects.filter(email='nueva@fabrica.invalid').exists())
+
+    def test_read(self):
+        with self.assertMaxConsultas(4):
+            respuesta = self.client.get(reverse('usuarios:read'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.context['usuarios']), 50)
+
+    def test_read_con_filtros_y_cursor(self):
+        primera = self.client.get(reverse('usuarios:read'), {'rol': self.catalogos.rol_usuario.pk, 'por_pagina': 10})
+        with self.assertMaxConsultas(4):
+            respuesta = self.client.get(reverse('usuarios:read') + primera.context['url_siguiente'])
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_read_no_crece_con_la_pagina(self):
+        url = reverse('usuarios:read')
+        cache.clear()
+        diez = self.contar_consultas(lambda: self.client.get(url, {'por_pagina': 10}))
+        cache.clear()
+        cincuenta = self.contar_consultas(lambda: self.client.get(url, {'por_pagina': 50}))
+        self.assertEqual(diez, cincuenta)
+
+    def test_edit_get(self):
+        with self.assertMaxConsultas(4):
+            respuesta = self.client.get(reverse('usuarios:edit', args=[self.otro.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_edit_post(self):
+        datos = self.datos_usuario(email=self.otro.email, telefono=self.otro.telefono, contraseña='', contraseña2='')
+        with self.assertMaxConsultas(9), self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(reverse('usuarios:edit', args=[self.otro.pk]), datos)
+        self.assertRedirects(respuesta, reverse('usuarios:read'), fetch_redirect_response=False)
+
+    def test_delete_get(self):
+        with self.assertMaxConsultas(2):
+            respuesta = self.client.get(reverse('usuarios:delete', args=[self.otro.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_delete_post(self):
+        # Incluye el SET NULL de las subidas por partes del usuario.
+        with self.assertMaxConsultas(10), self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(reverse('usuarios:delete', args=[self.otro.pk]))
+        self.assertRedirects(respuesta, reverse('usuarios:read'), fetch_redirect_response=False)
+        self.assertFalse(Usuario.objects.filter(pk=self.otro.pk).exists())
+
+    def test_login_get(self):
+        self.client.logout()
+        with self.assertMaxConsultas(0):
+            respuesta = self.client.get(reverse('login'))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_login_post(self):
+        self.client.logout()
+        with self.assertMaxConsultas(9):
+            respuesta = self.client.post(
+                reverse('login'), {'email': self.catalogos.admin.email, 'contraseña': fabricas.CONTRASEÑA}
+            )
+        self.assertRedirects(respuesta, reverse('admin_dashboard'), fetch_redirect_response=False)
+
+    def test_admin_dashboard_sin_consultas_de_rol(self):
+        # Con las estadísticas en cache solo quedan la sesión y el usuario (con su rol).
+        self.client.get(reverse('admin_dashboard'))
+        with self.assertMaxConsultas(2):
+            respuesta = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(respuesta.context['rol'], 'Administrador')
+
+    def test_admin_dashboard(self):
+        with self.assertMaxConsultas(3):
+            respuesta = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_admin_dashboard_rol_no_autorizado(self):
+        self.client.force_login(self.otro)
+        with self.assertMaxConsultas(5):
+            respuesta = self.client.get(reverse('admin_dashboard'))
+        self.assertRedirects(respuesta, reverse('login'), fetch_redirect_response=False)
+
+
+class EstadisticasTests(MaxConsultasMixin, CatalogosTestCase):
+
+    USUARIOS = 10
+
+    def setUp(self):
+        cache.clear()
+
+    def test_una_consulta_y_luego_cache(self):
+        with self.assertMaxConsultas(1):
+            primeras = estadisticas.obtener_estadisticas()
+        # crear_usuarios deja inactivo uno de cada diez; el admin está activo.
+        self.assertEqual(primeras, {'total_registros': 11, 'registros_recientes': 11, 'usuarios_activos': 10})
+        with self.assertMaxConsultas(0):
+            self.assertEqual(estadisticas.obtener_estadisticas(), primeras)
+
+    def test_guardar_y_eliminar_invalidan(self):
+        estadisticas.obtener_estadisticas()
+        usuario = Usuario.objects.get(email='usuario1@fabrica.invalid')
+        usuario.is_active = False
+        usuario.save()
+        self.assertEqual(estadisticas.obtener_estadisticas()['usuarios_activos'], 9)
+        usuario.delete()
+        self.assertEqual(estadisticas.obtener_estadisticas()['total_registros'], 10)
+
+    def test_update_no_invalida_hasta_el_ttl(self):
+        estadisticas.obtener_estadisticas()
+        Usuario.objects.update(is_active=False)
+        self.assertEqual(estadisticas.obtener_estadisticas()['usuarios_activos'], 10)
+        estadisticas.invalidar_estadisticas()
+        self.assertEqual(estadisticas.obtener_estadisticas()['usuarios_activos'], 0)
+
+    def test_version_async_comparte_el_cache(self):
+        sincronas = estadisticas.obtener_estadisticas()
+        with self.assertMaxConsultas(0):
+            self.assertEqual(async_to_sync(estadisticas.aobtener_estadisticas)(), sincronas)
+
+
+class PaginacionKeysetTests(CatalogosTestCase):
+
+    USUARIOS = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usuarios = Usuario.objects.filter(email__startswith='usuario')
+
+    def test_avanza_y_retrocede_con_empates(self):
+        # Todos con la misma edad: el desempate por pk decide el orden.
+        self.usuarios.update(edad=40)
+        esperado = list(self.usuarios.order_by('-edad', '-pk').values_list('pk', flat=True))
+
+        paginas = [paginar_keyset(self.usuarios, 'edad', por_pagina=3, descendente=True)]
+        while paginas[-1].hay_siguiente:
+            paginas.append(paginar_keyset(self.usuarios, 'edad', paginas[-1].cursor_siguiente, 3, True))
+        self.assertEqual([[u.pk for u in pagina] for pagina in paginas],
+                         [esperado[0:3], esperado[3:6], esperado[6:8]])
+        self.assertFalse(paginas[0].hay_anterior)
+
+        anterior = paginar_keyset(self.usuarios, 'edad', paginas[-1].cursor_anterior, 3, True)
+        self.assertEqual([u.pk for u in anterior], esperado[3:6])
+        self.assertTrue(anterior.hay_anterior and anterior.hay_siguiente)
+
+    def test_queryset_de_values(self):
+        pagina = paginar_keyset(self.usuarios.values('pk', 'email'), 'email', por_pagina=5)
+        siguiente = paginar_keyset(self.usuarios.values('pk', 'email'), 'email', pagina.cursor_siguiente, 5)
+        self.assertEqual([fila['email'] for fila in siguiente],
+                         sorted(self.usuarios.values_list('email', flat=True))[5:])
+
+    def test_cursor_alterado_o_de_otro_uso(self):
+        cursor = paginar_keyset(self.usuarios, 'email', por_pagina=2).cursor_siguiente
+        alterado = cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B')
+        otro_salt = signing.dumps(['sig', 'x', 1], compress=True)
+        direccion_rara = signing.dumps(['saltar', 'x', 1], salt=SALT_CURSOR, compress=True)
+        for invalido in (alterado, otro_salt, direccion_rara, 'basura'):
+            with self.assertRaises(CursorInvalido):
+                paginar_keyset(self.usuarios, 'email', invalido)
+
+    def test_filtro_invalido_no_descarta_los_validos(self):
+        filtros = FiltroUsuariosForm({'activo': '0', 'creado_desde': 'ayer', 'orden': 'email', 'desc': 'on'})
+        self.assertEqual(
+            list(filtros.filtrar(self.usuarios).values_list('email', flat=True)), ['usuario0@fabrica.invalid']
+        )
+        self.assertEqual((filtros.campo_orden, filtros.descendente), ('email', True))
+        self.assertIn('creado_desde', filtros.errors)
+
+
+@skipUnless(connection.vendor != 'postgresql', 'Prueba el respaldo sin pg_trgm.')
+class BusquedaGenericaTests(CatalogosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        datos = [('Ana', 'Soto', 'tamara@fabrica.invalid'), ('Zoe', 'Marin', 'zoe@fabrica.invalid'),
+                 ('Luis', 'Perez', 'lperez@fabrica.invalid')]
+        for nombre, apellido, email in datos:
+            Usuario.objects.create(first_name=nombre, last_name=apellido, email=email,
+                                   rol_usuario=cls.catalogos.rol_usuario, pais_usuario=cls.catalogos.pais)
+
+    def setUp(self):
+        self.client.force_login(self.catalogos.admin)
+
+    def nombres(self, termino, **kwargs):
+        return [fila['first_name'] for fila in buscar_usuarios(termino, **kwargs)]
+
+    def test_prefijos_antes_que_substrings(self):
+        # "mar" es prefijo del apellido de Zoe y está en medio del email de Ana.
+        self.assertEqual(self.nombres('MAR'), ['Zoe', 'Ana'])
+        self.assertEqual(self.nombres('MAR', limite=1), ['Zoe'])
+
+    def test_terminos_cortos_no_buscan(self):
+        self.assertEqual(buscar_usuarios('a' * (MIN_CARACTERES - 1)), [])
+        self.assertEqual(buscar_usuarios('   '), [])
+
+    def test_vista_devuelve_campos_de_resultado(self):
+        respuesta = self.client.get(reverse('usuarios:buscar'), {'q': 'perez', 'modo': 'typeahead', 'limite': 'x'})
+        self.assertEqual(
+            [{campo: fila[campo] for campo in ('first_name', 'email', 'telefono')} for fila in respuesta.json()['resultados']],
+            [{'first_name': 'Luis', 'email': 'lperez@fabrica.invalid', 'telefono': None}],
+        )
+
+
+class ApiUsuariosTests(CatalogosTestCase):
+
+    USUARIOS = 5
+
+    def setUp(self):
+        self.client.force_login(self.catalogos.admin)
+
+    def test_recorre_las_paginas_con_el_cursor(self):
+        url = reverse('usuarios:api_usuarios') + '?orden=email&fields=first_name&limit=2'
+        emails, nombres = sorted(Usuario.objects.values_list('email', 'first_name')), []
+        while url:
+            datos = self.client.get(url).json()
+            # 'id' siempre va; el campo de orden solo si se pidió.
+            self.assertTrue(all(set(fila) == {'id', 'first_name'} for fila in datos['results']))
+            nombres += [fila['first_name'] for fila in datos['results']]
+            url = datos['next']
+        self.assertEqual(nombres, [nombre for _, nombre in emails])
+
+    def test_etag_y_304(self):
+        url = reverse('usuarios:api_usuarios')
+        respuesta = self.client.get(url, {'limit': 3})
+        etag = respuesta['ETag']
+        no_modificado = self.client.get(url, {'limit': 3}, headers={'If-None-Match': f'"otro", {etag}'})
+        self.assertEqual((no_modificado.status_code, no_modificado.content, no_modificado['ETag']), (304, b'', etag))
+
+        Usuario.objects.filter(email='usuario0@fabrica.invalid').update(first_name='Cambiado')
+        self.assertEqual(self.client.get(url, {'limit': 3}, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_parametros_invalidos(self):
+        url = reverse('usuarios:api_usuarios')
+        for parametros in ({'fields': 'email,clave'}, {'limit': 'x'}, {'cursor': 'alterado'}):
+            respuesta = self.client.get(url, parametros)
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertIn('error', respuesta.json())
+
+    def test_exige_administrador(self):
+        urls = [reverse(nombre) for nombre in ('usuarios:api_usuarios', 'usuarios:exportar', 'usuarios:buscar')]
+        self.client.logout()
+        for url in urls:
+            self.assertRedirects(self.client.get(url), f'{reverse("login")}?next={url}', fetch_redirect_response=False)
+        otro = Usuario.objects.filter(rol_usuario=self.catalogos.rol_usuario).first()
+        for url in urls:
+            # Un rol no autorizado cierra la sesión.
+            self.client.force_login(otro)
+            self.assertRedirects(self.client.get(url), reverse('login'), fetch_redirect_response=False)
+
+
+class ConexionFalsa:
+    """Lo que Pool usa de una conexión psycopg2: closed, info, rollback, cursor y close."""
+
+    def __init__(self, estado=TRANSACTION_STATUS_IDLE, falla_al_limpiar=False):
+        self.closed = 0
+        self.info = SimpleNamespace(transaction_status=estado)
+        self.autocommit = False
+        self.falla_al_limpiar = falla_al_limpiar
+        self.sentencias = []
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, sql):
+        if self.falla_al_limpiar:
+            raise Database.OperationalError('server closed the connection unexpectedly')
+        self.sentencias.append(sql)
+
+    def close(self):
+        self.closed = 1
+
+
+class PoolConexionesTests(SimpleTestCase):
+
+    def test_respeta_el_maximo_y_falla_al_agotarse(self):
+        pool = Pool('prueba', max_size=2, timeout=0.01)
+        primera, segunda = pool.tomar(ConexionFalsa), pool.tomar(ConexionFalsa)
+        with self.assertRaises(OperationalError):
+            pool.tomar(ConexionFalsa)
+        self.assertEqual(pool.estadisticas()['agotado'], 1)
+
+        pool.devolver(primera)
+        self.assertIs(pool.tomar(ConexionFalsa), primera)
+        self.assertEqual(pool.estadisticas()['creadas'], 2)
+
+    def test_reutiliza_la_ultima_devuelta_y_la_limpia(self):
+        pool = Pool('prueba', max_size=3)
+        conexiones = [pool.tomar(ConexionFalsa) for _ in range(3)]
+        conexiones[2].info.transaction_status = TRANSACTION_STATUS_INTRANS
+        for conexion in conexiones:
+            pool.devolver(conexion)
+        self.assertEqual((conexiones[2].rollbacks, conexiones[2].autocommit), (1, True))
+        self.assertEqual(conexiones[0].sentencias, ['DISCARD ALL'])
+        self.assertEqual([pool.tomar(ConexionFalsa) for _ in range(3)], conexiones[::-1])
+
+    def test_descarta_las_rotas(self):
+        pool = Pool('prueba', max_size=4)
+        rotas = [
+            ConexionFalsa(estado=TRANSACTION_STATUS_UNKNOWN),
+            ConexionFalsa(falla_al_limpiar=True),
+        ]
+        fabrica = iter(rotas + [ConexionFalsa(), ConexionFalsa()])
+        tomadas = [pool.tomar(lambda: next(fabrica)) for _ in range(4)]
+        for conexion in tomadas[:2]:
+            pool.devolver(conexion)
+        pool.devolver(tomadas[2], reutilizable=False)
+        self.assertTrue(all(conexion.closed for conexion in tomadas[:3]))
+
+        # Una libre que el servidor cerró, o que no pasa el chequeo, tampoco se entrega.
+        pool.devolver(tomadas[3])
+        tomadas[3].closed = 1
+        nueva = ConexionFalsa()
+        self.assertIs(pool.tomar(lambda: nueva, verificar=lambda conexion: True), nueva)
+        pool.devolver(nueva)
+        self.assertIsNot(pool.tomar(ConexionFalsa, verificar=lambda conexion: False), nueva)
+
+        estadisticas = pool.estadisticas()
+        self.assertEqual((estadisticas['descartadas'], estadisticas['en_uso'], estadisticas['libres']), (5, 1, 0))
+
+
+class InstrumentacionTests(TestCase):
+
+    def setUp(self):
+        instrumentacion.reiniciar()
+        self.addCleanup(instrumentacion.reiniciar)
+        self.addCleanup(self.desinstalar)
+
+    def desinstalar(self):
+        # El middleware deja el wrapper en la conexión y la señal conectada.
+        connection_created.disconnect(dispatch_uid='miAppUsuario.instrumentacion')
+        if instrumentacion._medir in connection.execute_wrappers:
+            connection.execute_wrappers.remove(instrumentacion._medir)
+
+    def vista(self, consultas):
+        def responder(request):
+            for _ in range(consultas):
+                Usuario.objects.filter(pk=0).exists()
+            return HttpResponse()
+        return responder
+
+    def pedir(self, middleware, url):
+        request = RequestFactory().get(url)
+        request.resolver_match = resolve(url)
+        return middleware(request)
+
+    def test_muestreo_cero_desactiva_el_middleware(self):
+        with override_settings(INSTRUMENTACION_MUESTREO=0):
+            with self.assertRaises(MiddlewareNotUsed):
+                instrumentacion.InstrumentacionMiddleware(self.vista(1))
+        self.assertNotIn(instrumentacion._medir, connection.execute_wrappers)
+
+    @override_settings(INSTRUMENTACION_MUESTREO=0.5, INSTRUMENTACION_UMBRAL_CONSULTAS=3)
+    def test_solo_mide_la_fraccion_muestreada(self):
+        middleware = instrumentacion.InstrumentacionMiddleware(self.vista(3))
+        with mock.patch('miAppUsuario.instrumentacion.random.random', side_effect=[0.7, 0.2, 0.4]), \
+                self.assertLogs('miAppUsuario.instrumentacion', 'WARNING') as logs:
+            for _ in range(3):
+                self.pedir(middleware, reverse('usuarios:home'))
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn('3 consultas (2 repetidas)', logs.output[0])
+
+        resumen = instrumentacion.resumen_vistas()
+        self.assertEqual([(fila['vista'], fila['muestras']) for fila in resumen], [('usuarios:home', 2)])
+        self.assertEqual((resumen[0]['consultas_p50'], resumen[0]['repetidas_max']), (3.0, 2))
+
+    @override_settings(INSTRUMENTACION_MUESTREO=1.0)
+    def test_resumen_ordenado_por_p95(self):
+        lenta = instrumentacion.InstrumentacionMiddleware(self.vista(0))
+        with mock.patch('miAppUsuario.instrumentacion.time.perf_counter', side_effect=[0.0, 0.5, 0.0, 0.0]):
+            self.pedir(lenta, reverse('usuarios:read'))
+            self.pedir(lenta, reverse('usuarios:home'))
+        self.pedir(lenta, reverse('usuarios:home'))
+        resumen = instrumentacion.resumen_vistas()
+        self.assertEqual([fila['vista'] for fila in resumen], ['usuarios:read', 'usuarios:home'])
+        self.assertEqual(resumen[0]['total_ms_p95'], 500.0)
+        self.assertEqual(resumen[1]['muestras'], 2)
+
+
+class RolCacheadoTests(MaxConsultasMixin, CatalogosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        fabricas.crear_usuarios(1, cls.catalogos, desde=1)
+
+    def setUp(self):
+        cache.clear()
+
+    def usuario(self):
+        # Sin select_related: el rol tiene que salir del cache.
+        return Usuario.objects.get(email='usuario1@fabrica.invalid')
+
+    def test_rol_se_consulta_una_vez(self):
+        self.assertEqual(rol_de(self.usuario()), self.catalogos.rol_usuario.nombre)
+        usuario = self.usuario()
+        with self.assertMaxConsultas(0):
+            self.assertEqual(rol_de(usuario), self.catalogos.rol_usuario.nombre)
+
+    def test_cambio_de_nombre_del_rol_invalida(self):
+        rol_de(self.usuario())
+        self.catalogos.rol_usuario.nombre = 'Renombrado'
+        self.catalogos.rol_usuario.save()
+        self.assertEqual(rol_de(self.usuario()), 'Renombrado')
+
+    def test_cambio_de_rol_del_usuario_invalida(self):
+        rol_de(self.usuario())
+        Usuario.objects.filter(email='usuario1@fabrica.invalid').update(rol_usuario=self.catalogos.rol_admin)
+        self.assertEqual(rol_de(self.usuario()), 'Administrador')
+
+
+class HistoricoUsuarioTests(MaxConsultasMixin, CatalogosTestCase):
+
+    USUARIOS = 3
+
+    def usuario(self):
+        return Usuario.objects.get(email='usuario1@fabrica.invalid')
+
+    def test_guardar_sin_cambios_no_registra(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario().save()
+        self.assertFalse(UsuarioHistorico.objects.exists())
+
+    def test_guardar_con_cambios_registra_el_estado_nuevo(self):
+        usuario = self.usuario()
+        usuario.first_name = 'Cambiado'
+        with self.captureOnCommitCallbacks(execute=True):
+            usuario.save()
+            usuario.save()
+        historico = UsuarioHistorico.objects.get()
+        self.assertEqual((historico.usuario_id, historico.first_name), (usuario.pk, 'Cambiado'))
+
+    def test_varios_guardados_en_una_transaccion_un_solo_insert(self):
+        usuarios = list(Usuario.objects.filter(email__startswith='usuario'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for usuario in usuarios:
+                    usuario.last_name = 'Nuevo'
+                    usuario.save()
+        with self.assertMaxConsultas(1):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(UsuarioHistorico.objects.count(), len(usuarios))
+
+    def test_savepoint_revertido_descarta_sus_historicos(self):
+        usuario = self.usuario()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    usuario.first_name = 'Revertido'
+                    usuario.save()
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+        self.assertFalse(UsuarioHistorico.objects.exists())
+
+    def test_actualizar_usuarios_solo_registra_cambios(self):
+        usuarios = list(Usuario.objects.filter(email__startswith='usuario').order_by('pk'))
+        usuarios[0].edad = 99
+        with self.captureOnCommitCallbacks(execute=True):
+            historial.actualizar_usuarios(usuarios, ['edad'])
+        self.assertEqual(list(UsuarioHistorico.objects.values_list('usuario_id', 'edad')), [(usuarios[0].pk, 99)])
+
+    def test_importacion_un_insert_de_historicos_por_chunk(self):
+        archivo = fabricas.csv_usuarios(5, self.catalogos, desde=100)
+        with self.captureOnCommitCallbacks() as callbacks:
+            ImportadorUsuarios(chunk_size=2, hash_workers=1).importar(LectorCSV(archivo, COLUMNAS_USUARIOS))
+        self.assertEqual(len(callbacks), 3)
+        with self.assertMaxConsultas(3):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(UsuarioHistorico.objects.count(), 5)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class HasheadorContraseñasTests(SimpleTestCase):
+
+    def test_pool_de_procesos(self):
+        contraseñas = [f'Clave.{i}' for i in range(6)]
+        with HasheadorContraseñas(workers=2) as hasheador:
+            hashes = hasheador.hashear(contraseñas)
+            self.assertIsNotNone(hasheador._pool)
+        self.assertEqual(hasheador.total, 6)
+        for contraseña, hash_contraseña in zip(contraseñas, hashes):
+            self.assertTrue(check_password(contraseña, hash_contraseña))
+            self.assertEqual(identify_hasher(hash_contraseña).algorithm, get_hasher().algorithm)
+
+    def test_cierra_el_pool_si_falla(self):
+        with self.assertRaises(ValueError):
+            with HasheadorContraseñas(workers=2) as hasheador:
+                hasheador.hashear(['a', 'b', 'c', 'd'])
+                pool = hasheador._pool
+                raise ValueError
+        self.assertIsNone(hasheador._pool)
+        with self.assertRaises(RuntimeError):
+            pool.submit(str)
+
+
+class ImportadorUsuariosTests(CatalogosTestCase):
+
+    USUARIOS = 1
+
+    def fila(self, numero, email, telefono=''):
+        return numero, {
+            'nombre': 'Nombre', 'apellido': 'Apellido', 'email': email, 'telefono': telefono, 'edad': '30',
+            'rol_id': self.catalogos.rol_usuario.pk, 'pais_id': self.catalogos.pais.pk,
+            'contraseña': fabricas.CONTRASEÑA,
+        }
+
+    def importar(self, filas, chunk_size=2, **kwargs):
+        return ImportadorUsuarios(chunk_size=chunk_size, hash_workers=1).importar(filas, **kwargs)
+
+    def test_un_callback_por_chunk_con_la_ultima_fila(self):
+        ultimas = []
+        resultado = self.importar(
+            [self.fila(i, f'nuevo{i}@fabrica.invalid') for i in range(2, 7)],
+            al_terminar_chunk=lambda resultado: ultimas.append((resultado.ultima_fila, resultado.creados)),
+        )
+        self.assertEqual(ultimas, [(3, 2), (5, 4), (6, 5)])
+        self.assertEqual((resultado.procesadas, resultado.creados, resultado.total_errores), (5, 5, 0))
+        self.assertTrue(Usuario.objects.get(email='nuevo2@fabrica.invalid').check_password(fabricas.CONTRASEÑA))
+
+    def test_duplicados_en_el_archivo_y_en_la_bd(self):
+        resultado = self.importar([
+            self.fila(2, 'uno@fabrica.invalid', '+56911111111'),
+            self.fila(3, 'Uno@fabrica.invalid'),
+            self.fila(4, 'usuario0@fabrica.invalid'),
+            # Mismo teléfono que la fila 2, en otro chunk: lo detecta la consulta a la BD.
+            self.fila(5, 'dos@fabrica.invalid', '+56911111111'),
+            self.fila(6, 'tres@fabrica.invalid', '+56900000000'),
+        ])
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual(
+            [(error.fila, error.codigo) for error in resultado.tomar_errores()],
+            [(3, ErrorImportacion.INTEGRIDAD), (4, ErrorImportacion.INTEGRIDAD),
+             (5, ErrorImportacion.INTEGRIDAD), (6, ErrorImportacion.INTEGRIDAD)],
+        )
+
+    def test_integrity_error_reintenta_fila_por_fila(self):
+        # Simula otro proceso que insertó el email después de la validación.
+        with mock.patch.object(ImportadorUsuarios, '_existentes', return_value=(set(), set())):
+            resultado = self.importar(
+                [self.fila(2, 'libre@fabrica.invalid'), self.fila(3, 'usuario0@fabrica.invalid')],
+            )
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual([(error.fila, error.valor) for error in resultado.tomar_errores()],
+                         [(3, 'usuario0@fabrica.invalid')])
+        self.assertTrue(Usuario.objects.filter(email='libre@fabrica.invalid').exists())
+
+
+class ValidadorUsuariosTests(CatalogosTestCase):
+
+    USUARIOS = 1
+
+    def fila(self, numero, email, **cambios):
+        row = {
+            'nombre': 'Nombre', 'apellido': 'Apellido', 'email': email, 'telefono': '', 'edad': '30',
+            'rol_id': str(self.catalogos.rol_usuario.pk), 'pais_id': str(self.catalogos.pais.pk),
+            'contraseña': fabricas.CONTRASEÑA,
+        }
+        row.update(cambios)
+        return numero, row
+
+    def codigos(self, validador, chunk):
+        return [(error.fila, error.codigo) for error in validador.validar_chunk(chunk)]
+
+    def test_un_codigo_por_regla(self):
+        validador = ValidadorUsuarios()
+        self.assertEqual(self.codigos(validador, [
+            self.fila(2, 'a@fabrica.invalid', rol_id='999'),
+            self.fila(3, 'b@fabrica.invalid', pais_id='1.5'),
+            self.fila(4, 'c@fabrica.invalid', edad='-1'),
+            self.fila(5, 'd@fabrica.invalid', contraseña='Corta1'),
+            self.fila(6, 'e@fabrica.invalid', contraseña='8245913706'),
+            self.fila(7, 'f@fabrica.invalid', contraseña='password123'),
+            self.fila(8, 'no-es-email'),
+            self.fila(9, 'usuario0@fabrica.invalid'),
+            self.fila(10, 'g@fabrica.invalid', telefono='+56900000000'),
+            # Solo el primer error de cada fila.
+            self.fila(11, 'no-es-email', rol_id='999'),
+            self.fila(12, 'h@fabrica.invalid'),
+        ]), [
+            (2, ErrorImportacion.ROL_INEXISTENTE),
+            (3, ErrorImportacion.PAIS_INEXISTENTE),
+            (4, ErrorImportacion.EDAD_INVALIDA),
+            (5, ErrorImportacion.CONTRASEÑA_CORTA),
+            (6, ErrorImportacion.CONTRASEÑA_NUMERICA),
+            (7, ErrorImportacion.CONTRASEÑA_COMUN),
+            (8, ErrorImportacion.EMAIL_INVALIDO),
+            (9, ErrorImportacion.EMAIL_EXISTENTE),
+            (10, ErrorImportacion.TELEFONO_EXISTENTE),
+            (11, ErrorImportacion.ROL_INEXISTENTE),
+        ])
+
+    def test_repetidos_dentro_del_chunk_y_entre_chunks(self):
+        validador = ValidadorUsuarios()
+        self.assertEqual(self.codigos(validador, [
+            self.fila(2, 'a@fabrica.invalid', telefono='+56911111111'),
+            self.fila(3, 'A@fabrica.invalid'),
+            # Una fila inválida no ocupa su email: la siguiente con el mismo sí pasa.
+            self.fila(4, 'b@fabrica.invalid', edad='x'),
+            self.fila(5, 'b@fabrica.invalid'),
+        ]), [(3, ErrorImportacion.EMAIL_REPETIDO), (4, ErrorImportacion.EDAD_INVALIDA)])
+        self.assertEqual(self.codigos(validador, [
+            self.fila(6, 'B@fabrica.invalid'),
+            self.fila(7, 'c@fabrica.invalid', telefono='+56911111111'),
+        ]), [(6, ErrorImportacion.EMAIL_REPETIDO), (7, ErrorImportacion.TELEFONO_REPETIDO)])
+
+    def test_numeros_de_excel_como_en_la_importacion(self):
+        # Excel entrega 5551234.0; la importación guarda '5551234'.
+        validador = ValidadorUsuarios()
+        self.assertEqual(self.codigos(validador, [
+            self.fila(2, 'a@fabrica.invalid', telefono=5551234.0, edad=30.0),
+            self.fila(3, 'b@fabrica.invalid', telefono='5551234'),
+        ]), [(3, ErrorImportacion.TELEFONO_REPETIDO)])
+
+    def test_recordar_marca_como_vistas_solo_las_validas(self):
+        validador = ValidadorUsuarios()
+        validador.recordar([self.fila(2, 'a@fabrica.invalid'), self.fila(3, 'b@fabrica.invalid')], invalidas={3})
+        self.assertEqual(self.codigos(validador, [
+            self.fila(4, 'a@fabrica.invalid'), self.fila(5, 'b@fabrica.invalid'),
+        ]), [(4, ErrorImportacion.EMAIL_REPETIDO)])
+
+
+class ExportacionTests(CatalogosTestCase):
+
+    USUARIOS = 25
+
+    def setUp(self):
+        self.client.force_login(self.catalogos.admin)
+
+    def exportar(self, **parametros):
+        respuesta = self.client.get(reverse('usuarios:exportar'), parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta, b''.join(respuesta.streaming_content)
+
+    def test_csv_con_filtros_y_orden_de_read(self):
+        respuesta, contenido = self.exportar(activo='0', orden='email', desc='on')
+        self.assertTrue(respuesta['Content-Type'].startswith('text/csv'))
+        self.assertRegex(respuesta['Content-Disposition'], r'attachment; filename="usuarios_[\d-]+\.csv"')
+        self.assertTrue(contenido.startswith('\ufeff'.encode()))
+
+        filas = list(csv.reader(io.StringIO(contenido.decode('utf-8-sig'))))
+        self.assertEqual(filas[0][:4], ['ID', 'Nombre', 'Apellido', 'Email'])
+        # crear_usuarios deja inactivos los múltiplos de 10.
+        self.assertEqual([fila[3] for fila in filas[1:]],
+                         ['usuario20@fabrica.invalid', 'usuario10@fabrica.invalid', 'usuario0@fabrica.invalid'])
+        usuario = Usuario.objects.get(email='usuario20@fabrica.invalid')
+        self.assertEqual(filas[1], [
+            str(usuario.pk), 'Nombre20', 'Apellido20', usuario.email, usuario.telefono, str(usuario.edad),
+            'Administrador', self.catalogos.pais.nombre, 'False', str(usuario.fecha_creacion),
+        ])
+
+    def test_xlsx_con_las_mismas_filas(self):
+        respuesta, contenido = self.exportar(formato='xlsx', activo='0', orden='email')
+        self.assertRegex(respuesta['Content-Disposition'], r'\.xlsx"$')
+        hoja = load_workbook(io.BytesIO(contenido), read_only=True).active
+        filas = list(hoja.iter_rows(values_only=True))
+        self.assertEqual(len(filas), 4)
+        self.assertEqual([fila[3] for fila in filas[1:]],
+                         ['usuario0@fabrica.invalid', 'usuario10@fabrica.invalid', 'usuario20@fabrica.invalid'])
+        # Sin zona horaria: openpyxl no la admite.
+        self.assertIsNone(filas[1][9].tzinfo)
+
+
+class LectoresTests(SimpleTestCase):
+
+    def leer_csv(self, contenido, columnas=('a', 'b')):
+        return list(LectorCSV(io.BytesIO(contenido.encode('utf-8-sig')), columnas))
+
+    def test_lector_filas_es_abstracto(self):
+        with self.assertRaises(TypeError):
+            LectorFilas(io.BytesIO(), ['a'])
+
+    def test_csv_detecta_punto_y_coma_y_coma(self):
+        esperado = [(2, {'a': '1', 'b': '2'})]
+        self.assertEqual(self.leer_csv('a;b\n1;2\n'), esperado)
+        self.assertEqual(self.leer_csv('a,b\n1,2\n'), esperado)
+
+    def test_csv_numera_por_linea_aunque_haya_celdas_multilinea(self):
+        filas = self.leer_csv('a,b\n1,"linea uno\nlinea dos"\n,\n3,4\n')
+        # La fila vacía (línea 4) se salta, pero la numeración sigue al archivo.
+        self.assertEqual([numero for numero, _ in filas], [2, 5])
+        self.assertEqual(filas[0][1]['b'], 'linea uno\nlinea dos')
+
+    def test_columnas_faltantes(self):
+        with self.assertRaises(ArchivoInvalido):
+            self.leer_csv('a,c\n1,2\n')
+        with self.assertRaises(ArchivoInvalido):
+            self.leer_csv('')
+
+    def test_excel_numera_como_excel_y_limpia_celdas(self):
+        libro = Workbook()
+        hoja = libro.active
+        for fila in (['b', 'a', 'extra'], [' x ', None, 1], [None, None, None], [2, 'y', None]):
+            hoja.append(fila)
+        archivo = io.BytesIO()
+        libro.save(archivo)
+        archivo.seek(0)
+        lector = LectorExcel(archivo, ['a', 'b'], chunk_size=1)
+        self.assertEqual(list(lector.chunks()), [[(2, {'a': '', 'b': 'x'})], [(4, {'a': 'y', 'b': 2})]])
+        self.assertEqual(lector.total_filas, 3)
+
+
+class ErroresImportacionTests(MaxConsultasMixin, CatalogosTestCase):
+
+    def auditoria(self):
+        return Auditoria.objects.create(filename='usuarios.csv', status=Auditoria.STATUS_VALIDATING)
+
+    def test_validacion_guarda_codigo_columna_y_valor(self):
+        rol, pais = self.catalogos.rol_usuario.pk, self.catalogos.pais.pk
+        filas = [
+            ['nombre', 'apellido', 'email', 'telefono', 'edad', 'rol_id', 'pais_id', 'contraseña'],
+            ['Ana', 'Uno', 'ana@fabrica.invalid', '', 30, 999, pais, fabricas.CONTRASEÑA],
+            ['Bea', 'Dos', 'no-es-email', '', 30, rol, pais, fabricas.CONTRASEÑA],
+            ['Cata', 'Tres', 'cata@fabrica.invalid', '', 30, rol, pais, 'abc'],
+            ['Dani', 'Cuatro', 'dani@fabrica.invalid', '', 30, rol, pais, fabricas.CONTRASEÑA],
+        ]
+        contenido = '\n'.join(','.join(str(valor) for valor in fila) for fila in filas)
+        auditoria = self.auditoria()
+        trabajos.procesar(auditoria, io.BytesIO(contenido.encode()))
+
+        auditoria.refresh_from_db()
+        self.assertEqual((auditoria.status, auditoria.error_count), (Auditoria.STATUS_VALIDATED, 3))
+        self.assertEqual(
+            list(auditoria.errores.values_list('fila', 'codigo', 'columna', 'valor')),
+            [
+                (2, ErrorImportacion.ROL_INEXISTENTE, 'rol_id', '999'),
+                (3, ErrorImportacion.EMAIL_INVALIDO, 'email', 'no-es-email'),
+                # La contraseña nunca queda guardada en el error.
+                (4, ErrorImportacion.CONTRASEÑA_CORTA, 'contraseña', ''),
+            ],
+        )
+        self.assertEqual(str(auditoria.errores.first()), 'Fila 2: El Rol con ID 999 no existe.')
+
+    def test_archivo_invalido_queda_como_error_sin_fila(self):
+        auditoria = self.auditoria()
+        trabajos.procesar(auditoria, io.BytesIO(b'columna_rara\n1\n'))
+        error = auditoria.errores.get()
+        self.assertEqual((error.fila, error.codigo), (0, ErrorImportacion.ARCHIVO_INVALIDO))
+        self.assertEqual(Auditoria.objects.get(pk=auditoria.pk).status, Auditoria.STATUS_FAILED)
+
+    def test_vista_errores_paginada_y_filtrable(self):
+        auditoria = self.auditoria()
+        ErrorImportacion.objects.bulk_create(
+            ErrorImportacion(
+                auditoria=auditoria, fila=fila, columna='email', valor=f'x{fila}',
+                codigo=ErrorImportacion.EMAIL_INVALIDO if fila % 2 else ErrorImportacion.EMAIL_EXISTENTE,
+            )
+            for fila in range(1, 121)
+        )
+        url = reverse('usuarios:importacion_errores', args=[auditoria.pk])
+        cache.clear()
+        self.client.get(url)
+        with self.assertMaxConsultas(3):
+            respuesta = self.client.get(url, {'codigo': ErrorImportacion.EMAIL_INVALIDO})
+        pagina = respuesta.context['errores']
+        self.assertEqual(len(pagina), 50)
+        self.assertTrue(all(error.codigo == ErrorImportacion.EMAIL_INVALIDO for error in pagina))
+
+        siguiente = self.client.get(url + respuesta.context['url_siguiente'])
+        self.assertEqual([error.fila for error in siguiente.context['errores']][:2], [101, 103])
+        self.assertIsNone(siguiente.context['url_siguiente'])
+
+
+class CaidaDelWorker(BaseException):
+    """Simula un worker que muere: no la atrapa el except Exception de procesar()."""
+
+
+@override_settings(
+    IMPORTACION_CHUNK_SIZE=2, IMPORTACION_HASH_WORKERS=1,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class ReanudacionImportacionTests(CatalogosTestCase):
+
+    def subir(self, cantidad=5):
+        archivo = fabricas.csv_usuarios(cantidad, self.catalogos, desde=200)
+        return trabajos.encolar_importacion(SimpleUploadedFile('usuarios.csv', archivo.read()))
+
+    def validar_y_confirmar(self):
+        auditoria = self.subir()
+        trabajos.procesar(trabajos.tomar_siguiente())
+        trabajos.confirmar_importacion(auditoria.pk)
+        return trabajos.tomar_siguiente()
+
+    def test_reanuda_desde_el_ultimo_chunk_confirmado(self):
+        auditoria = self.validar_y_confirmar()
+        guardar = ImportadorUsuarios._guardar
+        llamadas = []
+
+        def guardar_y_caer(importador, pendientes, resultado):
+            llamadas.append(len(pendientes))
+            if len(llamadas) == 2:
+                raise CaidaDelWorker
+            guardar(importador, pendientes, resultado)
+
+        with mock.patch.object(ImportadorUsuarios, '_guardar', guardar_y_caer):
+            with self.assertRaises(CaidaDelWorker):
+                trabajos.procesar(auditoria)
+
+        auditoria.refresh_from_db()
+        self.assertEqual((auditoria.status, auditoria.fila_confirmada, auditoria.imported_count),
+                         (Auditoria.STATUS_IMPORTING, 3, 2))
+        # Con el latido fresco nadie lo retoma; vencido, sí.
+        self.assertIsNone(trabajos.tomar_siguiente())
+        Auditoria.objects.filter(pk=auditoria.pk).update(latido=timezone.now() - timedelta(hours=1))
+        retomada = trabajos.tomar_siguiente()
+        self.assertEqual(retomada.pk, auditoria.pk)
+
+        resultado = trabajos.procesar(retomada)
+        # Solo se hashean (y escriben) las 3 filas que faltaban.
+        self.assertEqual(resultado.contraseñas_hasheadas, 3)
+        retomada.refresh_from_db()
+        self.assertEqual((retomada.status, retomada.imported_count, retomada.row_count),
+                         (Auditoria.STATUS_IMPORTED, 5, 5))
+        # El rendimiento del hasheo se acumula entre reanudaciones y llega a la página.
+        self.assertEqual(retomada.hashes_calculados, 5)
+        self.assertGreater(retomada.hashes_por_segundo, 0)
+        estado = self.client.get(reverse('usuarios:importacion_estado', args=[retomada.pk])).json()
+        self.assertEqual(estado['hashes_por_segundo'], round(retomada.hashes_por_segundo))
+        self.assertEqual(Usuario.objects.filter(email__startswith='importado').count(), 5)
+
+    def test_archivo_identico_no_se_vuelve_a_encolar(self):
+        auditoria = self.subir()
+        with self.assertRaises(trabajos.ArchivoDuplicado) as contexto:
+            self.subir()
+        self.assertEqual(contexto.exception.auditoria.pk, auditoria.pk)
+
+        trabajos.cancelar_importacion(auditoria.pk)
+        self.assertNotEqual(self.subir().pk, auditoria.pk)
+
+
+@override_settings(IMPORTACION_TAMANO_PARTE=64)
+class SubidaPorPartesTests(CatalogosTestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        medios = override_settings(MEDIA_ROOT=directorio.name)
+        medios.enable()
+        self.addCleanup(medios.disable)
+        self.contenido = fabricas.csv_usuarios(5, self.catalogos, desde=300).read()
+
+    def iniciar(self):
+        respuesta = self.client.post(
+            reverse('usuarios:subida_iniciar'),
+            {'nombre': 'usuarios.csv', 'tamano': len(self.contenido)}, content_type='application/json',
+        )
+        self.assertEqual(respuesta.status_code, 201)
+        return respuesta.json()
+
+    def subir_parte(self, subida, numero):
+        inicio = (numero - 1) * subida['tamano_parte']
+        return self.client.put(
+            reverse('usuarios:subida_parte', args=[subida['id'], numero]),
+            self.contenido[inicio:inicio + subida['tamano_parte']], content_type='application/octet-stream',
+        )
+
+    def test_partes_en_cualquier_orden_y_reanudacion(self):
+        subida = self.iniciar()
+        partes = list(range(1, subida['partes_totales'] + 1))
+        self.assertGreater(len(partes), 2)
+        for numero in reversed(partes[1:]):
+            self.assertEqual(self.subir_parte(subida, numero).status_code, 200)
+
+        # Falta la primera: no se puede completar y el estado dice qué reenviar.
+        completar = reverse('usuarios:subida_completar', args=[subida['id']])
+        self.assertEqual(self.client.post(completar).status_code, 409)
+        estado = self.client.get(reverse('usuarios:subida_estado', args=[subida['id']])).json()
+        self.assertEqual(estado['partes_recibidas'], partes[1:])
+
+        self.subir_parte(subida, 1)
+        respuesta = self.client.post(completar)
+        self.assertEqual(respuesta.status_code, 200)
+        auditoria = Auditoria.objects.get(pk=respuesta.json()['auditoria'])
+        self.assertEqual(auditoria.status, Auditoria.STATUS_PENDING)
+        with auditoria.file.open('rb') as archivo:
+            self.assertEqual(archivo.read(), self.contenido)
+            self.assertEqual(auditoria.hash_archivo, trabajos.calcular_hash(archivo))
+
+        trabajos.procesar(trabajos.tomar_siguiente())
+        auditoria.refresh_from_db()
+        self.assertEqual((auditoria.status, auditoria.filas_validas), (Auditoria.STATUS_VALIDATED, 5))
+
+    def test_parte_con_tamano_incorrecto(self):
+        subida = self.iniciar()
+        respuesta = self.client.put(
+            reverse('usuarios:subida_parte', args=[subida['id'], 1]), b'corta', content_type='application/octet-stream',
+        )
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_archivo_duplicado_devuelve_la_importacion_existente(self):
+        existente = trabajos.encolar_importacion(SimpleUploadedFile('usuarios.csv', self.contenido))
+        subida = self.iniciar()
+        for numero in range(1, subida['partes_totales'] + 1):
+            self.subir_parte(subida, numero)
+        respuesta = self.client.post(reverse('usuarios:subida_completar', args=[subida['id']]))
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['auditoria'], existente.pk)
+        self.assertEqual(SubidaArchivo.objects.get(pk=subida['id']).estado, SubidaArchivo.ESTADO_ABORTADA)
+
+
+class ParticionesTests(TestCase):
+
+    def test_sumar_meses_cruza_anios(self):
+        self.assertEqual(particiones.sumar_meses(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(particiones.sumar_meses(date(2024, 1, 1), -13), date(2022, 12, 1))
+
+    @skipUnless(connection.vendor == 'postgresql', 'Las particiones solo existen en PostgreSQL.')
+    def test_eliminar_particion_suelta_las_subidas(self):
+        mes = particiones.sumar_meses(particiones.mes_actual(), -120)
+        tabla = Auditoria._meta.db_table
+        with connection.cursor() as cursor:
+            nombre = particiones.crear_particion(cursor, tabla, 'uploaded_at', mes)
+        momento = datetime.fromisoformat(f'{mes.isoformat()}T00:00:00+00:00')
+        auditoria = Auditoria.objects.create(filename='viejo.csv', uploaded_at=momento)
+        subida = SubidaArchivo.objects.create(
+            filename='viejo.csv', tamano=1, tamano_parte=1, nombre_guardado='viejo.csv', auditoria=auditoria,
+        )
+        with connection.cursor() as cursor:
+            particiones.eliminar_particion(cursor, tabla, nombre, particiones.REFERENCIAS[Auditoria])
+        subida.refresh_from_db()
+        self.assertIsNone(subida.auditoria_id)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Las particiones solo existen en PostgreSQL.')
+    def test_particiones_del_mes_actual_y_futuras(self):
+        particiones.mantener(2, informar=lambda mensaje: None)
+        actual = particiones.mes_actual()
+        modelos = [modelo for modelo, _, _ in particiones.TABLAS_PARTICIONADAS] + [
+            dependiente for dependientes in particiones.DEPENDIENTES.values() for dependiente, _ in dependientes
+        ]
+        for modelo in modelos:
+            with connection.cursor() as cursor:
+                existentes = particiones.particiones(cursor, modelo._meta.db_table)
+            for i in range(3):
+                self.assertIn(particiones.sumar_meses(actual, i), existentes)
+
+        # Los ids los sigue asignando la secuencia aunque la PK sea (id, fecha).
+        catalogos = fabricas.crear_catalogos()
+        fabricas.crear_usuarios(1, catalogos)
+        usuario = Usuario.objects.get(email='usuario0@fabrica.invalid')
+        self.assertIsNotNone(UsuarioHistorico.objects.create(
+            usuario=usuario, **{campo: getattr(usuario, campo) for campo in ('first_name', 'last_name', 'email')}
+        ).pk)
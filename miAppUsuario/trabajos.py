@@ -0,0 +1,290 @@
+# miAppUsuario/trabajos.py
+
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from . import almacenamiento
+from .models import Auditoria, ErrorImportacion
+from .importacion import ImportadorUsuarios, COLUMNAS_USUARIOS
+from .lectores import abrir_lector, ArchivoInvalido
+from .validacion import ValidadorUsuarios
+from miAppCalificacion.importacion import (
+    ImportadorCalificaciones, ImportadorTasas, COLUMNAS_CALIFICACIONES, COLUMNAS_TASAS
+)
+
+logger = logging.getLogger(__name__)
+
+LOTE_ERRORES = 1000
+
+# Columnas esperadas y cómo construir el importador de cada Auditoria.tipo.
+# Solo las cargas de usuarios pasan por la validación en seco y la confirmación.
+IMPORTADORES = {
+    Auditoria.TIPO_USUARIOS: (COLUMNAS_USUARIOS, lambda auditoria: ImportadorUsuarios()),
+    Auditoria.TIPO_TASAS: (COLUMNAS_TASAS, lambda auditoria: ImportadorTasas()),
+    Auditoria.TIPO_CALIFICACIONES: (
+        COLUMNAS_CALIFICACIONES, lambda auditoria: ImportadorCalificaciones(auditoria.subido_por)
+    ),
+}
+
+
+class ArchivoDuplicado(Exception):
+    """El mismo archivo (mismo SHA-256) ya tiene una importación vigente del mismo tipo."""
+
+    def __init__(self, auditoria):
+        super().__init__(f'El archivo ya fue cargado en la importación #{auditoria.pk}.')
+        self.auditoria = auditoria
+
+
+def calcular_hash(archivo):
+    """SHA-256 hexadecimal del contenido, leído por partes; deja el archivo al inicio."""
+    sha = hashlib.sha256()
+    archivo.seek(0)
+    for parte in iter(lambda: archivo.read(1024 * 1024), b''):
+        sha.update(parte)
+    archivo.seek(0)
+    return sha.hexdigest()
+
+
+def _verificar_duplicado(hash_archivo, tipo):
+    """Lanza ArchivoDuplicado si hay otra importación vigente del mismo contenido y tipo."""
+    existente = (
+        Auditoria.objects.filter(hash_archivo=hash_archivo, tipo=tipo)
+        .exclude(status__in=[Auditoria.STATUS_CANCELLED, Auditoria.STATUS_FAILED])
+        .first()
+    )
+    if existente is not None:
+        raise ArchivoDuplicado(existente)
+
+
+def encolar_importacion(archivo, usuario=None, tipo=Auditoria.TIPO_USUARIOS):
+    """
+    Guarda el archivo subido en Auditoria.file y deja el trabajo PENDING.
+    Lanza ArchivoDuplicado si el mismo contenido ya se está importando o se
+    importó (las canceladas o fallidas no cuentan).
+    """
+    hash_archivo = calcular_hash(archivo)
+    _verificar_duplicado(hash_archivo, tipo)
+    return Auditoria.objects.create(
+        file=archivo,
+        filename=archivo.name,
+        hash_archivo=hash_archivo,
+        tipo=tipo,
+        subido_por=usuario if usuario is not None and usuario.is_authenticated else None,
+        status=Auditoria.STATUS_PENDING,
+    )
+
+
+def encolar_guardado(nombre_guardado, filename, hash_archivo, usuario=None, tipo=Auditoria.TIPO_USUARIOS):
+    """
+    Como encolar_importacion, para un archivo que ya está en el storage de
+    importaciones (subidas por partes): no se copia, solo se referencia.
+    """
+    _verificar_duplicado(hash_archivo, tipo)
+    return Auditoria.objects.create(
+        file=nombre_guardado,
+        filename=filename,
+        hash_archivo=hash_archivo,
+        tipo=tipo,
+        subido_por=usuario if usuario is not None and usuario.is_authenticated else None,
+        status=Auditoria.STATUS_PENDING,
+    )
+
+
+def confirmar_importacion(auditoria_id):
+    """Marca un trabajo VALIDATED para que el worker importe sus filas válidas."""
+    return Auditoria.objects.filter(
+        pk=auditoria_id, status=Auditoria.STATUS_VALIDATED, confirmada=False
+    ).update(confirmada=True)
+
+
+def cancelar_importacion(auditoria_id):
+    return Auditoria.objects.filter(
+        pk=auditoria_id, status__in=[Auditoria.STATUS_PENDING, Auditoria.STATUS_VALIDATED]
+    ).update(status=Auditoria.STATUS_CANCELLED, finished_at=Now())
+
+
+def tomar_siguiente():
+    """
+    Reserva el trabajo más antiguo que tenga algo por hacer: los PENDING de
+    usuarios pasan a VALIDATING, y los de otros tipos y los VALIDATED ya
+    confirmados pasan a IMPORTING. Con
+    skip_locked varios workers pueden sondear la tabla a la vez sin tomar
+    el mismo trabajo.
+
+    También retoma los VALIDATING/IMPORTING cuyo latido tiene más de
+    IMPORTACION_LATIDO_MAXIMO segundos (el worker murió): siguen en su fase
+    y procesar() continúa desde fila_confirmada.
+    """
+    abandonado = timezone.now() - timedelta(seconds=settings.IMPORTACION_LATIDO_MAXIMO)
+    with transaction.atomic():
+        auditoria = (
+            Auditoria.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Auditoria.STATUS_PENDING)
+                | Q(status=Auditoria.STATUS_VALIDATED, confirmada=True)
+                # Las de comandos de consola no tienen archivo guardado: no se retoman.
+                | (
+                    Q(status__in=[Auditoria.STATUS_VALIDATING, Auditoria.STATUS_IMPORTING], latido__lt=abandonado)
+                    & Q(file__isnull=False) & ~Q(file='')
+                )
+            )
+            .order_by('uploaded_at', 'pk')
+            .first()
+        )
+        if auditoria is None:
+            return None
+        if auditoria.status == Auditoria.STATUS_PENDING and auditoria.tipo == Auditoria.TIPO_USUARIOS:
+            auditoria.status = Auditoria.STATUS_VALIDATING
+        elif auditoria.status in (Auditoria.STATUS_PENDING, Auditoria.STATUS_VALIDATED):
+            auditoria.status = Auditoria.STATUS_IMPORTING
+        elif auditoria.fila_confirmada:
+            logger.warning('Reanudando importación %s desde la fila %s', auditoria.pk, auditoria.fila_confirmada)
+        auditoria.latido = timezone.now()
+        auditoria.save(update_fields=['status', 'latido'])
+    return auditoria
+
+
+def _guardar_errores(auditoria, errores):
+    """Un INSERT por lote de ErrorImportacion; el progreso se actualiza aparte."""
+    for error in errores:
+        error.auditoria_id = auditoria.pk
+        error.uploaded_at = auditoria.uploaded_at
+    ErrorImportacion.objects.bulk_create(errores, batch_size=LOTE_ERRORES)
+
+
+def _fallar(auditoria, codigo, detalle):
+    with transaction.atomic():
+        _guardar_errores(auditoria, [ErrorImportacion.de_fila(0, codigo, detalle=detalle)])
+        Auditoria.objects.filter(pk=auditoria.pk).update(
+            status=Auditoria.STATUS_FAILED,
+            error_count=F('error_count') + 1,
+            finished_at=Now(),
+        )
+
+
+def procesar(auditoria, archivo=None):
+    """
+    Ejecuta la fase que corresponda a un trabajo reservado con tomar_siguiente().
+    Devuelve el ResultadoImportacion al importar, o None al validar o si el
+    trabajo falló. `archivo` permite pasar un archivo ya abierto en vez de
+    auditoria.file (comandos de consola); auditoria.file se lee del storage
+    como flujo, sin descargarlo entero (miAppUsuario.almacenamiento).
+    """
+    columnas, _ = IMPORTADORES[auditoria.tipo]
+    try:
+        if archivo is None:
+            archivo = almacenamiento.abrir(auditoria.file.name)
+        with archivo:
+            if auditoria.fila_confirmada and auditoria.hash_archivo:
+                # Reanudación: el punto de control solo vale para el mismo contenido.
+                if calcular_hash(archivo) != auditoria.hash_archivo:
+                    raise ArchivoInvalido('El archivo cambió desde el último chunk confirmado; no se puede reanudar.')
+            lector = abrir_lector(archivo, auditoria.filename, columnas)
+            if auditoria.status == Auditoria.STATUS_VALIDATING:
+                return _validar(auditoria, lector)
+            return _importar(auditoria, lector)
+    except ArchivoInvalido as e:
+        _fallar(auditoria, ErrorImportacion.ARCHIVO_INVALIDO, str(e))
+    except Exception as e:
+        logger.exception('Importación %s falló', auditoria.pk)
+        _fallar(auditoria, ErrorImportacion.ERROR_INTERNO, str(e))
+
+
+def _validar(auditoria, lector):
+    """
+    Fase 1: valida todo el archivo sin escribir usuarios y deja el trabajo
+    VALIDATED. Cada chunk guarda sus errores y el punto de control en una
+    sola transacción; al reanudar, las filas ya confirmadas no se validan
+    de nuevo, solo se recuerdan sus emails/teléfonos para los duplicados.
+    """
+    validador = ValidadorUsuarios()
+    desde = auditoria.fila_confirmada
+    filas = 0
+    validas = auditoria.filas_validas if desde else 0
+    invalidas = list(auditoria.errores.filter(fila__gt=0).values_list('fila', flat=True)) if desde else []
+
+    for chunk in lector.chunks():
+        filas += len(chunk)
+        confirmadas = [fila for fila in chunk if fila[0] <= desde]
+        if confirmadas:
+            validador.recordar(confirmadas, set(invalidas))
+            chunk = chunk[len(confirmadas):]
+            if not chunk:
+                continue
+        errores = validador.validar_chunk(chunk)
+        validas += len(chunk) - len(errores)
+        invalidas.extend(error.fila for error in errores)
+        with transaction.atomic():
+            _guardar_errores(auditoria, errores)
+            Auditoria.objects.filter(pk=auditoria.pk).update(
+                row_count=max(lector.total_filas or 0, filas),
+                filas_validas=validas,
+                error_count=len(invalidas),
+                fila_confirmada=chunk[-1][0],
+                latido=Now(),
+            )
+
+    Auditoria.objects.filter(pk=auditoria.pk).update(
+        status=Auditoria.STATUS_VALIDATED,
+        row_count=filas,
+        filas_invalidas=invalidas,
+        # La importación tiene su propio punto de control.
+        fila_confirmada=0,
+    )
+
+
+def _importar(auditoria, lector):
+    """
+    Fase 2: importa en bloque solo las filas que pasaron la validación. El
+    importador llama a `reportar` dentro de la transacción de cada chunk, así
+    las filas escritas, sus errores, los contadores y fila_confirmada se
+    confirman juntos. Al reanudar se saltan las filas hasta fila_confirmada:
+    no se vuelven a hashear contraseñas ni a escribir filas ya guardadas.
+    """
+    _, crear_importador = IMPORTADORES[auditoria.tipo]
+    importador = crear_importador(auditoria)
+    invalidas = set(auditoria.filas_invalidas)
+    desde = auditoria.fila_confirmada
+    creados_previos = auditoria.imported_count if desde else 0
+    actualizados_previos = auditoria.updated_count if desde else 0
+    errores_previos = auditoria.error_count
+    hashes_previos = auditoria.hashes_calculados if desde else 0
+    segundos_previos = auditoria.segundos_hash if desde else 0.0
+    leidas = 0
+
+    def reportar(resultado):
+        _guardar_errores(auditoria, resultado.tomar_errores())
+        Auditoria.objects.filter(pk=auditoria.pk).update(
+            # Sin validación previa (p. ej. tasas) el total se conoce recién al leer.
+            row_count=max(auditoria.row_count, lector.total_filas or 0, leidas),
+            imported_count=creados_previos + resultado.creados,
+            updated_count=actualizados_previos + resultado.actualizados,
+            error_count=errores_previos + resultado.total_errores,
+            hashes_calculados=hashes_previos + resultado.contraseñas_hasheadas,
+            segundos_hash=segundos_previos + resultado.segundos_hash,
+            fila_confirmada=resultado.ultima_fila,
+            latido=Now(),
+        )
+
+    def pendientes():
+        nonlocal leidas
+        for numero_fila, row in lector:
+            leidas += 1
+            if numero_fila > desde and numero_fila not in invalidas:
+                yield numero_fila, row
+
+    resultado = importador.importar(pendientes(), al_terminar_chunk=reportar)
+
+    Auditoria.objects.filter(pk=auditoria.pk).update(
+        status=Auditoria.STATUS_IMPORTED,
+        row_count=leidas,
+        finished_at=Now(),
+    )
+    return resultado
@@ -7,6 +7,20 @@ urlpatterns = [
     path('home/', views.home, name='home'),
     path('crear/', views.create, name='create'),
     path('ver/', views.read, name='read'),
+    path('buscar/', views.buscar, name='buscar'),
+    path('exportar/', views.exportar, name='exportar'),
+    path('api/usuarios/', views.api_usuarios, name='api_usuarios'),
     path('editar/<int:pk>/', views.edit, name='edit'), 
     path('eliminar/<int:pk>/', views.delete, name='delete'),
+    path('importaciones/<int:pk>/', views.importacion, name='importacion'),
+    path('importaciones/<int:pk>/estado/', views.importacion_estado, name='importacion_estado'),
+    path('importaciones/<int:pk>/errores/', views.importacion_errores, name='importacion_errores'),
+    path('importaciones/<int:pk>/confirmar/', views.importacion_confirmar, name='importacion_confirmar'),
+    path('importaciones/<int:pk>/cancelar/', views.importacion_cancelar, name='importacion_cancelar'),
+    path('subidas/', views.subida_iniciar, name='subida_iniciar'),
+    path('subidas/<uuid:pk>/', views.subida_estado, name='subida_estado'),
+    path('subidas/<uuid:pk>/partes/<int:numero>/', views.subida_parte, name='subida_parte'),
+    path('subidas/<uuid:pk>/completar/', views.subida_completar, name='subida_completar'),
+    path('sistema/conexiones/', views.estado_conexiones, name='estado_conexiones'),
+    path('sistema/rendimiento/', views.rendimiento, name='rendimiento'),
 ]
\ No newline at end of file
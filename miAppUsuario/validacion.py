@@ -0,0 +1,154 @@
+# miAppUsuario/validacion.py
+
+import pandas as pd
+from django.contrib.auth import password_validation
+
+from .models import Usuario, Rol, ErrorImportacion
+from .lectores import a_texto
+from miAppCalificacion.models import Pais
+
+# Mismo criterio (simplificado) que EmailValidator: algo@dominio.tld
+PATRON_EMAIL = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+
+def _politica_contraseñas():
+    """Extrae de AUTH_PASSWORD_VALIDATORS las reglas que se pueden vectorizar."""
+    min_length = None
+    solo_numeros = False
+    comunes = None
+    for validador in password_validation.get_default_password_validators():
+        if isinstance(validador, password_validation.MinimumLengthValidator):
+            min_length = validador.min_length
+        elif isinstance(validador, password_validation.NumericPasswordValidator):
+            solo_numeros = True
+        elif isinstance(validador, password_validation.CommonPasswordValidator):
+            comunes = validador.passwords
+    return min_length, solo_numeros, comunes
+
+
+def _ids(serie):
+    """Convierte una columna de ids a Int64; lo que no sea entero queda como <NA>."""
+    numeros = pd.to_numeric(serie.replace('', pd.NA), errors='coerce')
+    enteros = numeros.where(numeros == numeros.round())
+    return enteros.astype('Int64')
+
+
+class ValidadorUsuarios:
+    """
+    Validación en seco (sin escribir) de una carga masiva de usuarios. Cada
+    chunk del LectorFilas se convierte en un DataFrame y todas las reglas se
+    evalúan como operaciones vectorizadas sobre columnas.
+
+    Mantiene entre chunks los emails/teléfonos ya vistos para detectar
+    duplicados dentro del archivo.
+    """
+
+    def __init__(self):
+        self.roles_validos = set(Rol.objects.values_list('pk', flat=True))
+        self.paises_validos = set(Pais.objects.values_list('pk', flat=True))
+        self.min_length, self.solo_numeros, self.comunes = _politica_contraseñas()
+        self.emails_vistos = set()
+        self.telefonos_vistos = set()
+
+    def validar_chunk(self, chunk):
+        """
+        `chunk` es una lista de (numero_fila, dict). Devuelve una lista de
+        ErrorImportacion (sin guardar) con el primer error de cada fila inválida.
+        """
+        if not chunk:
+            return []
+        df = dataframe_de_texto(chunk)
+        # Índice en `reglas` del primer error de cada fila.
+        errores = pd.Series(pd.NA, index=df.index, dtype=object)
+        reglas = []
+
+        def marcar(mascara, codigo, columna, con_valor=True, **parametros):
+            mascara = mascara.fillna(False).astype(bool) & errores.isna()
+            if mascara.any():
+                errores[mascara] = len(reglas)
+            reglas.append((codigo, columna, con_valor, parametros))
+
+        rol_ids = _ids(df['rol_id'])
+        marcar(~rol_ids.isin(self.roles_validos), ErrorImportacion.ROL_INEXISTENTE, 'rol_id')
+
+        pais_ids = _ids(df['pais_id'])
+        marcar(~pais_ids.isin(self.paises_validos), ErrorImportacion.PAIS_INEXISTENTE, 'pais_id')
+
+        edades = pd.to_numeric(df['edad'].replace('', pd.NA), errors='coerce')
+        marcar((df['edad'] != '') & ~((edades >= 0) & (edades == edades.round())),
+               ErrorImportacion.EDAD_INVALIDA, 'edad')
+
+        # El valor de la contraseña nunca se guarda en el error.
+        contraseñas = df['contraseña']
+        if self.min_length:
+            marcar(contraseñas.str.len() < self.min_length,
+                   ErrorImportacion.CONTRASEÑA_CORTA, 'contraseña', con_valor=False, minimo=self.min_length)
+        if self.solo_numeros:
+            marcar(contraseñas.str.isdigit(), ErrorImportacion.CONTRASEÑA_NUMERICA, 'contraseña', con_valor=False)
+        if self.comunes:
+            marcar(contraseñas.str.lower().isin(self.comunes),
+                   ErrorImportacion.CONTRASEÑA_COMUN, 'contraseña', con_valor=False)
+
+        emails = df['email'].str.lower()
+        marcar(~df['email'].str.match(PATRON_EMAIL), ErrorImportacion.EMAIL_INVALIDO, 'email')
+        # Solo cuentan como "ya vistas" las filas que siguen siendo válidas:
+        # esas son las que se van a importar.
+        validas = errores.isna()
+        marcar(validas & (emails.where(validas).duplicated() | emails.isin(self.emails_vistos)),
+               ErrorImportacion.EMAIL_REPETIDO, 'email')
+        en_bd = set(
+            e.lower() for e in Usuario.objects.filter(email__in=set(df['email'])).values_list('email', flat=True)
+        )
+        marcar(emails.isin(en_bd), ErrorImportacion.EMAIL_EXISTENTE, 'email')
+
+        telefonos = df['telefono']
+        con_telefono = telefonos != ''
+        validas = errores.isna() & con_telefono
+        marcar(validas & (telefonos.where(validas).duplicated() | telefonos.isin(self.telefonos_vistos)),
+               ErrorImportacion.TELEFONO_REPETIDO, 'telefono')
+        en_bd = set(
+            Usuario.objects.filter(telefono__in=set(telefonos[con_telefono])).values_list('telefono', flat=True)
+        )
+        marcar(con_telefono & telefonos.isin(en_bd), ErrorImportacion.TELEFONO_EXISTENTE, 'telefono')
+
+        validas = errores.isna()
+        self.emails_vistos.update(emails[validas])
+        self.telefonos_vistos.update(telefonos[validas & con_telefono])
+
+        return errores_de(df, errores, reglas)
+
+    def recordar(self, chunk, invalidas):
+        """
+        Registra como vistos los emails/teléfonos de las filas de `chunk` que
+        no están en `invalidas`, sin volver a validarlas: lo usa la
+        reanudación para los chunks confirmados antes de la caída.
+        """
+        if not chunk:
+            return
+        df = dataframe_de_texto(chunk)
+        validas = ~df.index.isin(list(invalidas))
+        self.emails_vistos.update(df['email'].str.lower()[validas])
+        self.telefonos_vistos.update(df['telefono'][validas & (df['telefono'] != '')])
+
+
+def dataframe_de_texto(chunk):
+    """
+    DataFrame de texto indexado por número de fila, con cada celda
+    normalizada por lectores.a_texto (la misma que usa la importación).
+    """
+    df = pd.DataFrame([row for _, row in chunk], index=[fila for fila, _ in chunk], dtype=object)
+    return df.map(a_texto)
+
+
+def errores_de(df, errores, reglas):
+    """
+    ErrorImportacion de las filas marcadas en `errores` (índice de la regla
+    por fila). Cada regla es (codigo, columna, con_valor, parametros); el
+    valor sale de esa columna del DataFrame.
+    """
+    resultado = []
+    for fila, indice in errores.dropna().items():
+        codigo, columna, con_valor, parametros = reglas[indice]
+        valor = df.at[fila, columna] if con_valor else ''
+        resultado.append(ErrorImportacion.de_fila(int(fila), codigo, columna, valor, **parametros))
+    return resultado
@@ -1,33 +1,46 @@
 # miAppUsuario/views.py
 
+import asyncio
+import json
+import os
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
-from django.utils import timezone
-from datetime import timedelta 
+from django.http import JsonResponse
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages 
 from django.contrib.auth.hashers import make_password, check_password 
-from django.contrib.auth.decorators import login_required
-import pandas as pd 
-from django.db import IntegrityError
+from django.contrib.admin.views.decorators import staff_member_required
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count
+from django.urls import reverse
 
-from .models import Usuario, Rol
-from miAppCalificacion.models import Pais
-from .forms import UsuarioForm
+from .models import Usuario, Auditoria, ErrorImportacion, SubidaArchivo, ParteSubida
+from .forms import UsuarioForm, FiltroUsuariosForm, FiltroErroresForm
+from .trabajos import (
+    encolar_importacion, encolar_guardado, confirmar_importacion, cancelar_importacion,
+    calcular_hash, ArchivoDuplicado,
+)
+from .almacenamiento import subidas, ParteIncompleta
+from .lectores import EXTENSIONES_SOPORTADAS
+from .estadisticas import obtener_estadisticas, aobtener_estadisticas
+from .paginacion import apaginar_keyset, paginar_keyset, CursorInvalido
+from .busqueda import buscar_usuarios
+from .exportacion import respuesta_exportacion
+from .api import Recurso, respuesta_api
+from .autorizacion import rol_requerido
+from .instrumentacion import resumen_vistas
+from miProyecto.postgresql_pool.base import estadisticas_pools
 
-def home(request):
-    siete_dias_atras = timezone.now() - timedelta(days=7)
-    total_registros = Usuario.objects.count()
-    
-    registros_recientes = Usuario.objects.filter(
-        fecha_creacion__gte=siete_dias_atras
-    ).count()
+# home, read y admin_dashboard son async: bajo ASGI no ocupan un hilo del
+# worker mientras esperan la BD o el cache. Lo que sigue siendo síncrono
+# (validar formularios con ModelChoiceField, plantillas que iteran querysets
+# o la sesión) va por sync_to_async.
 
-    usuarios_activos = Usuario.objects.filter(is_active=True).count()
-    
+async def home(request):
     context = {
-        'total_registros': total_registros,
-        'registros_recientes': registros_recientes,
-        'usuarios_activos': usuarios_activos
+        **await aobtener_estadisticas()
     }
     
     return render(request, 'home.html', context)
@@ -39,75 +52,17 @@ def create(request):
         if 'excel_file' in request.FILES and request.POST.get('bulk_upload') == 'true':
             excel_file = request.FILES['excel_file']
             
-            if not excel_file.name.endswith(('.xlsx', '.xls')):
-                messages.error(request, 'El archivo debe ser de formato Excel (.xlsx o .xls).')
+            if not excel_file.name.lower().endswith(EXTENSIONES_SOPORTADAS):
+                messages.error(request, 'El archivo debe ser de formato Excel (.xlsx) o CSV (.csv).')
                 return redirect('usuarios:create')
             
             try:
-                df = pd.read_excel(excel_file)
-                df = df.fillna('')
-                
-                columnas_esperadas = ['nombre', 'apellido', 'email', 'telefono', 'edad', 'rol_id', 'pais_id', 'contraseña']
-                
-                if not all(col in df.columns for col in columnas_esperadas):
-                    messages.error(request, 'El archivo Excel debe contener las columnas: nombre, apellido, email, telefono, edad, rol_id, pais_id, contraseña.')
-                    return redirect('usuarios:create')
-
-                usuarios_creados = 0
-                errores = []
-                
-                for index, row in df.iterrows():
-                    try:
-                        rol_obj = Rol.objects.get(pk=row['rol_id'])
-                        pais_obj = Pais.objects.get(pk=row['pais_id'])
-                        
-
-                        nuevo_usuario = Usuario(
-                            first_name=row['nombre'],
-                            last_name=row['apellido'],
-                            email=row['email'],
-                            telefono=row['telefono'],
-                            edad=row['edad'],
-                            rol_usuario=rol_obj,
-                            pais_usuario=pais_obj,
-                            is_active=True, 
-                            fecha_creacion=timezone.now()
-                        )
-                        
-                        nuevo_usuario.set_password(row['contraseña'])
-                        
-                        nuevo_usuario.save()
-                        
-                        usuarios_creados += 1
-                        
-                    except Rol.DoesNotExist:
-                        errores.append(f"Fila {index + 2}: El Rol con ID {row['rol_id']} no existe.")
-                    except Pais.DoesNotExist:
-                        errores.append(f"Fila {index + 2}: El País con ID {row['pais_id']} no existe.")
-                    except IntegrityError:
-                        errores.append(f"Fila {index + 2}: Error de integridad (ej. email duplicado) para {row['email']}.")
-                    except Exception as e:
-                        errores.append(f"Fila {index + 2}: Error desconocido al crear usuario. {e}")
-                
-
-                if usuarios_creados > 0:
-                    messages.success(request, f'Carga masiva exitosa: {usuarios_creados} usuarios creados.')
-                
-                if errores:
-                    error_msg = f'Se crearon {usuarios_creados} usuarios. {len(errores)} errores encontrados: '
-                    for i, error in enumerate(errores):
-                        if i < 5:
-                            error_msg += f'({error}) '
-                        else:
-                            error_msg += f'...y {len(errores) - 5} errores más.'
-                            break
-                    messages.error(request, error_msg)
-
-                return redirect('usuarios:read')
-            
-            except Exception as e:
-                messages.error(request, f'Error al procesar el archivo Excel: {e}')
-                return redirect('usuarios:create')
+                auditoria = encolar_importacion(excel_file, request.user)
+            except ArchivoDuplicado as e:
+                messages.warning(request, f'{e} No se volvió a encolar.')
+                return redirect('usuarios:importacion', pk=e.auditoria.pk)
+            messages.success(request, f'Archivo recibido. La importación #{auditoria.pk} se validará en segundo plano antes de confirmarla.')
+            return redirect('usuarios:importacion', pk=auditoria.pk)
                 
         form = UsuarioForm(request.POST)
         
@@ -127,36 +82,123 @@ def create(request):
     else:
         form = UsuarioForm()
 
-    siete_dias_atras = timezone.now() - timedelta(days=7)
-    total_registros = Usuario.objects.count()
-    
-    registros_recientes = Usuario.objects.filter(
-        fecha_creacion__gte=siete_dias_atras
-    ).count()
-
-    usuarios_activos = Usuario.objects.filter(is_active=True).count()
     context = {
         'form': form,
-        'usuarios': Usuario.objects.all(),
-        'total_registros': total_registros,
-        'registros_recientes': registros_recientes,
-        'usuarios_activos': usuarios_activos
+        'tamano_maximo_importacion': settings.IMPORTACION_TAMANO_MAXIMO,
+        **obtener_estadisticas()
     }
     return render(request, 'create.html', context)
 
-def read(request):
-    """Muestra todos los registros de usuarios en una tabla."""
-    usuarios = Usuario.objects.select_related('pais_usuario').all()
-    siete_dias_atras = timezone.now() - timedelta(days=7)
-    
+# Columnas que muestra read.html; el resto no se trae de la BD.
+COLUMNAS_LISTADO = [
+    'id', 'first_name', 'last_name', 'email', 'is_active', 'fecha_creacion',
+    'rol_usuario__nombre', 'pais_usuario__nombre',
+]
+POR_PAGINA = 50
+MAX_POR_PAGINA = 200
+
+def _url_con(params, **cambios):
+    params = params.copy()
+    for clave, valor in cambios.items():
+        params.pop(clave, None)
+        if valor is not None:
+            params[clave] = valor
+    return '?' + params.urlencode()
+
+async def read(request):
+    """Muestra los registros de usuarios en una tabla paginada, filtrable y ordenable."""
+    filtros = FiltroUsuariosForm(request.GET)
+    # rol/pais son ModelChoiceField: validarlos consulta la BD.
+    await sync_to_async(filtros.is_valid)()
+    usuarios = filtros.filtrar(
+        Usuario.objects.select_related('rol_usuario', 'pais_usuario').only(*COLUMNAS_LISTADO)
+    )
+
+    try:
+        por_pagina = min(max(int(request.GET.get('por_pagina', POR_PAGINA)), 1), MAX_POR_PAGINA)
+    except ValueError:
+        por_pagina = POR_PAGINA
+
+    async def paginar():
+        try:
+            return await apaginar_keyset(
+                usuarios, filtros.campo_orden, request.GET.get('cursor'), por_pagina, filtros.descendente
+            )
+        except CursorInvalido:
+            return await apaginar_keyset(usuarios, filtros.campo_orden, None, por_pagina, filtros.descendente)
+
+    pagina, estadisticas = await asyncio.gather(paginar(), aobtener_estadisticas())
+
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    orden_actual = request.GET.get('orden') or 'nombre'
+    urls_orden = {
+        clave: _url_con(
+            params, orden=clave,
+            desc='1' if clave == orden_actual and not filtros.descendente else None
+        )
+        for clave in FiltroUsuariosForm.ORDENES
+    }
+
     context = {
-        'usuarios': usuarios,
-        'total_registros': Usuario.objects.count(),
-        'registros_recientes': Usuario.objects.filter(fecha_creacion__gte=siete_dias_atras).count(),
-        'usuarios_activos': Usuario.objects.filter(is_active=True).count()
+        'usuarios': pagina,
+        'filtros': filtros,
+        'orden_actual': orden_actual,
+        'descendente': filtros.descendente,
+        'urls_orden': urls_orden,
+        'url_siguiente': _url_con(params, cursor=pagina.cursor_siguiente) if pagina.hay_siguiente else None,
+        'url_anterior': _url_con(params, cursor=pagina.cursor_anterior) if pagina.hay_anterior else None,
+        'url_exportar_csv': _url_con(params, formato='csv'),
+        'url_exportar_xlsx': _url_con(params, formato='xlsx'),
+        **estadisticas
     }
     
-    return render(request, 'read.html', context)
+    # La plantilla recorre los <select> de los filtros y los mensajes (sesión).
+    return await sync_to_async(render)(request, 'read.html', context)
+
+COLUMNAS_EXPORTACION = [
+    ('id', 'ID'),
+    ('first_name', 'Nombre'),
+    ('last_name', 'Apellido'),
+    ('email', 'Email'),
+    ('telefono', 'Teléfono'),
+    ('edad', 'Edad'),
+    ('rol_usuario__nombre', 'Rol'),
+    ('pais_usuario__nombre', 'País'),
+    ('is_active', 'Activo'),
+    ('fecha_creacion', 'Fecha Creación'),
+]
+
+API_USUARIOS = Recurso({
+    'id': 'id',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'email': 'email',
+    'telefono': 'telefono',
+    'edad': 'edad',
+    'is_active': 'is_active',
+    'fecha_creacion': 'fecha_creacion',
+    'rol_id': 'rol_usuario_id',
+    'rol': 'rol_usuario__nombre',
+    'pais_id': 'pais_usuario_id',
+    'pais': 'pais_usuario__nombre',
+})
+
+@rol_requerido('Administrador')
+def api_usuarios(request):
+    """JSON de solo lectura con los mismos filtros y orden que read."""
+    filtros = FiltroUsuariosForm(request.GET)
+    return respuesta_api(
+        request, API_USUARIOS, filtros.filtrar(Usuario.objects.all()), filtros.campo_orden, filtros.descendente
+    )
+
+@rol_requerido('Administrador')
+def exportar(request):
+    """Todos los usuarios que pasan los filtros de read, en el mismo orden, como CSV o XLSX."""
+    filtros = FiltroUsuariosForm(request.GET)
+    signo = '-' if filtros.descendente else ''
+    usuarios = filtros.filtrar(Usuario.objects.all()).order_by(f'{signo}{filtros.campo_orden}', f'{signo}pk')
+    return respuesta_exportacion(usuarios, COLUMNAS_EXPORTACION, 'usuarios', request.GET.get('formato'))
 
 def edit(request, pk):
     usuario = get_object_or_404(Usuario, pk=pk)
@@ -180,14 +222,10 @@ def edit(request, pk):
     
     else:
         form = UsuarioForm(instance=usuario)
-    siete_dias_atras = timezone.now() - timedelta(days=7)
-    
     context = {
         'form': form,
         'usuario': usuario,
-        'total_registros': Usuario.objects.count(),
-        'registros_recientes': Usuario.objects.filter(fecha_creacion__gte=siete_dias_atras).count(),
-        'usuarios_activos': Usuario.objects.filter(is_active=True).count()
+        **obtener_estadisticas()
     }
     
     return render(request, 'edit.html', context)
@@ -206,16 +244,253 @@ def delete(request, pk):
             messages.error(request, f'Error al intentar eliminar el usuario "{nombre_completo}". Detalle: {e}')
             return redirect('usuarios:read')
         
-    siete_dias_atras = timezone.now() - timedelta(days=7)
-    
     context = {
         'usuario': usuario,
-        'total_registros': Usuario.objects.count(),
-        'registros_recientes': Usuario.objects.filter(fecha_creacion__gte=siete_dias_atras).count(),
-        'usuarios_activos': Usuario.objects.filter(is_active=True).count()
+        **obtener_estadisticas()
     }
     return render(request, 'delete.html', context)
 
+@rol_requerido('Administrador')
+def buscar(request):
+    """API JSON de búsqueda: ?q=texto&modo=typeahead&limite=10"""
+    typeahead = request.GET.get('modo') == 'typeahead'
+    try:
+        limite = min(max(int(request.GET.get('limite', 10 if typeahead else 20)), 1), 100)
+    except ValueError:
+        limite = 20
+    resultados = buscar_usuarios(request.GET.get('q'), limite=limite, typeahead=typeahead)
+    return JsonResponse({'resultados': resultados})
+
+def importacion(request, pk):
+    """Página de progreso de una carga masiva; consulta importacion_estado."""
+    auditoria = get_object_or_404(Auditoria, pk=pk)
+
+    context = {
+        'auditoria': auditoria,
+        **obtener_estadisticas()
+    }
+    return render(request, 'importacion.html', context)
+
+def importacion_estado(request, pk):
+    auditoria = get_object_or_404(Auditoria, pk=pk)
+    return JsonResponse({
+        'id': auditoria.pk,
+        'status': auditoria.status,
+        'status_display': auditoria.get_status_display(),
+        'row_count': auditoria.row_count,
+        'imported_count': auditoria.imported_count,
+        'updated_count': auditoria.updated_count,
+        'error_count': auditoria.error_count,
+        'porcentaje': auditoria.porcentaje,
+        'terminada': auditoria.terminada,
+        'esperando_confirmacion': auditoria.esperando_confirmacion,
+        'filas_validas': auditoria.filas_validas,
+        'hashes_por_segundo': round(auditoria.hashes_por_segundo),
+        'errors': [str(error) for error in auditoria.errores.all()[:50]],
+    })
+
+def _errores_por_codigo(auditoria):
+    """[(codigo, nombre, total)] de mayor a menor, para el resumen de la página de errores."""
+    nombres = dict(ErrorImportacion.CODIGO_CHOICES)
+    totales = (
+        ErrorImportacion.objects.filter(auditoria=auditoria)
+        .values_list('codigo').annotate(total=Count('id')).order_by('-total')
+    )
+    return [(codigo, nombres.get(codigo, codigo), total) for codigo, total in totales]
+
+def importacion_errores(request, pk):
+    """Errores de una importación, paginados por fila y filtrables por código, columna y fila."""
+    auditoria = get_object_or_404(Auditoria, pk=pk)
+    filtros = FiltroErroresForm(request.GET)
+    errores = filtros.filtrar(ErrorImportacion.objects.filter(auditoria=auditoria))
+
+    try:
+        pagina = paginar_keyset(errores, 'fila', request.GET.get('cursor'), POR_PAGINA)
+    except CursorInvalido:
+        pagina = paginar_keyset(errores, 'fila', None, POR_PAGINA)
+
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    context = {
+        'auditoria': auditoria,
+        'errores': pagina,
+        'filtros': filtros,
+        'por_codigo': _errores_por_codigo(auditoria),
+        'url_siguiente': _url_con(params, cursor=pagina.cursor_siguiente) if pagina.hay_siguiente else None,
+        'url_anterior': _url_con(params, cursor=pagina.cursor_anterior) if pagina.hay_anterior else None,
+        **obtener_estadisticas()
+    }
+    return render(request, 'importacion_errores.html', context)
+
+def importacion_confirmar(request, pk):
+    if request.method == "POST":
+        if confirmar_importacion(pk):
+            messages.success(request, 'Importación confirmada. Se cargarán solo las filas válidas.')
+        else:
+            messages.error(request, 'La importación no está esperando confirmación.')
+    return redirect('usuarios:importacion', pk=pk)
+
+def importacion_cancelar(request, pk):
+    if request.method == "POST":
+        if cancelar_importacion(pk):
+            messages.success(request, 'Importación cancelada. No se creó ningún usuario.')
+        else:
+            messages.error(request, 'La importación ya no se puede cancelar.')
+    return redirect('usuarios:importacion', pk=pk)
+
+# Subidas por partes (create.html): el navegador corta el archivo en partes
+# de IMPORTACION_TAMANO_PARTE y las envía con PUT; cada parte va directo al
+# storage de importaciones. Si se corta, GET de la subida dice qué partes
+# ya llegaron y solo se reenvían las que faltan.
+
+def _subida_del_usuario(request, pk):
+    subida = get_object_or_404(SubidaArchivo, pk=pk)
+    propia = subida.usuario_id == (request.user.pk if request.user.is_authenticated else None)
+    return subida if propia else None
+
+def _estado_subida(subida):
+    return {
+        'id': str(subida.pk),
+        'estado': subida.estado,
+        'tamano': subida.tamano,
+        'tamano_parte': subida.tamano_parte,
+        'partes_totales': subida.partes_totales,
+        'partes_recibidas': list(subida.partes.values_list('numero', flat=True)),
+    }
+
+def subida_iniciar(request):
+    """POST {nombre, tamano, tipo}: reserva el archivo en el storage y devuelve el id y el tamaño de parte."""
+    if request.method != "POST":
+        return JsonResponse({'error': 'Use POST.'}, status=405)
+    try:
+        datos = json.loads(request.body)
+        nombre = os.path.basename(str(datos['nombre']))
+        tamano = int(datos['tamano'])
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Se esperaba JSON con nombre y tamano.'}, status=400)
+    tipo = datos.get('tipo') or Auditoria.TIPO_USUARIOS
+    if tipo not in dict(Auditoria.TIPO_CHOICES) or (tipo != Auditoria.TIPO_USUARIOS and not request.user.is_staff):
+        return JsonResponse({'error': 'Tipo de importación no permitido.'}, status=403)
+    if not nombre.lower().endswith(EXTENSIONES_SOPORTADAS):
+        return JsonResponse({'error': 'El archivo debe ser de formato Excel (.xlsx) o CSV (.csv).'}, status=400)
+    if not 0 < tamano <= settings.IMPORTACION_TAMANO_MAXIMO:
+        return JsonResponse({'error': f'El archivo debe tener entre 1 y {settings.IMPORTACION_TAMANO_MAXIMO} bytes.'}, status=400)
+
+    nombre_guardado, upload_id = subidas().iniciar(f'imports/{nombre}', tamano)
+    subida = SubidaArchivo.objects.create(
+        filename=nombre,
+        tipo=tipo,
+        tamano=tamano,
+        tamano_parte=settings.IMPORTACION_TAMANO_PARTE,
+        nombre_guardado=nombre_guardado,
+        upload_id=upload_id,
+        usuario=request.user if request.user.is_authenticated else None,
+    )
+    return JsonResponse(_estado_subida(subida), status=201)
+
+def subida_estado(request, pk):
+    """GET: partes ya recibidas (para reanudar). DELETE: aborta la subida y borra lo subido."""
+    subida = _subida_del_usuario(request, pk)
+    if subida is None:
+        return JsonResponse({'error': 'La subida no es suya.'}, status=403)
+    if request.method == "DELETE":
+        if subida.estado != SubidaArchivo.ESTADO_INICIADA:
+            return JsonResponse({'error': 'La subida ya terminó.'}, status=409)
+        subidas().abortar(subida)
+        subida.estado = SubidaArchivo.ESTADO_ABORTADA
+        subida.save(update_fields=['estado'])
+    return JsonResponse(_estado_subida(subida))
+
+def subida_parte(request, pk, numero):
+    """PUT con los bytes de la parte `numero`; se copian del request al storage sin leer el cuerpo entero."""
+    if request.method != "PUT":
+        return JsonResponse({'error': 'Use PUT.'}, status=405)
+    subida = _subida_del_usuario(request, pk)
+    if subida is None:
+        return JsonResponse({'error': 'La subida no es suya.'}, status=403)
+    if subida.estado != SubidaArchivo.ESTADO_INICIADA:
+        return JsonResponse({'error': 'La subida ya terminó.'}, status=409)
+    if not 1 <= numero <= subida.partes_totales:
+        return JsonResponse({'error': f'La parte debe estar entre 1 y {subida.partes_totales}.'}, status=400)
+    tamano = subida.tamano_de_parte(numero)
+    if request.META.get('CONTENT_LENGTH') != str(tamano):
+        return JsonResponse({'error': f'La parte {numero} debe tener {tamano} bytes.'}, status=400)
+
+    try:
+        etag = subidas().subir_parte(subida, numero, request, tamano)
+    except ParteIncompleta as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    ParteSubida.objects.update_or_create(subida=subida, numero=numero, defaults={'etag': etag})
+    return JsonResponse({'numero': numero, 'etag': etag})
+
+def subida_completar(request, pk):
+    """
+    POST: con todas las partes recibidas cierra la subida y encola la
+    importación. El SHA-256 para detectar duplicados se calcula leyendo el
+    archivo desde el storage como flujo.
+    """
+    if request.method != "POST":
+        return JsonResponse({'error': 'Use POST.'}, status=405)
+    subida = _subida_del_usuario(request, pk)
+    if subida is None:
+        return JsonResponse({'error': 'La subida no es suya.'}, status=403)
+    if subida.estado == SubidaArchivo.ESTADO_COMPLETADA and subida.auditoria_id:
+        return JsonResponse({'auditoria': subida.auditoria_id, 'url': reverse('usuarios:importacion', args=[subida.auditoria_id])})
+    if subida.estado != SubidaArchivo.ESTADO_INICIADA:
+        return JsonResponse({'error': 'La subida fue abortada.'}, status=409)
+    etags = list(subida.partes.values_list('numero', 'etag'))
+    if len(etags) != subida.partes_totales:
+        return JsonResponse({'error': 'Faltan partes.', **_estado_subida(subida)}, status=409)
+
+    backend = subidas()
+    backend.completar(subida, etags)
+    with backend.abrir(subida.nombre_guardado) as archivo:
+        hash_archivo = calcular_hash(archivo)
+    try:
+        with transaction.atomic():
+            auditoria = encolar_guardado(
+                subida.nombre_guardado, subida.filename, hash_archivo, request.user, tipo=subida.tipo
+            )
+            subida.estado = SubidaArchivo.ESTADO_COMPLETADA
+            subida.auditoria = auditoria
+            subida.save(update_fields=['estado', 'auditoria'])
+    except ArchivoDuplicado as e:
+        backend.storage.delete(subida.nombre_guardado)
+        subida.estado = SubidaArchivo.ESTADO_ABORTADA
+        subida.save(update_fields=['estado'])
+        messages.warning(request, f'{e} No se volvió a encolar.')
+        return JsonResponse({
+            'error': f'{e} No se volvió a encolar.',
+            'auditoria': e.auditoria.pk,
+            'url': reverse('usuarios:importacion', args=[e.auditoria.pk]),
+        }, status=409)
+    messages.success(request, f'Archivo recibido. La importación #{auditoria.pk} se procesará en segundo plano.')
+    return JsonResponse({'auditoria': auditoria.pk, 'url': reverse('usuarios:importacion', args=[auditoria.pk])})
+
+@staff_member_required
+def estado_conexiones(request):
+    """Configuración de conexiones y estado del pool en el proceso que responde."""
+    configuracion = connections['default'].settings_dict
+    return JsonResponse({
+        'pid': os.getpid(),
+        'engine': configuracion['ENGINE'],
+        'conn_max_age': configuracion['CONN_MAX_AGE'],
+        'conn_health_checks': configuracion['CONN_HEALTH_CHECKS'],
+        'pools': estadisticas_pools(),
+    })
+
+@staff_member_required
+def rendimiento(request):
+    """Percentiles por vista que junta InstrumentacionMiddleware en este proceso."""
+    context = {
+        'vistas': resumen_vistas(),
+        'muestreo': settings.INSTRUMENTACION_MUESTREO,
+        'pid': os.getpid(),
+        'pools': estadisticas_pools(),
+        **obtener_estadisticas()
+    }
+    return render(request, 'rendimiento.html', context)
+
 def login_view(request):
     if request.user.is_authenticated:
         return redirect('admin_dashboard')
@@ -239,21 +514,14 @@ def login_view(request):
     return render(request, 'login.html')
 
 
-@login_required(login_url='login') 
-def admin_dashboard(request):
-    rol_actual = request.user.rol_usuario.nombre if hasattr(request.user, 'rol_usuario') and request.user.rol_usuario else None
-    
-    if rol_actual == 'Administrador':
-        context = {
-            'nombre_usuario': request.user.first_name, 
-            'rol': rol_actual,
-        }
-        return render(request, 'home.html', context) 
-        
-    else:
-        messages.warning(request, f'Acceso denegado. Su rol ({rol_actual if rol_actual else "No definido"}) no está autorizado para esta área.')
-        logout(request)
-        return redirect('login')
+@rol_requerido('Administrador')
+async def admin_dashboard(request):
+    context = {
+        'nombre_usuario': request.user.first_name,
+        'rol': request.rol,
+        **await aobtener_estadisticas()
+    }
+    return render(request, 'home.html', context)
 
 def logout_view(request):
     logout(request)
@@ -0,0 +1,170 @@
+"""
+Backend PostgreSQL con pool de conexiones por proceso.
+
+Django 5.0 con psycopg2 no trae pool propio: cada request abre una conexión
+nueva (CONN_MAX_AGE=0) o retiene una por hilo (CONN_MAX_AGE>0). Este backend
+hereda del de Django y solo cambia de dónde sale la conexión y adónde va al
+cerrarse: get_new_connection() la toma de un pool y _close() la devuelve.
+
+Se configura con la clave POOL de DATABASES['default'] (ver settings):
+    max_size: conexiones abiertas como máximo por proceso.
+    timeout:  segundos que se espera un cupo antes de fallar.
+Con CONN_HEALTH_CHECKS=True, cada conexión libre se prueba con SELECT 1 antes
+de entregarla.
+"""
+
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+from django.db.backends.postgresql import base
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+Database = base.Database
+
+
+class Pool:
+    def __init__(self, alias, max_size=10, timeout=30.0):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self._libres = deque()
+        self._cupos = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.en_uso = 0
+        self.creadas = 0
+        self.descartadas = 0
+        self.entregas = 0
+        self.agotado = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def tomar(self, crear, verificar=None):
+        inicio = time.monotonic()
+        if not self._cupos.acquire(timeout=self.timeout):
+            with self._lock:
+                self.agotado += 1
+            raise OperationalError(
+                f'Pool de conexiones "{self.alias}" agotado: {self.max_size} en uso '
+                f'tras esperar {self.timeout} s.'
+            )
+        espera = time.monotonic() - inicio
+        try:
+            conexion = self._libre(verificar)
+            if conexion is None:
+                conexion = crear()
+                with self._lock:
+                    self.creadas += 1
+        except BaseException:
+            self._cupos.release()
+            raise
+        with self._lock:
+            self.en_uso += 1
+            self.entregas += 1
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+        return conexion
+
+    def _libre(self, verificar):
+        while True:
+            with self._lock:
+                if not self._libres:
+                    return None
+                # LIFO: la más recién usada es la que menos probablemente
+                # haya cerrado el servidor por inactividad.
+                conexion = self._libres.pop()
+            if not conexion.closed and (verificar is None or verificar(conexion)):
+                return conexion
+            self._descartar(conexion)
+
+    def devolver(self, conexion, reutilizable=True):
+        """Limpia la conexión y la deja libre; si algo falla, la cierra."""
+        try:
+            if reutilizable and not conexion.closed:
+                estado = conexion.info.transaction_status
+                if estado == TRANSACTION_STATUS_UNKNOWN:
+                    reutilizable = False
+                else:
+                    if estado != TRANSACTION_STATUS_IDLE:
+                        conexion.rollback()
+                    conexion.autocommit = True
+                    # Cursores WITH HOLD de iterator(), SET, tablas temporales...
+                    with conexion.cursor() as cursor:
+                        cursor.execute('DISCARD ALL')
+        except Database.Error:
+            reutilizable = False
+
+        with self._lock:
+            self.en_uso -= 1
+        if reutilizable and not conexion.closed:
+            with self._lock:
+                self._libres.append(conexion)
+        else:
+            self._descartar(conexion)
+        self._cupos.release()
+
+    def _descartar(self, conexion):
+        try:
+            conexion.close()
+        except Database.Error:
+            pass
+        with self._lock:
+            self.descartadas += 1
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'en_uso': self.en_uso,
+                'libres': len(self._libres),
+                'creadas': self.creadas,
+                'descartadas': self.descartadas,
+                'entregas': self.entregas,
+                'agotado': self.agotado,
+                'espera_promedio_ms': round(self.espera_total * 1000 / self.entregas, 3) if self.entregas else 0.0,
+                'espera_max_ms': round(self.espera_max * 1000, 3),
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_de(alias, configuracion):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = Pool(alias, **configuracion)
+        return _pools[alias]
+
+
+def estadisticas_pools():
+    """Estado de los pools de este proceso (cada worker tiene los suyos)."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.estadisticas() for alias, pool in pools.items()}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        return pool_de(self.alias, self.settings_dict.get('POOL') or {})
+
+    def _verificar(self, conexion):
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        verificar = self._verificar if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+        return self.pool.tomar(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params), verificar)
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # Cerrada dentro de un atomic(), Django sigue apuntando a la
+                # conexión hasta el rollback: no puede volver al pool.
+                self.pool.devolver(self.connection, reutilizable=not self.in_atomic_block)
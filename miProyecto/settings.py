@@ -30,6 +30,9 @@ LOGIN_REDIRECT_URL = '/admin-dashboard/'
 
 AUTH_USER_MODEL = 'miAppUsuario.Usuario'
 
+# Carga request.user con su rol y país en una sola consulta.
+AUTHENTICATION_BACKENDS = ['miAppUsuario.backends.UsuarioBackend']
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-jtkvaliafy!hk%ofpe$6^9r1jy*0tzcfz%)808op2n0crvow_%'
 
@@ -53,6 +56,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero, para medir el request completo. Inactivo si INSTRUMENTACION_MUESTREO=0.
+    'miAppUsuario.instrumentacion.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -92,18 +97,57 @@ WSGI_APPLICATION = 'miProyecto.wsgi.application'
 #     }
 # }
 
+# Conexiones:
+# - DB_POOL=True usa miProyecto.postgresql_pool: un pool por proceso de hasta
+#   DB_POOL_MAX_SIZE conexiones; si no hay cupo se espera DB_POOL_TIMEOUT
+#   segundos. Con pool, DB_CONN_MAX_AGE debe quedar en 0 para que cada request
+#   devuelva su conexión al terminar.
+# - Sin pool, DB_CONN_MAX_AGE > 0 mantiene una conexión persistente por hilo.
+# - DB_CONN_HEALTH_CHECKS prueba la conexión reutilizada antes de usarla.
+DB_POOL = env.bool('DB_POOL', default=False)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'nuam_db',    
-        'USER': 'postgres',          
+        'ENGINE': 'miProyecto.postgresql_pool' if DB_POOL else 'django.db.backends.postgresql',
+        'NAME': env('DB_NAME', default='nuam_db'),
+        'USER': env('DB_USER', default='postgres'),
         'PASSWORD': env('DB_PASSWORD'),   
-        'HOST': 'localhost', 
-        'PORT': '5432',   
+        'HOST': env('DB_HOST', default='localhost'),
+        'PORT': env('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=0),
+        'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=False),
+        'POOL': {
+            'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+            'timeout': env.float('DB_POOL_TIMEOUT', default=30.0),
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# locmem por defecto; CACHE_URL permite usar redis://, memcache://, etc.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Segundos que viven en cache los contadores de usuarios (miAppUsuario.estadisticas).
+ESTADISTICAS_CACHE_TTL = env.int('ESTADISTICAS_CACHE_TTL', default=300)
+
+
+# Instrumentación por request (miAppUsuario.instrumentacion).
+# Fracción de requests medidos (0 = middleware desactivado, 1 = todos).
+INSTRUMENTACION_MUESTREO = env.float('INSTRUMENTACION_MUESTREO', default=0.0)
+# Medir el pico de memoria con tracemalloc (agrega overhead a todo el proceso).
+INSTRUMENTACION_MEMORIA = env.bool('INSTRUMENTACION_MEMORIA', default=False)
+# Requests medidos que pasan alguno de estos umbrales se loguean como warning.
+INSTRUMENTACION_UMBRAL_MS = env.int('INSTRUMENTACION_UMBRAL_MS', default=1000)
+INSTRUMENTACION_UMBRAL_CONSULTAS = env.int('INSTRUMENTACION_UMBRAL_CONSULTAS', default=50)
+# Últimas muestras que se guardan por vista para los percentiles.
+INSTRUMENTACION_MUESTRAS = env.int('INSTRUMENTACION_MUESTRAS', default=1000)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -144,3 +188,81 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Carga masiva de usuarios (miAppUsuario.importacion)
+# Filas por bulk_create / transacción.
+
+IMPORTACION_CHUNK_SIZE = env.int('IMPORTACION_CHUNK_SIZE', default=1000)
+
+# Procesos para hashear contraseñas en paralelo (miAppUsuario.hashing).
+# None = un proceso por núcleo.
+
+IMPORTACION_HASH_WORKERS = env.int('IMPORTACION_HASH_WORKERS', default=None)
+
+# Segundos sin latido tras los cuales un trabajo VALIDATING/IMPORTING se da
+# por abandonado (worker caído) y otro worker lo reanuda desde su último
+# chunk confirmado.
+
+IMPORTACION_LATIDO_MAXIMO = env.int('IMPORTACION_LATIDO_MAXIMO', default=600)
+
+# Tabla de tasas en memoria (miAppCalificacion.conversion): cada cuántos
+# segundos un proceso compara su versión con la de la BD, y edad máxima de la
+# tabla aunque la versión no cambie (cubre cambios por SQL directo).
+
+TASAS_VERIFICACION_SEGUNDOS = env.float('TASAS_VERIFICACION_SEGUNDOS', default=5.0)
+TASAS_TTL_SEGUNDOS = env.float('TASAS_TTL_SEGUNDOS', default=300.0)
+
+# Un cambio de tasas que afecta a más calificaciones que esto no se recalcula
+# en el request: queda como RecalculoPendiente para procesar_importaciones.
+
+RESUMENES_RECALCULO_SINCRONO = env.int('RESUMENES_RECALCULO_SINCRONO', default=5000)
+
+# Particiones mensuales de Auditoria y UsuarioHistorico (miAppUsuario.particiones,
+# `manage.py mantener_particiones`). Retención en meses completos además del
+# actual; 0 = no eliminar nunca. Las particiones vencidas se archivan como
+# CSV comprimido en PARTICIONES_DIRECTORIO_ARCHIVO antes de eliminarlas.
+
+RETENCION_AUDITORIA_MESES = env.int('RETENCION_AUDITORIA_MESES', default=12)
+RETENCION_HISTORICO_MESES = env.int('RETENCION_HISTORICO_MESES', default=24)
+PARTICIONES_MESES_FUTUROS = env.int('PARTICIONES_MESES_FUTUROS', default=3)
+PARTICIONES_DIRECTORIO_ARCHIVO = env('PARTICIONES_DIRECTORIO_ARCHIVO', default=str(BASE_DIR / 'archivo'))
+
+# Archivos subidos (Auditoria.file)
+
+MEDIA_URL = 'media/'
+MEDIA_ROOT = env('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+# Storage de los archivos de importación (Auditoria.file, miAppUsuario.almacenamiento).
+# IMPORTACION_ALMACENAMIENTO=local los guarda en MEDIA_ROOT; =s3 en un bucket
+# S3 o compatible (MinIO: S3_ENDPOINT_URL=http://localhost:9000) con
+# django-storages. Conviene una regla de ciclo de vida en el bucket que
+# aborte las subidas multipart incompletas.
+
+IMPORTACION_ALMACENAMIENTO = env('IMPORTACION_ALMACENAMIENTO', default='local')
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'importaciones': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+}
+
+if IMPORTACION_ALMACENAMIENTO == 's3':
+    STORAGES['importaciones'] = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': env('S3_BUCKET'),
+            'endpoint_url': env('S3_ENDPOINT_URL', default=None),
+            'access_key': env('S3_ACCESS_KEY', default=None),
+            'secret_key': env('S3_SECRET_KEY', default=None),
+            'region_name': env('S3_REGION', default=None),
+            'location': env('S3_PREFIJO', default=''),
+            'file_overwrite': False,
+        },
+    }
+
+# Subidas por partes: bytes por parte (S3 exige al menos 5 MB, salvo la
+# última), tamaño máximo de archivo y bytes por lectura al importar desde S3.
+
+IMPORTACION_TAMANO_PARTE = env.int('IMPORTACION_TAMANO_PARTE', default=8 * 1024 * 1024)
+IMPORTACION_TAMANO_MAXIMO = env.int('IMPORTACION_TAMANO_MAXIMO', default=2 * 1024 ** 3)
+IMPORTACION_TAMANO_LECTURA = env.int('IMPORTACION_TAMANO_LECTURA', default=8 * 1024 * 1024)